@@ -0,0 +1,95 @@
+# financial_analyzer/batch.py
+"""
+Headless entry point: runs analyses in batches without the Flet UI.
+
+    python batch.py run <directories, PDFs or manifests ...> [--output DIR] [--concurrency N] [--format pdf|html|json] [--no-pdf]
+    python batch.py serve [--host HOST] [--port PORT] [--concurrency N]
+
+`run` analyses every PDF of the given directories on its own, or the analyses listed in .json/.jsonl
+manifests ({"id": ..., "files": [...]}), writes results.jsonl and one report per analysis (PDF, HTML
+page or JSON payload) to the output directory and exits with status 1 if any analysis failed. `serve` starts the local HTTP batch
+service, see service.batch_service.BatchService.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from config.app_config import (batch_concurrency, batch_output_dir, batch_report_format, batch_service_host,
+                               batch_service_port, log_level)
+
+
+def run(args: argparse.Namespace) -> int:
+    from core.batch import RESULT_FAILED, RESULTS_FILE_NAME, BatchRunner, collect_items
+    from core.report_renderer import get_renderer
+
+    try:
+        get_renderer(args.format)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    try:
+        items = collect_items(args.sources, recursive=args.recursive)
+    except (ValueError, OSError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    if not items:
+        print("No PDF files found in the given sources.", file=sys.stderr)
+        return 1
+    runner = BatchRunner(args.concurrency)
+
+    def report(result) -> None:
+        outcome = "ok" if result["status"] != RESULT_FAILED else f"FAILED {result['error']}"
+        print(f"{result['id']}: {outcome} ({result['seconds']:.1f}s)", flush=True)
+
+    try:
+        results = asyncio.run(runner.run(items, args.output, args.api_key, not args.no_pdf, args.format,
+                                         on_result=report))
+    finally:
+        runner.shutdown()
+    failed = sum(result["status"] == RESULT_FAILED for result in results)
+    print(f"{len(results) - failed} of {len(results)} analyses done, {failed} failed. "
+          f"Results: {os.path.join(args.output, RESULTS_FILE_NAME)}")
+    return 1 if failed else 0
+
+
+def serve(args: argparse.Namespace) -> int:
+    from service.batch_service import BatchService
+
+    service = BatchService(args.concurrency, args.output)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run financial analyses in batches without the UI.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="analyse directories, PDFs or manifests and exit")
+    run_parser.add_argument("sources", nargs="+", help="directories of PDFs, PDF files or .json/.jsonl manifests")
+    run_parser.add_argument("--recursive", action="store_true", help="also collect PDFs in sub directories")
+    run_parser.add_argument("--format", default=batch_report_format,
+                            help="report format: pdf, html or json (cheapest, ratios and explanations only)")
+    run_parser.add_argument("--no-pdf", action="store_true", help="write results.jsonl only, without explanations and reports")
+    run_parser.set_defaults(handler=run)
+
+    serve_parser = subparsers.add_parser("serve", help="start the local HTTP batch service")
+    serve_parser.add_argument("--host", default=batch_service_host)
+    serve_parser.add_argument("--port", type=int, default=batch_service_port)
+    serve_parser.set_defaults(handler=serve)
+
+    for subparser in (run_parser, serve_parser):
+        subparser.add_argument("--output", default=batch_output_dir, help="directory of results and reports")
+        subparser.add_argument("--concurrency", type=int, default=batch_concurrency, help="analyses run at the same time")
+    run_parser.add_argument("--api-key", default=None, help="Gemini API key, GOOGLE_API_KEY by default")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=log_level, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
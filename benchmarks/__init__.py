@@ -0,0 +1,8 @@
+import os
+
+# Benchmarks never talk to Gemini, but the Gemini client refuses to be built without a key
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+# Rate limits are sized for the real API; benchmarks measure our own orchestration unless they configure a scheduler
+os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "1000000")
+os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "1000000000")
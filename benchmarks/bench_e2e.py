@@ -0,0 +1,241 @@
+# financial_analyzer/benchmarks/bench_e2e.py
+"""
+Offline end-to-end benchmark of the analysis pipeline on synthetic filings and a fake chat model.
+
+For every page count it times each stage on its own (load_and_extract_text_from_pdfs,
+extract_financial_data_from_text, calculate_ratios and generate_pdf_report), then runs
+process_financial_analysis repeatedly and reports throughput, p50/p99 latency, LLM calls,
+tokens and peak RSS. The PDF text and LLM response caches, the document store and the results store
+are bypassed, so every run is cold.
+
+Results can be written as JSON and compared against an earlier run, e.g. of another commit:
+
+Usage: python -m benchmarks.bench_e2e [--pages 5,50,200] [--runs 10] [--concurrency 1] [--latency 0.05]
+                                      [--output results.json] [--baseline earlier.json]
+
+Peak RSS is the high-water mark of the whole process, so scenarios run from the smallest page count up.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+from unittest import mock
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks.synthetic_filings import write_filing_pdf
+from core import agent, llm, pdf_processor, pipeline
+from core.document_store import DocumentStore
+from core.data_extractor import extract_financial_data_from_text
+from core.pdf_cache import PdfTextCache
+from core.ratio_calculator import calculate_ratios
+from core.report_generator import generate_pdf_report
+
+# Left out of the synthetic statements, so the pipeline asks the LLM for them as it would for a real filing
+OMITTED_FIELDS = ("inventory", "interest_expense")
+
+# Metrics where a higher value is better, for the comparison against a baseline
+HIGHER_IS_BETTER = {"throughput_per_second"}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile, q in [0, 100]."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {"p50": percentile(values, 50), "p99": percentile(values, 99), "mean": statistics.fmean(values)}
+
+
+def peak_rss_mb() -> Optional[float]:
+    """High-water mark of the resident set size of this process, None where it cannot be read."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB on Linux
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+@contextmanager
+def offline_environment(fake_model: FakeChatModel, work_dir: str):
+    """Routes every LLM call to the fake model and makes every PDF text and document lookup a miss."""
+    fake_pool = llm.ChatModelPool(factory=lambda api_key: fake_model)
+    cold_runs = iter(range(sys.maxsize))
+
+    class ColdPdfTextCache(PdfTextCache):
+        def get_pages(self, content_hash, parser_version):
+            self.cache_dir = os.path.join(work_dir, "pdf_cache", str(next(cold_runs)))
+            return super().get_pages(content_hash, parser_version)
+
+    with mock.patch.object(llm, "chat_model_pool", fake_pool), mock.patch.object(llm, "llm_response_cache", None), \
+            mock.patch.object(pdf_processor, "pdf_text_cache", ColdPdfTextCache(work_dir, max_bytes=sys.maxsize)), \
+            mock.patch.object(pipeline, "document_store", DocumentStore(max_entries=0)), \
+            mock.patch.object(pipeline, "results_store", None):
+        yield
+
+
+def timed(fn: Callable[[], Any]):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def bench_stages(pdf_name: str, upload_dir: str, output_dir: str, runs: int) -> Dict[str, Dict[str, float]]:
+    client = llm.get_chat_client()
+    durations: Dict[str, List[float]] = {
+        "load_and_extract_text_from_pdfs": [],
+        "extract_financial_data_from_text": [],
+        "calculate_ratios": [],
+        "generate_pdf_report": [],
+    }
+    for _ in range(runs):
+        text, elapsed = timed(lambda: pdf_processor.load_and_extract_text_from_pdfs([pdf_name], upload_dir))
+        durations["load_and_extract_text_from_pdfs"].append(elapsed)
+        data, elapsed = timed(lambda: extract_financial_data_from_text(text, use_cache=False, llm=client))
+        durations["extract_financial_data_from_text"].append(elapsed)
+        ratios, elapsed = timed(lambda: calculate_ratios(data))
+        durations["calculate_ratios"].append(elapsed)
+        report, elapsed = timed(lambda: generate_pdf_report(ratios, output_dir, llm=client))
+        durations["generate_pdf_report"].append(elapsed)
+        if not report:
+            raise RuntimeError("generate_pdf_report failed, see the log")
+    return {stage: summarize(values) for stage, values in durations.items()}
+
+
+def bench_end_to_end(pdf_name: str, upload_dir: str, work_dir: str, runs: int, concurrency: int) -> Dict[str, float]:
+    def run(index: int) -> float:
+        output_dir = os.path.join(work_dir, "reports", str(index))
+        os.makedirs(output_dir, exist_ok=True)
+        result, elapsed = timed(lambda: agent.process_financial_analysis(
+            [pdf_name], "offline-benchmark", upload_dir, use_agent=False, output_dir=output_dir))
+        if not (result and os.path.exists(result)):
+            raise RuntimeError(f"process_financial_analysis failed: {result}")
+        return elapsed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(run, range(runs)))
+    wall_time = time.perf_counter() - start
+    return {"throughput_per_second": runs / wall_time, "wall_seconds": wall_time, **summarize(latencies)}
+
+
+def run_scenario(pages: int, runs: int, concurrency: int, latency: float) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as work_dir:
+        upload_dir = os.path.join(work_dir, "upload_dir")
+        os.makedirs(upload_dir)
+        pdf_name = f"filing-{pages}.pdf"
+        write_filing_pdf(os.path.join(upload_dir, pdf_name), pages=pages, seed=pages, omit_fields=OMITTED_FIELDS)
+
+        fake_model = FakeChatModel(latency=latency, upload_dir=upload_dir)
+        with offline_environment(fake_model, work_dir):
+            stages = bench_stages(pdf_name, upload_dir, work_dir, runs)
+            fake_model.reset_counters()
+            end_to_end = bench_end_to_end(pdf_name, upload_dir, work_dir, runs, concurrency)
+
+    return {
+        "pages": pages,
+        "stages": stages,
+        "end_to_end": end_to_end,
+        "llm_calls_per_run": fake_model.calls / runs,
+        "prompt_tokens_per_run": fake_model.prompt_tokens / runs,
+        "completion_tokens_per_run": fake_model.completion_tokens / runs,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def print_scenario(scenario: Dict[str, Any]) -> None:
+    end_to_end = scenario["end_to_end"]
+    print(f"\n{scenario['pages']} pages")
+    for stage, summary in scenario["stages"].items():
+        print(f"  {stage:34} p50 {summary['p50'] * 1000:9.2f} ms   p99 {summary['p99'] * 1000:9.2f} ms")
+    print(f"  {'process_financial_analysis':34} p50 {end_to_end['p50'] * 1000:9.2f} ms   p99 {end_to_end['p99'] * 1000:9.2f} ms"
+          f"   {end_to_end['throughput_per_second']:.2f} analyses/s")
+    rss = scenario["peak_rss_mb"]
+    print(f"  llm calls/run {scenario['llm_calls_per_run']:.1f}   prompt tokens/run {scenario['prompt_tokens_per_run']:.0f}"
+          f"   completion tokens/run {scenario['completion_tokens_per_run']:.0f}"
+          f"   peak RSS {f'{rss:.1f} MB' if rss is not None else 'n/a'}")
+
+
+def flatten(scenario: Dict[str, Any]) -> Dict[str, float]:
+    metrics = {f"{stage}.p50": summary["p50"] for stage, summary in scenario["stages"].items()}
+    metrics.update({f"process_financial_analysis.{name}": value for name, value in scenario["end_to_end"].items()
+                    if name != "wall_seconds"})
+    metrics.update({name: scenario[name] for name in ("llm_calls_per_run", "prompt_tokens_per_run", "peak_rss_mb")
+                    if scenario[name] is not None})
+    return metrics
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Prints the change of every metric against a baseline result file, matched by page count."""
+    print(f"\ncompared with {baseline['meta']['commit']} (negative is better except for throughput)")
+    baseline_scenarios = {scenario["pages"]: flatten(scenario) for scenario in baseline["scenarios"]}
+    for scenario in results["scenarios"]:
+        before = baseline_scenarios.get(scenario["pages"])
+        if before is None:
+            continue
+        print(f"  {scenario['pages']} pages")
+        for name, value in flatten(scenario).items():
+            if before.get(name):
+                change = (value - before[name]) / before[name]
+                flag = "better" if (change > 0) == (name.split(".")[-1] in HIGHER_IS_BETTER) else "worse"
+                flag = flag if abs(change) >= 0.05 else ""
+                print(f"    {name:48} {before[name]:12.4f} -> {value:12.4f}  {change:+7.1%} {flag}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--pages", default="5,50,200", help="comma separated page counts of the synthetic filings")
+    parser.add_argument("--runs", type=int, default=10, help="runs per stage and per end-to-end scenario")
+    parser.add_argument("--concurrency", type=int, default=1, help="analyses run in parallel in the end-to-end scenario")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake LLM call")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    page_counts = sorted(int(pages) for pages in args.pages.split(","))
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "concurrency": args.concurrency,
+            "latency": args.latency,
+        },
+        "scenarios": [run_scenario(pages, args.runs, args.concurrency, args.latency) for pages in page_counts],
+    }
+
+    print(f"commit {results['meta']['commit']}, {args.runs} runs, concurrency {args.concurrency}, "
+          f"latency per LLM call {args.latency:.3f}s")
+    for scenario in results["scenarios"]:
+        print_scenario(scenario)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nresults written to {args.output}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
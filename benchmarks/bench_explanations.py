@@ -0,0 +1,54 @@
+# financial_analyzer/benchmarks/bench_explanations.py
+"""
+Compares serial and concurrent ratio explanation generation against a fake chat model.
+
+Usage: python -m benchmarks.bench_explanations [latency_seconds] [max_concurrency]
+"""
+import sys
+import time
+from unittest import mock
+from benchmarks.fake_llm import FakeChatModel
+from core import llm, report_generator
+
+SAMPLE_RATIOS = {
+    "current_ratio": 1.8,
+    "quick_ratio": 1.2,
+    "net_profit_margin": 12.5,
+    "roa": 6.4,
+    "roe": 14.1,
+    "asset_turnover": 0.9,
+    "inventory_turnover": 5.3,
+    "debt_to_equity": 0.7,
+    "interest_coverage": 8.2,
+}
+
+
+def run_serial(ratios, client) -> dict:
+    return {name: report_generator.get_ratio_explanation(name, value, ratios, llm=client) for name, value in ratios.items()}
+
+
+def run_concurrent(ratios, client, max_concurrency: int) -> dict:
+    return report_generator.get_ratio_explanations(ratios, max_concurrency=max_concurrency, llm=client)
+
+
+def main(latency: float = 0.2, max_concurrency: int = 4):
+    client = llm.PooledChatModel(FakeChatModel(latency=latency), max_concurrency=len(SAMPLE_RATIOS))
+    # The response cache is disabled so both runs pay for every call
+    with mock.patch.object(llm, "llm_response_cache", None):
+        start = time.perf_counter()
+        run_serial(SAMPLE_RATIOS, client)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        run_concurrent(SAMPLE_RATIOS, client, max_concurrency)
+        concurrent_time = time.perf_counter() - start
+
+    print(f"ratios: {len(SAMPLE_RATIOS)}, latency per call: {latency:.3f}s, max concurrency: {max_concurrency}")
+    print(f"serial:     {serial_time:.3f}s")
+    print(f"concurrent: {concurrent_time:.3f}s")
+    print(f"speedup:    {serial_time / concurrent_time:.2f}x")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(float(args[0]) if args else 0.2, int(args[1]) if len(args) > 1 else 4)
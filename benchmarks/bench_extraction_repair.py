@@ -0,0 +1,58 @@
+# financial_analyzer/benchmarks/bench_extraction_repair.py
+"""
+Compares targeted repair prompts with re-sending the whole extraction prompt when the LLM answer
+has invalid values, leaves fields out or is not JSON, on a synthetic filing and a fake chat model.
+
+Usage: python -m benchmarks.bench_extraction_repair [pages]
+"""
+import os
+import sys
+import tempfile
+from unittest import mock
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks.synthetic_filings import write_filing_pdf
+from core import llm
+from core.data_extractor import FINANCIAL_FIELDS, extract_financial_data_from_text
+from core.pdf_processor import parse_pdf_pages
+
+SCENARIOS = {
+    "clean": {},
+    "formatted numbers": {"extraction_overrides": {"revenue": "150,000", "interest_expense": "(3,000)",
+                                                   "total_debt": "$60,000.00"}},
+    "invalid values": {"extraction_overrides": {"revenue": "n/a", "net_income": "see note 7"}},
+    "left out fields": {"extraction_overrides": {"inventory": None, "total_assets": None}},
+    "not JSON": {"prose_answers": True},
+}
+
+
+def run(text: str, options: dict) -> dict:
+    fake_model = FakeChatModel(latency=0.0, **options)
+    client = llm.PooledChatModel(fake_model, max_concurrency=1)
+    data = extract_financial_data_from_text(text, use_cache=False, llm=client)
+    first_prompt_tokens = fake_model.prompt_tokens if fake_model.calls == 1 else None
+    return {"calls": fake_model.calls, "prompt_tokens": fake_model.prompt_tokens,
+            "fields": len(data or {}), "first_prompt_tokens": first_prompt_tokens}
+
+
+def main(pages: int = 10):
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "filing.pdf")
+        write_filing_pdf(path, pages=pages)
+        text = "\n\n".join(parse_pdf_pages(path))
+
+    # The response cache is disabled so every prompt reaches the fake model
+    with mock.patch.object(llm, "llm_response_cache", None):
+        full_prompt_tokens = run(text, {})["first_prompt_tokens"]
+        print(f"filing: {pages} pages, extraction prompt ~{full_prompt_tokens} tokens")
+        print(f"{'scenario':18} {'calls':>5} {'fields':>7} {'prompt tokens':>14} {'full retry':>11} {'saved':>7}")
+        for name, options in SCENARIOS.items():
+            result = run(text, options)
+            # Re-sending the whole prompt costs it once more per failed answer
+            full_retry = full_prompt_tokens * result["calls"]
+            print(f"{name:18} {result['calls']:5d} {result['fields']:4d}/{len(FINANCIAL_FIELDS)} "
+                  f"{result['prompt_tokens']:14d} {full_retry:11d} {full_retry - result['prompt_tokens']:7d}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 10)
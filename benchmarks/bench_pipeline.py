@@ -0,0 +1,64 @@
+# financial_analyzer/benchmarks/bench_pipeline.py
+"""
+Compares the direct in-process pipeline with the ReAct agent path of process_financial_analysis,
+counting LLM calls and measuring latency against a fake chat model.
+
+Usage: python -m benchmarks.bench_pipeline [latency_seconds]
+"""
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+from fpdf import FPDF
+from benchmarks.fake_llm import FakeChatModel
+from core import agent, llm, pipeline
+from core.document_store import DocumentStore
+
+
+def write_sample_pdf(path: str) -> None:
+    pdf = FPDF()
+    pdf.set_font("Arial", "", 11)
+    pdf.add_page()
+    pdf.multi_cell(0, 6, "Balance sheet\nTotal current assets 50,000\nTotal assets 200,000\nCurrent liabilities 25,000\n"
+                         "Income statement\nRevenue 150,000\nCost of sales 90,000\nNet income 18,000\n")
+    pdf.output(path)
+
+
+def run_once(fake_model: FakeChatModel, pdf_name: str, upload_dir: str, use_agent: bool):
+    fake_model.calls = 0
+    fake_model.agent_calls = 0
+    start = time.perf_counter()
+    result = agent.process_financial_analysis([pdf_name], "offline-benchmark", upload_dir, use_agent=use_agent)
+    elapsed = time.perf_counter() - start
+    return elapsed, fake_model.calls, fake_model.agent_calls, result
+
+
+def main(latency: float = 0.2):
+    with tempfile.TemporaryDirectory() as work_dir:
+        upload_dir = os.path.join(work_dir, "upload_dir")
+        os.makedirs(upload_dir)
+        write_sample_pdf(os.path.join(upload_dir, "sample.pdf"))
+
+        fake_model = FakeChatModel(latency=latency, upload_dir=upload_dir)
+        fake_pool = llm.ChatModelPool(factory=lambda api_key: fake_model)
+        # The response cache, document store and results store are disabled so both paths pay for every call
+        with mock.patch.object(llm, "chat_model_pool", fake_pool), mock.patch.object(llm, "llm_response_cache", None), \
+                mock.patch.object(pipeline, "document_store", DocumentStore(max_entries=0)), \
+                mock.patch.object(pipeline, "results_store", None):
+            results = {
+                "pipeline": run_once(fake_model, "sample.pdf", upload_dir, use_agent=False),
+                "agent": run_once(fake_model, "sample.pdf", upload_dir, use_agent=True),
+            }
+
+    print(f"latency per LLM call: {latency:.3f}s")
+    for mode, (elapsed, calls, agent_calls, result) in results.items():
+        ok = "ok" if result and os.path.basename(result) == "financial_report.pdf" else f"failed: {result}"
+        print(f"{mode:9} {elapsed:7.3f}s  llm calls: {calls:2d} (agent routing: {agent_calls})  {ok}")
+    pipeline_time, agent_time = results["pipeline"][0], results["agent"][0]
+    print(f"pipeline speedup over agent: {agent_time / pipeline_time:.2f}x")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(float(args[0]) if args else 0.2)
@@ -0,0 +1,61 @@
+# financial_analyzer/benchmarks/bench_ratios.py
+"""
+Times the vectorized batch ratio engine against per-record calculate_ratios calls, the scalar
+implementation used for single analyses. Before timing, the batch results of the sampled rows are
+checked against the per-record ones.
+
+Usage: python -m benchmarks.bench_ratios [rows ...]   (default: 10000 1000000)
+"""
+import sys
+import time
+import numpy as np
+from core.ratio_calculator import FINANCIAL_FIELDS, calculate_ratios, calculate_ratios_batch
+
+# Per-record calls are only timed up to this many rows, larger runs extrapolate from it
+SCALAR_SAMPLE_ROWS = 10_000
+
+
+def make_columns(rows: int, seed: int = 0) -> dict:
+    """Random figures with ~10% missing (NaN) and ~5% zero values per field."""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for field in FINANCIAL_FIELDS:
+        values = rng.uniform(1.0, 1_000_000.0, rows)
+        values[rng.random(rows) < 0.05] = 0.0
+        values[rng.random(rows) < 0.10] = np.nan
+        columns[field] = values
+    return columns
+
+
+def columns_to_records(columns: dict, rows: int) -> list:
+    return [
+        {field: float(values[i]) for field, values in columns.items() if not np.isnan(values[i])}
+        for i in range(rows)
+    ]
+
+
+def main(row_counts):
+    for rows in row_counts:
+        columns = make_columns(rows)
+        start = time.perf_counter()
+        calculate_ratios_batch(columns)
+        batch_time = time.perf_counter() - start
+
+        sample_rows = min(rows, SCALAR_SAMPLE_ROWS)
+        records = columns_to_records(columns, sample_rows)
+        start = time.perf_counter()
+        scalar_ratios = [calculate_ratios(record) for record in records]
+        scalar_time = (time.perf_counter() - start) * rows / sample_rows
+
+        batch_ratios = calculate_ratios_batch({field: values[:sample_rows] for field, values in columns.items()})
+        for ratio_name, values in batch_ratios.items():
+            if not np.allclose(values, [ratios[ratio_name] for ratios in scalar_ratios]):
+                raise AssertionError(f"The batch engine and calculate_ratios disagree on {ratio_name}")
+
+        estimated = "" if sample_rows == rows else " (extrapolated)"
+        print(f"rows: {rows:>9,}  batch: {batch_time:8.4f}s  per-record: {scalar_time:8.3f}s{estimated}  "
+              f"speedup: {scalar_time / batch_time:,.0f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 1_000_000])
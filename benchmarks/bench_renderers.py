@@ -0,0 +1,130 @@
+# financial_analyzer/benchmarks/bench_renderers.py
+"""
+Times rendering many reports with each report back end against laying out every PDF with FPDF,
+the way generate_pdf_report did before the template renderer. That FPDF layout is kept below only
+as the baseline; the report layout itself lives in core.report_renderer.PdfRenderer.
+
+Explanations are 1-6 sentences drawn from a fixed pool, so reports run from one page to several. Before
+timing, the first reports are checked: the PDF back end must give the same text and page count as FPDF
+(read back with pypdf), the JSON payload must load and the HTML page must carry every ratio.
+
+Usage: python -m benchmarks.bench_renderers [reports ...]   (default: 1000 5000)
+"""
+import io
+import json
+import random
+import sys
+import time
+from typing import Dict, List, Tuple
+from pypdf import PdfReader
+from core.ratio_calculator import FinancialRatios
+from fpdf import FPDF
+from core.report_renderer import REPORT_SUBTITLE, REPORT_TITLE, build_cards, get_renderer, report_formats
+
+# FPDF layouts are only timed up to this many reports, larger runs extrapolate from it
+FPDF_SAMPLE_REPORTS = 1_000
+# Reports compared between FPDF and the PDF back end before timing
+CHECKED_REPORTS = 20
+
+RATIO_NAMES = ("current_ratio", "quick_ratio", "net_profit_margin", "roa", "roe", "asset_turnover",
+               "inventory_turnover", "debt_to_equity", "interest_coverage")
+
+SENTENCES = (
+    "The company holds comfortably more current assets than current liabilities, so short-term obligations are well covered.",
+    "Liquidity is a strength, but a large share sits in inventory, which could be worked down faster.",
+    "Keep monitoring stock levels against sales to free up cash.",
+    "Margins are thin compared with peers (roughly half the sector median), leaving little room for cost increases.",
+    "Leverage is moderate; interest is covered several times over by operating profit.",
+    "Return on equity is boosted by debt rather than by operating efficiency - worth watching if rates rise.",
+    "Asset turnover is low, suggesting capacity that is not yet earning its keep.",
+)
+
+
+def make_reports(count: int, seed: int = 0) -> List[Tuple[FinancialRatios, Dict[str, str]]]:
+    rng = random.Random(seed)
+    reports = []
+    for _ in range(count):
+        ratios = {name: rng.uniform(-5.0, 50.0) for name in RATIO_NAMES}
+        explanations = {name: " ".join(rng.choices(SENTENCES, k=rng.randint(1, 6))) for name in RATIO_NAMES}
+        reports.append((ratios, explanations))
+    return reports
+
+
+def fpdf_report(ratios: FinancialRatios, explanations: Dict[str, str]) -> bytes:
+    """Baseline: lays out the report with FPDF per call, as generate_pdf_report did before the template renderer."""
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.set_font("Arial", "B", 24)
+    pdf.set_text_color(44, 62, 80)
+    pdf.cell(0, 20, REPORT_TITLE, ln=True, align="C")
+    pdf.set_font("Arial", "I", 12)
+    pdf.set_text_color(127, 140, 141)
+    pdf.cell(0, 10, REPORT_SUBTITLE, ln=True, align="C")
+    pdf.ln(10)
+    for ratio_name, ratio_value in ratios.items():
+        pdf.set_fill_color(240, 240, 240)
+        pdf.set_draw_color(200, 200, 200)
+        pdf.rect(20, pdf.get_y(), 170, 10, style='FD')
+        pdf.set_font("Arial", "B", 14)
+        pdf.set_text_color(44, 62, 80)
+        pdf.set_xy(25, pdf.get_y() + 2)
+        pdf.cell(160, 6, ratio_name.replace('_', ' ').title(), ln=True)
+        pdf.set_fill_color(249, 249, 249)
+        pdf.rect(20, pdf.get_y(), 170, 15, style='FD')
+        pdf.set_font("Arial", "B", 16)
+        pdf.set_text_color(52, 152, 219)
+        pdf.set_xy(25, pdf.get_y() + 4)
+        pdf.cell(160, 6, f"{ratio_value:.2f}", ln=True)
+        pdf.set_fill_color(255, 255, 255)
+        pdf.rect(20, pdf.get_y(), 170, 20, style='FD')
+        pdf.set_font("Arial", "", 10)
+        pdf.set_text_color(100, 100, 100)
+        pdf.set_xy(25, pdf.get_y() + 2)
+        pdf.multi_cell(160, 5, explanations[ratio_name])
+        pdf.ln(15)
+    return pdf.output(dest="S").encode("latin-1")
+
+
+def check(reports) -> None:
+    for ratios, explanations in reports[:CHECKED_REPORTS]:
+        cards = build_cards(ratios, explanations)
+        expected = PdfReader(io.BytesIO(fpdf_report(ratios, explanations)))
+        rendered = PdfReader(io.BytesIO(get_renderer("pdf").render(cards)))
+        if [page.extract_text() for page in expected.pages] != [page.extract_text() for page in rendered.pages]:
+            raise AssertionError("The PDF back end does not lay out the report like FPDF")
+        if json.loads(get_renderer("json").render(cards))["ratios"] != cards:
+            raise AssertionError("The JSON payload does not hold the cards")
+        page = get_renderer("html").render(cards).decode("utf-8")
+        if not all(f'id="{name}"' in page for name in ratios):
+            raise AssertionError("The HTML page is missing ratios")
+
+
+def main(report_counts):
+    check(make_reports(CHECKED_REPORTS))
+    for report_format in report_formats():
+        get_renderer(report_format).prepare()  # the template is built once per process, as in the app's warm-up
+
+    for count in report_counts:
+        reports = make_reports(count)
+        sample = reports[:min(count, FPDF_SAMPLE_REPORTS)]
+        start = time.perf_counter()
+        for ratios, explanations in sample:
+            fpdf_report(ratios, explanations)
+        fpdf_time = (time.perf_counter() - start) * count / len(sample)
+        estimated = "" if len(sample) == count else " (extrapolated)"
+        print(f"reports: {count:>7,}  fpdf layout  {fpdf_time:8.3f}s  {fpdf_time / count * 1000:7.3f} ms/report{estimated}")
+
+        for report_format in report_formats():
+            renderer = get_renderer(report_format)
+            size = 0
+            start = time.perf_counter()
+            for ratios, explanations in reports:
+                size += len(renderer.render(build_cards(ratios, explanations)))
+            elapsed = time.perf_counter() - start
+            print(f"{'':>16}  {report_format:<12} {elapsed:8.3f}s  {elapsed / count * 1000:7.3f} ms/report  "
+                  f"{size / count / 1024:6.1f} KiB/report  speedup: {fpdf_time / elapsed:6.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000, 5_000])
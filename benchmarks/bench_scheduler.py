@@ -0,0 +1,68 @@
+# financial_analyzer/benchmarks/bench_scheduler.py
+"""
+Runs a burst of explanation requests against a fake chat model that answers 429 above a fixed rate,
+once with the scheduler's rate limit matching the fake quota and once effectively unlimited
+(so only retries with backoff protect the requests).
+
+Usage: python -m benchmarks.bench_scheduler [requests] [quota_per_second]
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.fake_llm import FakeChatModel
+from core import llm
+from core.llm_scheduler import LLMScheduler, PRIORITY_EXPLANATION
+
+
+def run_burst(requests: int, quota_per_second: float, requests_per_minute: int, max_retries: int) -> dict:
+    fake_model = FakeChatModel(latency=0.05, rate_limit_per_second=quota_per_second)
+    client = llm.PooledChatModel(fake_model, max_concurrency=8)
+    client.scheduler = LLMScheduler(
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=10_000_000,
+        max_in_flight=8,
+        max_retries=max_retries,
+        backoff_base_seconds=0.2,
+        backoff_max_seconds=2.0,
+        burst_seconds=1.0,  # the fake quota is enforced per second
+    )
+
+    def explain(i):
+        try:
+            llm.invoke_prompt(f"Explain ratio {i}", use_cache=False, llm=client, priority=PRIORITY_EXPLANATION)
+            return True
+        except Exception:
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        succeeded = sum(executor.map(explain, range(requests)))
+    elapsed = time.perf_counter() - start
+    metrics = client.scheduler.metrics()
+    return {
+        "elapsed": elapsed,
+        "succeeded": succeeded,
+        "rate_limited": fake_model.rate_limited_calls,
+        "retries": metrics["retries"],
+        "failures": metrics["failures"],
+        "wait_avg": metrics["wait_seconds_avg"],
+        "wait_max": metrics["wait_seconds_max"],
+    }
+
+
+def main(requests: int = 60, quota_per_second: float = 10):
+    print(f"{requests} requests, fake quota {quota_per_second:g} requests/s")
+    scenarios = {
+        "rate limited": run_burst(requests, quota_per_second, int(quota_per_second * 60), max_retries=5),
+        "retry only": run_burst(requests, quota_per_second, 1_000_000, max_retries=5),
+        "no retries": run_burst(requests, quota_per_second, 1_000_000, max_retries=0),
+    }
+    for name, result in scenarios.items():
+        print(f"{name:13} {result['elapsed']:6.2f}s  ok: {result['succeeded']:3d}/{requests}  429s: {result['rate_limited']:3d}  "
+              f"retries: {result['retries']:3d}  failed: {result['failures']:3d}  "
+              f"wait avg/max: {result['wait_avg']:.2f}s/{result['wait_max']:.2f}s")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 60, float(args[1]) if len(args) > 1 else 10)
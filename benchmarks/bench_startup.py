@@ -0,0 +1,69 @@
+# financial_analyzer/benchmarks/bench_startup.py
+"""
+Measures cold-start cost: import time and resident memory of the app and core modules, each in a
+fresh interpreter, and the time warm_up takes to build the lazily created objects afterwards.
+
+Usage: python -m benchmarks.bench_startup [repeats]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = ["core.agent", "ui.main"]
+
+# Runs in a fresh interpreter per measurement, so nothing is cached by an earlier import
+_PROBE = """
+import json, sys, time
+import benchmarks  # offline environment defaults
+try:
+    import resource
+    def rss_mb():
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+except ImportError:
+    def rss_mb():
+        return None
+before = rss_mb()
+start = time.perf_counter()
+__import__(sys.argv[1])
+import_seconds = time.perf_counter() - start
+result = {"import_seconds": import_seconds, "rss_before_mb": before, "rss_after_import_mb": rss_mb()}
+if sys.argv[2] == "1":
+    from core.agent import warm_up
+    result["warm_up_seconds"] = warm_up(build_agent=True)
+    result["rss_after_warm_up_mb"] = rss_mb()
+print(json.dumps(result))
+"""
+
+
+def probe(module: str, with_warm_up: bool) -> dict:
+    env = dict(os.environ, PYTHONWARNINGS="ignore")
+    output = subprocess.run([sys.executable, "-c", _PROBE, module, "1" if with_warm_up else "0"], env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def median(results: list, key: str):
+    values = [result[key] for result in results if result.get(key) is not None]
+    return statistics.median(values) if values else None
+
+
+def main(repeats: int = 5):
+    print(f"median of {repeats} fresh interpreters")
+    for module in MODULES:
+        results = [probe(module, with_warm_up=False) for _ in range(repeats)]
+        rss_import = median(results, "rss_after_import_mb")
+        print(f"import {module:10} {median(results, 'import_seconds') * 1000:8.1f} ms   "
+              f"peak RSS {f'{rss_import:.1f} MB' if rss_import is not None else 'n/a'}")
+
+    results = [probe("core.agent", with_warm_up=True) for _ in range(repeats)]
+    rss_warm = median(results, "rss_after_warm_up_mb")
+    print(f"warm_up (client and agent) {median(results, 'warm_up_seconds') * 1000:8.1f} ms   "
+          f"peak RSS {f'{rss_warm:.1f} MB' if rss_warm is not None else 'n/a'}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 5)
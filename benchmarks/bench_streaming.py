@@ -0,0 +1,77 @@
+# financial_analyzer/benchmarks/bench_streaming.py
+"""
+Measures time to first useful result of an analysis on a synthetic filing and a fake chat model:
+without callbacks the user sees nothing until the PDF exists, with them the ratios are shown as soon
+as they are calculated and the explanations stream in word by word before the PDF is rendered.
+
+Usage: python -m benchmarks.bench_streaming [latency_seconds] [token_latency_seconds] [pages]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from benchmarks.bench_e2e import OMITTED_FIELDS, offline_environment
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks.synthetic_filings import write_filing_pdf
+from core import llm
+from core.pipeline import run_financial_pipeline
+
+# Explanation answered by the fake model, about the length the prompt asks for (2-3 sentences)
+EXPLANATION = (
+    "The company holds comfortably more current assets than current liabilities, so short-term obligations "
+    "are well covered. Liquidity is a strength, but a large share sits in inventory, which could be worked "
+    "down faster. Keep monitoring stock levels against sales to free up cash."
+)
+
+
+def run(pdf_name: str, upload_dir: str, output_dir: str, client, streaming: bool) -> dict:
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    marks = {}
+    lock = threading.Lock()
+
+    def mark(name: str) -> None:
+        with lock:
+            marks.setdefault(name, time.perf_counter() - start)
+
+    callbacks = {}
+    if streaming:
+        callbacks = {
+            "on_ratios": lambda ratios: mark("ratios"),
+            "on_explanation_token": lambda ratio_name, text: mark("first_token"),
+            "on_explanation": lambda ratio_name, explanation: mark("first_explanation"),
+        }
+    report = run_financial_pipeline([pdf_name], upload_dir, output_dir=output_dir, llm=client, **callbacks)
+    if not (report and os.path.exists(report)):
+        raise RuntimeError("The report was not generated")
+    marks["report"] = time.perf_counter() - start
+    return marks
+
+
+def main(latency: float = 0.5, token_latency: float = 0.02, pages: int = 10):
+    with tempfile.TemporaryDirectory() as work_dir:
+        upload_dir = os.path.join(work_dir, "upload_dir")
+        os.makedirs(upload_dir)
+        pdf_name = "filing.pdf"
+        write_filing_pdf(os.path.join(upload_dir, pdf_name), pages=pages, omit_fields=OMITTED_FIELDS)
+        fake_model = FakeChatModel(latency=latency, token_latency=token_latency, response=EXPLANATION,
+                                   upload_dir=upload_dir)
+        with offline_environment(fake_model, work_dir):
+            client = llm.get_chat_client("offline-benchmark")
+            results = {streaming: run(pdf_name, upload_dir, os.path.join(work_dir, str(streaming)), client, streaming)
+                       for streaming in (False, True)}
+
+    print(f"latency per call: {latency:.3f}s, per word: {token_latency:.3f}s, explanation words: {len(EXPLANATION.split())}")
+    blocking, streamed = results[False], results[True]
+    print(f"without streaming  first result (PDF)      {blocking['report']:7.3f}s")
+    print(f"with streaming     ratios shown            {streamed['ratios']:7.3f}s")
+    print(f"                   first explanation word  {streamed['first_token']:7.3f}s")
+    print(f"                   first explanation done  {streamed['first_explanation']:7.3f}s")
+    print(f"                   PDF                     {streamed['report']:7.3f}s")
+    print(f"time to first result: {blocking['report'] / streamed['ratios']:.1f}x faster")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(float(args[0]) if args else 0.5, float(args[1]) if len(args) > 1 else 0.02, int(args[2]) if len(args) > 2 else 10)
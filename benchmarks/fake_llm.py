@@ -0,0 +1,166 @@
+# financial_analyzer/benchmarks/fake_llm.py
+import ast
+import json
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Iterator, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from core.tokens import estimate_tokens
+
+SAMPLE_FINANCIAL_DATA = {
+    "current_assets": 50000.0,
+    "current_liabilities": 25000.0,
+    "total_assets": 200000.0,
+    "total_equity": 120000.0,
+    "net_income": 18000.0,
+    "inventory": 10000.0,
+    "total_debt": 60000.0,
+    "ebit": 30000.0,
+    "interest_expense": 3000.0,
+    "revenue": 150000.0,
+    "cost_of_goods_sold": 90000.0,
+}
+
+# Tool to call after each tool result when the model drives the ReAct agent
+_NEXT_TOOL = {
+    None: "get_financial_data",
+    "get_financial_data": "calculate_ratios",
+    "calculate_ratios": "generate_pdf_report",
+}
+
+
+class FakeRateLimitError(Exception):
+    """Mimics the 429 quota error Gemini returns when a key exceeds its rate limit."""
+    code = 429
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for the Gemini chat model.
+    Sleeps for a fixed latency on every call and answers extraction prompts with
+    SAMPLE_FINANCIAL_DATA (as candidates for chunked extraction) and explanation
+    prompts with `response`. When tools are bound it walks the ReAct agent through
+    the three analysis tools in order. Calls and estimated prompt/completion tokens are
+    counted so benchmarks can compare how many round trips each path costs; responses
+    carry the same counts as usage metadata. With `rate_limit_per_second` set, calls above
+    that rate within any one-second window fail with FakeRateLimitError instead.
+    `extraction_overrides` replaces values of the first extraction answer (e.g. with "n/a") and
+    `prose_answers` makes it plain prose instead of JSON, while repair prompts get a clean answer.
+    Text answers take `token_latency` per word after the first, streamed word by word through
+    `stream` or returned at once, so both paths cost the same total time.
+    """
+
+    latency: float = 0.5
+    token_latency: float = 0.0
+    response: str = "This ratio looks healthy."
+    upload_dir: str = "upload_dir"
+    rate_limit_per_second: float = 0.0
+    extraction_overrides: dict = {}
+    prose_answers: bool = False
+    calls: int = 0
+    agent_calls: int = 0
+    rate_limited_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    def __init__(self, latency: float = 0.5, **kwargs: Any):
+        super().__init__(latency=latency, **kwargs)
+        object.__setattr__(self, "_lock", threading.Lock())
+        object.__setattr__(self, "_recent_calls", deque())
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def bind_tools(self, tools: List[Any], **kwargs: Any):
+        return self.bind(tools=tools, **kwargs)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        routing = "tools" in kwargs
+        self._admit(routing)
+        time.sleep(self.latency)
+        message = self._route_agent(messages) if routing else AIMessage(content=self._answer(messages[-1].content))
+        if not routing:
+            time.sleep(self.token_latency * max(0, len(_words(message.content)) - 1))
+        message.usage_metadata = self._count_tokens(messages, message.content)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None,
+                **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        self._admit(routing=False)
+        time.sleep(self.latency)
+        answer = self._answer(messages[-1].content)
+        for index, word in enumerate(_words(answer)):
+            if index:
+                time.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._count_tokens(messages, answer)))
+
+    def _admit(self, routing: bool) -> None:
+        with self._lock:
+            if self.rate_limit_per_second:
+                now = time.monotonic()
+                while self._recent_calls and now - self._recent_calls[0] > 1.0:
+                    self._recent_calls.popleft()
+                if len(self._recent_calls) >= self.rate_limit_per_second:
+                    self.rate_limited_calls += 1
+                    raise FakeRateLimitError("429 Resource has been exhausted (e.g. check quota).")
+                self._recent_calls.append(now)
+            self.calls += 1
+            if routing:
+                self.agent_calls += 1
+
+    def _count_tokens(self, messages: List[BaseMessage], completion: Any) -> dict:
+        prompt_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        completion_tokens = estimate_tokens(str(completion))
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+        return {"input_tokens": prompt_tokens, "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.agent_calls = 0
+            self.rate_limited_calls = 0
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
+
+    def _answer(self, prompt: str) -> str:
+        if "JSON:" in prompt and '"confidence"' in prompt:
+            # map step of chunked extraction
+            return json.dumps({field: {"value": value, "confidence": 0.9, "section": "other"}
+                               for field, value in SAMPLE_FINANCIAL_DATA.items()})
+        if "JSON:" in prompt and "Correct an earlier extraction" in prompt:
+            return json.dumps(SAMPLE_FINANCIAL_DATA)
+        if "JSON:" in prompt and self.prose_answers:
+            return "Here are the figures: " + ", ".join(f"{field} is {value:,.0f}" for field, value in SAMPLE_FINANCIAL_DATA.items())
+        if "JSON:" in prompt:
+            return json.dumps({**SAMPLE_FINANCIAL_DATA, **self.extraction_overrides})
+        return self.response
+
+    def _route_agent(self, messages: List[BaseMessage]) -> AIMessage:
+        tool_messages = [m for m in messages if isinstance(m, ToolMessage)]
+        last_tool = tool_messages[-1].name if tool_messages else None
+        if last_tool not in _NEXT_TOOL:
+            return AIMessage(content=tool_messages[-1].content if tool_messages else "")
+        next_tool = _NEXT_TOOL[last_tool]
+        if next_tool == "get_financial_data":
+            request = next(m.content for m in messages if isinstance(m, HumanMessage))
+            pdf_paths = ast.literal_eval(re.search(r"\[.*\]", request).group(0))
+            args = {"pdf_paths": pdf_paths, "upload_dir": self.upload_dir}
+        elif next_tool == "calculate_ratios":
+            args = {"financial_data": json.loads(tool_messages[-1].content)}
+        else:
+            args = {"ratios": json.loads(tool_messages[-1].content)}
+        call_id = f"call_{len(tool_messages)}"
+        return AIMessage(content="", tool_calls=[{"name": next_tool, "args": args, "id": call_id}])
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"\S+\s*", text) if isinstance(text, str) else []
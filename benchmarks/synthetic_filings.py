@@ -0,0 +1,95 @@
+# financial_analyzer/benchmarks/synthetic_filings.py
+"""
+Deterministic synthetic financial-statement PDFs for offline benchmarks.
+
+A filing has a cover page, a balance sheet and an income statement placed in the middle of
+the document, and narrative note pages filling the remaining page count. The same arguments
+always produce the same PDF content, so results stay comparable between commits.
+"""
+import random
+from typing import Dict, Iterable
+from fpdf import FPDF
+from benchmarks.fake_llm import SAMPLE_FINANCIAL_DATA
+
+# Statement line labels per figure, as the rule extractor reads them
+BALANCE_SHEET_LINES = [
+    ("Inventories", "inventory"),
+    ("Total current assets", "current_assets"),
+    ("Total assets", "total_assets"),
+    ("Total current liabilities", "current_liabilities"),
+    ("Total borrowings", "total_debt"),
+    ("Total shareholders' equity", "total_equity"),
+]
+INCOME_STATEMENT_LINES = [
+    ("Revenue", "revenue"),
+    ("Cost of sales", "cost_of_goods_sold"),
+    ("Operating income", "ebit"),
+    ("Finance costs", "interest_expense"),
+    ("Net income", "net_income"),
+]
+
+_NOTE_WORDS = (
+    "the group company management segment customers market operations growth strategy risk "
+    "employees sustainability governance board directors policy regulatory environment product "
+    "services demand supply pricing investment technology digital region outlook year period"
+).split()
+
+
+def _note_paragraph(rng: random.Random, sentences: int = 6) -> str:
+    return " ".join(
+        " ".join(rng.choice(_NOTE_WORDS) for _ in range(rng.randint(8, 16))).capitalize() + "."
+        for _ in range(sentences)
+    )
+
+
+def _statement_page(pdf: FPDF, title: str, period: str, lines, figures: Dict[str, float], omit_fields: Iterable[str]) -> None:
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 13)
+    pdf.cell(0, 8, title, ln=True)
+    pdf.set_font("Arial", "", 10)
+    pdf.cell(0, 6, period, ln=True)
+    pdf.cell(0, 6, "(in thousands)", ln=True)
+    for label, field in lines:
+        if field in omit_fields:
+            continue
+        pdf.cell(0, 6, f"{label} {figures[field] / 1000:,.0f}", ln=True)
+
+
+def write_filing_pdf(path: str, pages: int = 10, seed: int = 0, figures: Dict[str, float] = None,
+                     omit_fields: Iterable[str] = (), period_end: str = "December 31, 2023") -> None:
+    """
+    Writes a synthetic annual report
+    :param path: Where to write the PDF
+    :param pages: Total page count, at least 3 (cover and both statements)
+    :param seed: Seed of the narrative note text
+    :param figures: Statement figures in full units, SAMPLE_FINANCIAL_DATA by default
+    :param omit_fields: Figures left out of the statements, so extraction has to fall back to the LLM for them
+    :param period_end: End of the reporting period stated in the statement headings
+    """
+    figures = figures or SAMPLE_FINANCIAL_DATA
+    omit_fields = set(omit_fields)
+    pages = max(pages, 3)
+    rng = random.Random(seed)
+    note_pages = pages - 3
+    notes_before = note_pages // 2
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(False)
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, f"Synthetic Holdings plc - Annual Report {seed}", ln=True)
+
+    def add_note_pages(count: int, first_number: int) -> None:
+        for number in range(first_number, first_number + count):
+            pdf.add_page()
+            pdf.set_font("Arial", "B", 12)
+            pdf.cell(0, 8, f"Note {number}", ln=True)
+            pdf.set_font("Arial", "", 10)
+            pdf.multi_cell(0, 5, "\n\n".join(_note_paragraph(rng) for _ in range(4)))
+
+    add_note_pages(notes_before, 1)
+    _statement_page(pdf, "Consolidated Balance Sheet", f"As at {period_end}", BALANCE_SHEET_LINES, figures, omit_fields)
+    _statement_page(pdf, "Consolidated Income Statement", f"For the year ended {period_end}", INCOME_STATEMENT_LINES,
+                    figures, omit_fields)
+    add_note_pages(note_pages - notes_before, notes_before + 1)
+    pdf.output(path)
@@ -4,4 +4,89 @@ from dotenv import load_dotenv
 
 load_dotenv()
 google_api_key = os.getenv("GOOGLE_API_KEY")
-flet_secret_key=os.getenv("FLET_SECRET_KEY")
\ No newline at end of file
+flet_secret_key=os.getenv("FLET_SECRET_KEY")
+
+# Maximum number of ratio explanations requested from the LLM at the same time
+explanation_concurrency = int(os.getenv("EXPLANATION_CONCURRENCY", "4"))
+
+# On-disk cache of text extracted from uploaded PDFs
+pdf_cache_dir = os.getenv("PDF_CACHE_DIR", os.path.join(".cache", "pdf_text"))
+pdf_cache_max_bytes = int(os.getenv("PDF_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# LLM settings; deterministic mode pins sampling so cached responses stay valid
+llm_model_name = os.getenv("LLM_MODEL_NAME", "gemini-2.0-flash-exp")
+llm_deterministic = os.getenv("LLM_DETERMINISTIC", "false").lower() in ("1", "true", "yes")
+
+# Persistent cache of LLM responses keyed on model, generation parameters and prompt
+llm_cache_enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+llm_cache_path = os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_responses.sqlite3"))
+llm_cache_ttl_seconds = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+llm_cache_max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+# Content-addressed store of uploaded files, each distinct file kept once however many sessions upload it. Files no
+# session refers to are removed once older than the maximum age, and least recently used first past the size quota
+upload_store_dir = os.getenv("UPLOAD_STORE_DIR", os.path.join(".cache", "uploads"))
+upload_store_max_bytes = int(os.getenv("UPLOAD_STORE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+upload_store_max_age_seconds = int(os.getenv("UPLOAD_STORE_MAX_AGE_SECONDS", str(24 * 60 * 60)))
+# Files left in the upload staging directory, e.g. by uploads that never finished, are removed once not written to for this long
+upload_staging_max_age_seconds = int(os.getenv("UPLOAD_STAGING_MAX_AGE_SECONDS", str(60 * 60)))
+
+# Worker processes parsing uploaded PDFs in parallel when several files miss the extraction cache (1 parses in-process)
+pdf_parse_workers = int(os.getenv("PDF_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Maximum number of pages per document sent to the extractor, ranked by financial-statement relevance (0 sends every page)
+relevant_page_limit = int(os.getenv("RELEVANT_PAGE_LIMIT", "10"))
+
+# Route analyses through the LangGraph ReAct agent instead of the direct in-process pipeline
+use_react_agent = os.getenv("USE_REACT_AGENT", "false").lower() in ("1", "true", "yes")
+
+# Map-reduce extraction for documents too large for a single extraction prompt
+extraction_single_prompt_max_chars = int(os.getenv("EXTRACTION_SINGLE_PROMPT_MAX_CHARS", "60000"))
+extraction_pages_per_group = int(os.getenv("EXTRACTION_PAGES_PER_GROUP", "4"))
+extraction_concurrency = int(os.getenv("EXTRACTION_CONCURRENCY", "4"))
+# Follow-up prompts asking only for the fields an extraction answer left invalid or out, with the lines stating them
+extraction_repair_attempts = int(os.getenv("EXTRACTION_REPAIR_ATTEMPTS", "1"))
+extraction_repair_max_lines = int(os.getenv("EXTRACTION_REPAIR_MAX_LINES", "3"))
+
+# Number of analyses run in parallel by the background job pool
+analysis_workers = int(os.getenv("ANALYSIS_WORKERS", "4"))
+# Per-document extraction results kept for reuse when the same file is analysed again, e.g. with one more file added
+document_store_max_entries = int(os.getenv("DOCUMENT_STORE_MAX_ENTRIES", "1000"))
+# Persistent store of per-document figures and finished analyses (figures, ratios, explanations) by company and period
+results_store_enabled = os.getenv("RESULTS_STORE_ENABLED", "true").lower() in ("1", "true", "yes")
+results_store_path = os.getenv("RESULTS_STORE_PATH", os.path.join(".cache", "results.sqlite3"))
+# Number of uploaded files extracted in parallel in the background while the user is still uploading
+prefetch_workers = int(os.getenv("PREFETCH_WORKERS", "2"))
+
+# Headless batch runs (batch.py): analyses run at the same time, where results are written, and the local HTTP service address
+batch_concurrency = int(os.getenv("BATCH_CONCURRENCY", "4"))
+batch_output_dir = os.getenv("BATCH_OUTPUT_DIR", "batch_outputs")
+batch_service_host = os.getenv("BATCH_SERVICE_HOST", "127.0.0.1")
+batch_service_port = int(os.getenv("BATCH_SERVICE_PORT", "8765"))
+# Format of the reports of batch runs: pdf, html or json (the ratios and explanations only, no layout)
+batch_report_format = os.getenv("BATCH_REPORT_FORMAT", "pdf").lower()
+
+# Generated reports are written to one sub directory per analysis and removed after the retention period
+reports_dir = os.getenv("REPORTS_DIR", "reports")
+report_retention_seconds = int(os.getenv("REPORT_RETENTION_SECONDS", str(60 * 60)))
+report_cleanup_interval_seconds = int(os.getenv("REPORT_CLEANUP_INTERVAL_SECONDS", str(10 * 60)))
+
+# Chat model clients are pooled per API key; each caps its in-flight requests and is dropped after being idle
+llm_client_max_concurrency = int(os.getenv("LLM_CLIENT_MAX_CONCURRENCY", "8"))
+llm_client_idle_seconds = int(os.getenv("LLM_CLIENT_IDLE_SECONDS", str(15 * 60)))
+
+# Rate limits and retries of the LLM scheduler, applied per API key
+llm_requests_per_minute = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+llm_tokens_per_minute = int(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))
+llm_rate_burst_seconds = float(os.getenv("LLM_RATE_BURST_SECONDS", "10"))
+llm_max_retries = int(os.getenv("LLM_MAX_RETRIES", "5"))
+llm_backoff_base_seconds = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1.0"))
+llm_backoff_max_seconds = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "30.0"))
+
+# Build the chat model client, PDF loader and report renderer in the background at startup instead of on first use
+warm_up_on_start = os.getenv("WARM_UP_ON_START", "false").lower() in ("1", "true", "yes")
+
+# Logging and stage-level tracing/metrics
+log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+telemetry_enabled = os.getenv("TELEMETRY_ENABLED", "false").lower() in ("1", "true", "yes")
+telemetry_jsonl_path = os.getenv("TELEMETRY_JSONL_PATH")  # spans are appended here as they finish when set
+telemetry_max_spans = int(os.getenv("TELEMETRY_MAX_SPANS", "10000"))
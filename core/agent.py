@@ -1,10 +1,20 @@
+import logging
 import os
-from typing import List
-from langchain.schema import HumanMessage
-from langgraph.prebuilt import create_react_agent
-from core.llm import chat_model
-from core.tools import get_financial_data, calculate_ratios_tool, generate_pdf_report_tool
+import time
+from typing import TYPE_CHECKING, Callable, List, Optional
+from core.llm import PooledChatModel, get_chat_client
+from core.pipeline import run_financial_pipeline
+from core.ratio_calculator import FinancialRatios
+from core.jobs import JobCancelled
+from core.report_outputs import create_output_dir, current_output_dir
+from core.report_renderer import get_renderer
+from core.telemetry import telemetry
+from config.app_config import use_react_agent
 
+if TYPE_CHECKING:
+    from core.prefetch import UploadPrefetcher
+
+logger = logging.getLogger(__name__)
 
 # Define the Prompt
 system_prompt = """
@@ -15,29 +25,92 @@ You are a financial analysis agent. Follow these steps:
 4. If the report is successfully generated, provide the path to the generated report. Otherwise, return an error message.
 """
 
-# Create Agent
-tools = [get_financial_data, calculate_ratios_tool, generate_pdf_report_tool]
-agent = create_react_agent(chat_model, tools, state_modifier=system_prompt)
+def get_agent(llm: PooledChatModel):
+    """
+    Returns the ReAct agent of a chat model client, building it on first use. Its routing requests go through
+    the client's scheduler like every other LLM call, and its tools use the same client.
+    """
+    if llm.agent is None:
+        # LangGraph and the langchain tools are only imported once an agent is actually needed
+        from langgraph.prebuilt import create_react_agent
+        from core.scheduled_chat_model import ScheduledChatModel
+        from core.tools import build_tools
 
-def process_financial_analysis(pdf_paths: List[str], api_key_from_ui:str, upload_dir: str):
-    # Convert request to LangChain messages
-    
-    # update chat model with current key before action happens
-    chat_model.google_api_key=api_key_from_ui
-    
-    print("DEBUG: Starting process_financial_analysis")
+        llm.agent = create_react_agent(ScheduledChatModel(client=llm), build_tools(llm), state_modifier=system_prompt)
+    return llm.agent
+
+
+def run_agent(pdf_paths: List[str], upload_dir: str, output_dir: str, llm: PooledChatModel) -> str:
+    """Lets the ReAct agent drive the tools, returns the content of its final message."""
+    from langchain_core.messages import HumanMessage
+
+    agent = get_agent(llm)
     history = [HumanMessage(content=f"Please analyze the financial statements from the following PDF files: {pdf_paths}")]
+    # The report tool is called by the model, so its output directory travels in the context instead of the arguments
+    token = current_output_dir.set(output_dir)
+    try:
+        with telemetry.span("agent.run"):
+            return agent.invoke({"messages": history, "pdf_paths": pdf_paths, "upload_dir": upload_dir})['messages'][-1].content
+    finally:
+        current_output_dir.reset(token)
+
+
+def warm_up(api_key: Optional[str] = None, build_agent: bool = use_react_agent) -> float:
+    """
+    Builds the lazily created heavy objects ahead of the first analysis: the PDF loader, the PDF report template,
+    the pooled chat model client of the key and, when analyses use it, its ReAct agent
+    :param api_key: Key whose client to build, the configured GOOGLE_API_KEY by default
+    :param build_agent: Whether to also build the ReAct agent
+    :return: Seconds spent
+    """
+    start = time.perf_counter()
+    with telemetry.span("warm_up", agent=build_agent):
+        from langchain.document_loaders import PyPDFLoader  # noqa: F401
+        get_renderer().prepare()
+
+        try:
+            llm = get_chat_client(api_key)
+            if build_agent:
+                get_agent(llm)
+        except Exception as e:
+            # e.g. no key configured yet, the client is then built with the key of the first analysis
+            logger.warning(f"Could not build the chat model client during warm-up: {e}")
+    elapsed = time.perf_counter() - start
+    logger.info(f"Warm-up finished in {elapsed:.2f}s")
+    return elapsed
+
+
+def process_financial_analysis(pdf_paths: List[str], api_key_from_ui:str, upload_dir: str, use_agent: bool = use_react_agent,
+                               on_progress: Optional[Callable[[str], None]] = None, output_dir: Optional[str] = None,
+                               prefetcher: Optional["UploadPrefetcher"] = None,
+                               on_ratios: Optional[Callable[[FinancialRatios], None]] = None,
+                               on_explanation_token: Optional[Callable[[str, str], None]] = None,
+                               on_explanation: Optional[Callable[[str, str], None]] = None):
+    # Every analysis writes into its own directory so parallel analyses never overwrite each other's reports
+    output_dir = output_dir or create_output_dir()
     
-    # Invoke the agent
+    # Run the fixed workflow directly, the agent is only used when explicitly requested
     try:
-      response = agent.invoke({"messages": history, "pdf_paths": pdf_paths, "upload_dir": upload_dir})['messages'][-1].content
-      print("DEBUG: Finished process_financial_analysis")
+      with telemetry.span("analysis", files=len(pdf_paths), agent=use_agent):
+          # Use the pooled client of the current key, so parallel analyses with different keys never share a model
+          llm = get_chat_client(api_key_from_ui)
+          if use_agent:
+              if on_progress:
+                  on_progress("Running Analysis Agent...")
+              response = run_agent(pdf_paths, upload_dir, output_dir, llm)
+          else:
+              # Ratios and explanation text are handed to the callbacks as they arrive, the PDF is rendered last
+              response = run_financial_pipeline(pdf_paths, upload_dir, on_progress=on_progress, output_dir=output_dir, llm=llm,
+                                                prefetcher=prefetcher, on_ratios=on_ratios,
+                                                on_explanation_token=on_explanation_token, on_explanation=on_explanation)
        # Check if the response is not empty and is not null, or exception if pdf creation is successful 
       if response and isinstance(response,str) and os.path.exists(response): # proper check on `result` for valid state as correct path of result download PDF 
           return response #returns valid value to ui download
       else: # if pdf error happens or empty, it goes here and displays a general error message on ui.
             return "I encountered an error while generating the PDF report. The ratios were calculated but the report was not generated."
       
+    except JobCancelled:
+      raise # cancellation is reported by the job, not as an analysis error
     except Exception as e:
-      print(f"ERROR: An error occurred during agent invocation: {e}")
+      logger.exception(f"An error occurred during financial analysis: {e}")
       return f"I encountered an error when trying to process the PDF file. Please check the PDF content, its format and file integrity or provide the financial data manually: {e}"
\ No newline at end of file
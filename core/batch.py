@@ -0,0 +1,204 @@
+# financial_analyzer/core/batch.py
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, TypedDict
+from core.data_extractor import FinancialData
+from core.llm import get_chat_client
+from core.pipeline import run_analysis
+from core.ratio_calculator import FinancialRatios
+from core.report_renderer import get_renderer
+from core.telemetry import telemetry
+from config.app_config import batch_concurrency, batch_report_format
+
+logger = logging.getLogger(__name__)
+
+# Written to the batch output directory, one line per analysis as it finishes
+RESULTS_FILE_NAME = "results.jsonl"
+
+# Result states
+RESULT_OK = "ok"
+RESULT_FAILED = "failed"
+
+MANIFEST_EXTENSIONS = (".json", ".jsonl")
+
+
+class BatchItem(TypedDict):
+    id: str
+    files: List[str]  # paths of the PDFs analysed together, all in one directory
+
+
+class BatchResult(TypedDict):
+    id: str
+    files: List[str]
+    status: str  # RESULT_OK or RESULT_FAILED
+    error: Optional[str]
+    company: Optional[str]
+    period: Optional[str]
+    figures: Optional[FinancialData]
+    ratios: Optional[FinancialRatios]
+    explanations: Optional[Dict[str, str]]
+    report: Optional[str]  # path of the report, None if not rendered
+    seconds: float
+
+
+def load_manifest(path: str) -> List[BatchItem]:
+    """
+    Reads a manifest of analyses, a JSON list or one JSON object per line, e.g. {"id": "acme-2023", "files": ["a.pdf"]}
+    Relative file paths are resolved against the manifest's directory, an entry without ID is named after its first file
+    :param path: Path of the .json or .jsonl manifest
+    :return: Batch items in manifest order
+    :raises ValueError: If the manifest is not valid JSON or an entry has no list of files
+    """
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    if path.endswith(".jsonl"):
+        entries = [json.loads(line) for line in content.splitlines() if line.strip()]
+    else:
+        entries = json.loads(content)
+    if not isinstance(entries, list):
+        raise ValueError(f"Manifest {path} must be a JSON list of analyses.")
+    base_dir = os.path.dirname(os.path.abspath(path))
+    items = []
+    for number, entry in enumerate(entries, start=1):
+        files = entry.get("files") if isinstance(entry, dict) else None
+        if not isinstance(files, list) or not files or not all(isinstance(file, str) for file in files):
+            raise ValueError(f"Entry {number} of manifest {path} needs \"files\", a non-empty list of paths.")
+        files = [os.path.join(base_dir, file) for file in files]
+        item_id = entry.get("id") or os.path.splitext(os.path.basename(files[0]))[0]
+        items.append({"id": str(item_id), "files": files})
+    return items
+
+
+def collect_items(sources: Iterable[str], recursive: bool = False) -> List[BatchItem]:
+    """
+    Turns the paths given to the CLI or the service into batch items. Every PDF in a directory, or given
+    directly, is analysed on its own; a .json/.jsonl file is read as a manifest of analyses of one or more files
+    :param sources: Directories, PDF files and manifests
+    :param recursive: Also collect PDFs in sub directories
+    :return: Batch items with unique IDs
+    """
+    items: List[BatchItem] = []
+    for source in sources:
+        if os.path.isdir(source):
+            walk = os.walk(source) if recursive else [(source, [], os.listdir(source))]
+            for directory, _, file_names in walk:
+                for file_name in sorted(file_names):
+                    if file_name.lower().endswith(".pdf"):
+                        path = os.path.join(directory, file_name)
+                        items.append({"id": os.path.splitext(os.path.relpath(path, source))[0], "files": [path]})
+        elif source.lower().endswith(MANIFEST_EXTENSIONS):
+            items.extend(load_manifest(source))
+        else:
+            items.append({"id": os.path.splitext(os.path.basename(source))[0], "files": [source]})
+
+    seen: Dict[str, int] = {}
+    for item in items:
+        count = seen.get(item["id"], 0)
+        seen[item["id"]] = count + 1
+        if count:
+            item["id"] = f"{item['id']}-{count + 1}"
+    return items
+
+
+def _output_name(item_id: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", item_id).strip("._") or "analysis"
+
+
+def analyse_item(item: BatchItem, output_dir: str, api_key: Optional[str] = None,
+                 render_report: bool = True, report_format: str = batch_report_format) -> BatchResult:
+    """
+    Runs the extraction -> ratios -> report pipeline for one batch item and never raises, a failure is returned
+    as a result with its error
+    :param item: Files to analyse together
+    :param output_dir: Batch output directory, the report goes into a sub directory named after the item
+    :param api_key: Key of the chat model client, the configured GOOGLE_API_KEY by default
+    :param render_report: Whether to explain the ratios and render the report
+    :param report_format: "pdf", "html" or "json"
+    :return: Result of the analysis
+    """
+    start = time.perf_counter()
+    result: BatchResult = {
+        "id": item["id"], "files": item["files"], "status": RESULT_FAILED, "error": None, "company": None,
+        "period": None, "figures": None, "ratios": None, "explanations": None, "report": None, "seconds": 0.0,
+    }
+    try:
+        with telemetry.span("batch.item", item=item["id"], files=len(item["files"])):
+            directories = {os.path.dirname(os.path.abspath(path)) for path in item["files"]}
+            if len(directories) != 1:
+                raise ValueError("The files of one analysis must be in the same directory.")
+            item_dir = os.path.join(output_dir, _output_name(item["id"]))
+            os.makedirs(item_dir, exist_ok=True)
+            analysis = run_analysis([os.path.basename(path) for path in item["files"]], directories.pop(),
+                                    output_dir=item_dir, llm=get_chat_client(api_key), render_report=render_report,
+                                    report_format=report_format)
+            if render_report and not analysis["report"]:
+                raise RuntimeError("The ratios were calculated but the report was not generated.")
+        result.update(status=RESULT_OK, company=analysis["company"], period=analysis["period"],
+                      figures=analysis["figures"], ratios=analysis["ratios"],
+                      explanations=analysis["explanations"], report=analysis["report"])
+    except Exception as e:
+        logger.error(f"Analysis {item['id']} failed: {e}")
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    telemetry.increment("batch_items_total", status=result["status"])
+    return result
+
+
+class BatchRunner:
+    """
+    Runs batches of analyses on an asyncio event loop. The pipeline itself is blocking, so each analysis runs
+    in a worker thread; at most `max_concurrency` analyses run at once across every batch of the runner.
+    """
+
+    def __init__(self, max_concurrency: int = batch_concurrency):
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="batch-analysis")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def run(self, items: List[BatchItem], output_dir: str, api_key: Optional[str] = None,
+                  render_reports: bool = True, report_format: str = batch_report_format,
+                  on_result: Optional[Callable[[BatchResult], None]] = None) -> List[BatchResult]:
+        """
+        Analyses batch items concurrently. Each result is appended to results.jsonl in `output_dir` as soon as
+        it is done, so a long batch can be followed and an interrupted one keeps what it finished
+        :param items: Analyses to run
+        :param output_dir: Directory of results.jsonl and the per-item reports
+        :param api_key: Key of the chat model client, the configured GOOGLE_API_KEY by default
+        :param render_reports: Whether to explain the ratios and render reports, JSONL only otherwise
+        :param report_format: Format of the reports, "pdf", "html" or "json"; JSON skips layout entirely
+        :param on_result: Called on the event loop with every result as it is done
+        :return: Results in item order
+        """
+        get_renderer(report_format)  # an unknown format fails the batch, not every analysis in it
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop = asyncio.get_running_loop()
+        os.makedirs(output_dir, exist_ok=True)
+
+        with open(os.path.join(output_dir, RESULTS_FILE_NAME), "a", encoding="utf-8") as results_file:
+            async def run_item(item: BatchItem) -> BatchResult:
+                async with self._semaphore:
+                    # Each analysis runs in a copy of the current context, so its spans nest under the batch span
+                    result = await loop.run_in_executor(self._executor, contextvars.copy_context().run, analyse_item,
+                                                        item, output_dir, api_key, render_reports, report_format)
+                results_file.write(json.dumps(result) + "\n")
+                results_file.flush()
+                if on_result:
+                    on_result(result)
+                return result
+
+            with telemetry.span("batch", items=len(items)) as span:
+                results = await asyncio.gather(*(run_item(item) for item in items))
+                failed = sum(result["status"] == RESULT_FAILED for result in results)
+                span.set_attribute("failed", failed)
+        logger.info(f"Batch of {len(items)} analyses finished, {failed} failed")
+        return results
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
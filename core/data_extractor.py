@@ -1,10 +1,20 @@
 # financial_analyzer/core/data_extractor.py
-from typing import TypedDict
-from langchain.schema import HumanMessage
-from core.llm import chat_model
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, TypedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from core.llm import invoke_prompt, PooledChatModel
+from core.llm_scheduler import PRIORITY_EXTRACTION
+from core.telemetry import telemetry
+from core.tokens import estimate_tokens
+from config.app_config import (extraction_pages_per_group, extraction_concurrency, extraction_repair_attempts,
+                               extraction_repair_max_lines)
+import contextvars
 import json
+import logging
+import math
 import re
 
+logger = logging.getLogger(__name__)
+
 
 # Define type structures for Gemini
 class FinancialData(TypedDict):
@@ -21,52 +31,353 @@ class FinancialData(TypedDict):
     cost_of_goods_sold: float
 
 
-def extract_financial_data_from_text(text: str) -> FinancialData:
+FINANCIAL_FIELDS = list(FinancialData.__annotations__)
+
+
+class FieldCandidate(TypedDict):
+    field: str
+    value: float
+    confidence: float
+    section: str
+    group: int
+
+
+# Statement each figure is expected to be reported in, used to break ties between candidates
+FIELD_SECTIONS: Dict[str, str] = {
+    "current_assets": "balance_sheet",
+    "current_liabilities": "balance_sheet",
+    "total_assets": "balance_sheet",
+    "total_equity": "balance_sheet",
+    "inventory": "balance_sheet",
+    "total_debt": "balance_sheet",
+    "net_income": "income_statement",
+    "ebit": "income_statement",
+    "interest_expense": "income_statement",
+    "revenue": "income_statement",
+    "cost_of_goods_sold": "income_statement",
+}
+
+# Score bonus for a candidate found in the statement its field belongs to
+SECTION_MATCH_BONUS = 0.5
+
+
+def _parse_json_response(response: str):
+    # Remove markdown code blocks if present
+    return json.loads(re.sub(r'```(json)?', '', response).strip())
+
+
+def coerce_number(value: Any) -> Optional[float]:
+    """
+    Coerces a figure as the LLM may write it to a float, e.g. 1234, "1,234", "$1,234.5" or "(56)" -> -56.0
+    :param value: Value of one field of a decoded answer
+    :return: The figure, None if the value is not a finite number
+    """
+    from core.rule_extractor import parse_number  # deferred, rule_extractor imports this module
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    elif isinstance(value, str):
+        number = parse_number(value)
+    else:
+        return None
+    return number if number is not None and math.isfinite(number) else None
+
+
+def validate_financial_data(answer: Any, fields: List[str]) -> Tuple[FinancialData, Dict[str, Any]]:
+    """
+    Validates a decoded extraction answer against the FinancialData schema
+    :param answer: Decoded JSON answer of the LLM
+    :param fields: Fields that were asked for, any other key is dropped
+    :return: Tuple of the valid figures coerced to floats and the invalid values per field.
+             Fields left out or null are in neither, the text did not state them
+    """
+    if not isinstance(answer, dict):
+        return {}, {}
+    financial_data, invalid = {}, {}
+    for field in fields:
+        if answer.get(field) is None:
+            continue
+        number = coerce_number(answer[field])
+        if number is None:
+            invalid[field] = answer[field]
+        else:
+            financial_data[field] = number
+    return financial_data, invalid
+
+
+def _decode_answer(response: str) -> Optional[dict]:
+    try:
+        answer = _parse_json_response(response)
+    except json.JSONDecodeError:
+        return None
+    return answer if isinstance(answer, dict) else None
+
+
+def _repair_prompt(fields: List[str], invalid: Dict[str, Any], context: Dict[str, List[str]],
+                   unparsed_response: Optional[str]) -> str:
+    sections = []
+    if unparsed_response is not None:
+        sections.append(f"Your earlier answer could not be read as JSON:\n{unparsed_response[:4000]}")
+    if invalid:
+        sections.append("Your earlier answer gave these values, which are not numbers:\n"
+                        + "\n".join(f"{field}: {value!r}" for field, value in invalid.items()))
+    if context:
+        sections.append("Lines of the filing that state them:\n"
+                        + "\n".join(line for lines in context.values() for line in lines))
+    details = "\n\n".join(sections)
+    return f"""
+        You are an expert financial analyst.
+        Correct an earlier extraction of financial figures. Do not give explanations or any text that is not JSON.
+        Give every value as a plain number in full units, applying the unit stated in square brackets after a line.
+        If a value is not stated, do not provide the field.
+
+        {details}
+
+        Return a JSON object with these keys: {", ".join(fields)}
+
+        JSON:
+        """
+
+
+def repair_financial_data(text: str, full_prompt: str, financial_data: FinancialData, invalid: Dict[str, Any],
+                          fields: List[str], unparsed_response: Optional[str] = None, use_cache: bool = True,
+                          llm: Optional[PooledChatModel] = None,
+                          context: Optional[Dict[str, List[str]]] = None) -> FinancialData:
+    """
+    Asks the LLM again for only the fields an extraction answer got wrong, instead of re-sending the whole text.
+    Invalid values are sent back to be restated, left out fields only when the text has lines stating them,
+    and an answer that was not JSON is sent back to be reformatted
+    :param text: Text the answer was extracted from, searched for the lines stating the fields to repair
+    :param full_prompt: Original extraction prompt, only used to estimate the tokens saved
+    :param financial_data: Valid figures of the answer, updated with the repaired ones
+    :param invalid: Invalid values of the answer per field
+    :param fields: Fields that were asked for
+    :param unparsed_response: The answer if it could not be decoded as JSON
+    :param use_cache: Whether an identical earlier prompt may be answered from the LLM response cache
+    :param llm: Chat model client to use, the one of the configured API key by default
+    :param context: Lines stating each field, found beforehand, instead of searching `text`
+    :return: `financial_data` with the repaired figures
+    :raises Exception: If a repair request fails
+    """
+    from core.rule_extractor import field_context  # deferred, rule_extractor imports this module
+    repairs = tokens_saved = repaired_fields = 0
+    with telemetry.span("extraction.repair") as span:
+        for _ in range(extraction_repair_attempts):
+            missing = [field for field in fields if field not in financial_data and field not in invalid]
+            if context is None:
+                field_lines = field_context(text, missing + list(invalid), extraction_repair_max_lines)
+            else:
+                field_lines = {field: context[field] for field in missing + list(invalid) if field in context}
+            repair_fields = [field for field in fields if field in invalid or field in field_lines
+                             or (unparsed_response is not None and field not in financial_data)]
+            if not repair_fields:
+                break
+            prompt = _repair_prompt(repair_fields, invalid, field_lines, unparsed_response)
+            response = invoke_prompt(prompt, use_cache=use_cache, llm=llm, priority=PRIORITY_EXTRACTION)
+            repairs += 1
+            tokens_saved += max(0, estimate_tokens(full_prompt) - estimate_tokens(prompt))
+            answer = _decode_answer(response)
+            repaired, invalid = validate_financial_data(answer, repair_fields)
+            financial_data.update(repaired)
+            repaired_fields += len(repaired)
+            unparsed_response = response if answer is None else None
+            if not invalid and unparsed_response is None:
+                break
+        span.set_attribute("repairs", repairs)
+        span.set_attribute("repaired_fields", repaired_fields)
+        span.set_attribute("tokens_saved", tokens_saved)
+    if repairs:
+        logger.info(f"Repaired {repaired_fields} extracted fields with {repairs} repair prompts, "
+                    f"~{tokens_saved} prompt tokens saved over re-sending the full prompt")
+        telemetry.increment("extraction_repairs_total", repairs)
+        telemetry.increment("extraction_repaired_fields_total", repaired_fields)
+        telemetry.increment("extraction_repair_tokens_saved_total", tokens_saved)
+    if invalid:
+        logger.warning(f"Dropped invalid values of {sorted(invalid)} after repair")
+    return financial_data
+
+
+def extract_financial_data_from_text(text: str, use_cache: bool = True, fields: Optional[List[str]] = None,
+                                     llm: Optional[PooledChatModel] = None) -> FinancialData:
     """
     Extracts financial data from text using LLM
+    The answer is validated against FinancialData, values such as "1,234" or "(56)" are coerced to numbers,
+    and fields left invalid or out are asked for again with small repair prompts rather than the whole text
     :param text: Text extracted from PDF files
-    :return: Dictionary containing financial data with specific structure
+    :param use_cache: Whether an identical earlier prompt may be answered from the LLM response cache
+    :param fields: Fields to ask for, all FinancialData fields by default
+    :param llm: Chat model client to use, the one of the configured API key by default
+    :return: Dictionary containing financial data with specific structure, None if nothing was extracted
+    :raises Exception: If an LLM request fails, so the caller does not take the extraction for a finished one
     """
-    print("DEBUG: Starting extract_financial_data_from_text")
+    requested_fields = fields or FINANCIAL_FIELDS
+    field_lines = ",\n".join(f'            "{field}": float' for field in requested_fields)
     prompt = f"""
         You are an expert financial analyst.
         Given the following text, extract the key financial figures and return them in JSON format.
         Do not give explanations or any text that is not JSON.
         If a value is not present in the text, do not provide the field, return only the fields that are extracted from the text.
+        Report values in full units, applying any scale the text states such as "in thousands" or "in millions".
 
         Text: {text}
 
         Format the extracted information as a JSON object with these keys:
         {{
-            "current_assets": float,
-            "current_liabilities": float,
-            "total_assets": float,
-            "total_equity": float,
-            "net_income": float,
-            "inventory": float,
-            "total_debt": float,
-            "ebit": float,
-            "interest_expense": float,
-            "revenue": float,
-            "cost_of_goods_sold": float
+{field_lines}
         }}
 
         JSON:
         """
 
+    response = invoke_prompt(prompt, use_cache=use_cache, llm=llm, priority=PRIORITY_EXTRACTION)
+    logger.debug(f"LLM Response: {response}")
+    answer = _decode_answer(response)
+    if answer is None:
+        logger.warning(f"Could not decode JSON from LLM response, asking to reformat it: {response}")
+    financial_data, invalid = validate_financial_data(answer, requested_fields)
+    financial_data = repair_financial_data(text, prompt, financial_data, invalid, requested_fields,
+                                           response if answer is None else None, use_cache, llm)
+    logger.debug(f"Successfully parsed financial data: {financial_data}")
+    return financial_data or None
+
+
+def _page_groups(pages: Iterable[str], pages_per_group: int) -> Iterator[List[str]]:
+    group = []
+    for page in pages:
+        group.append(page)
+        if len(group) >= pages_per_group:
+            yield group
+            group = []
+    if group:
+        yield group
+
+
+def extract_candidates_from_text(text: str, group: int, use_cache: bool = True, fields: Optional[List[str]] = None,
+                                 llm: Optional[PooledChatModel] = None) -> List[FieldCandidate]:
+    """
+    Extracts candidate financial figures from one group of pages using LLM (map step)
+    :param text: Text of the page group
+    :param group: Index of the page group, kept on every candidate
+    :param use_cache: Whether an identical earlier prompt may be answered from the LLM response cache
+    :param fields: Fields to ask for, all FinancialData fields by default
+    :param llm: Chat model client to use, the one of the configured API key by default
+    :return: List of candidates with value, confidence and the statement section they were found in
+    :raises Exception: If the LLM request fails
+    """
+    requested_fields = fields or FINANCIAL_FIELDS
+    prompt = f"""
+        You are an expert financial analyst.
+        The following text is an excerpt of a longer financial filing. Extract the key financial figures it contains and return them in JSON format.
+        Do not give explanations or any text that is not JSON.
+        Only return fields that are present in this excerpt.
+        Report values in full units, applying any scale the text states such as "in thousands" or "in millions".
+        For every field give the value, your confidence between 0 and 1 that it is the company's reported figure for the period,
+        and the statement it was found in: "balance_sheet", "income_statement", "cash_flow", "notes" or "other".
+
+        Text: {text}
+
+        Use these field names as keys:
+        {", ".join(requested_fields)}
+
+        Format each field as:
+        "field_name": {{"value": float, "confidence": float, "section": string}}
+
+        JSON:
+        """
+    response = invoke_prompt(prompt, use_cache=use_cache, llm=llm, priority=PRIORITY_EXTRACTION)
     try:
-        response = chat_model.invoke([HumanMessage(content=prompt)]).content
-        print(f"DEBUG: LLM Response: {response}")
-        # Remove markdown code blocks if present
-        response = re.sub(r'```(json)?', '', response).strip()
-        financial_data = json.loads(response)
-        print(f"DEBUG: Successfully parsed financial data: {financial_data}")
-        return financial_data
-    except json.JSONDecodeError:
-        print(f"ERROR: JSON Decode Error: Could not decode JSON from LLM response: {response}")
-        return None
-    except Exception as e:
-        print(f"ERROR: An error occurred while processing the LLM response: {e}")
-        return None
-    finally:
-        print("DEBUG: Finished extract_financial_data_from_text")
\ No newline at end of file
+        extracted = _parse_json_response(response)
+    except json.JSONDecodeError as e:
+        # The fields of this group are then missing from the merged result and repaired from their lines
+        logger.warning(f"Could not decode JSON of page group {group}: {e}")
+        return []
+
+    candidates = []
+    for field, entry in extracted.items() if isinstance(extracted, dict) else []:
+        if field not in requested_fields or not isinstance(entry, dict):
+            continue
+        value = coerce_number(entry.get("value"))
+        try:
+            confidence = min(max(float(entry.get("confidence", 0.5)), 0.0), 1.0)
+        except (TypeError, ValueError):
+            continue
+        if value is None:
+            continue
+        candidates.append({"field": field, "value": value, "confidence": confidence,
+                           "section": str(entry.get("section", "other")), "group": group})
+    return candidates
+
+
+def _candidate_rank(candidate: FieldCandidate):
+    score = candidate["confidence"]
+    if candidate["section"] == FIELD_SECTIONS[candidate["field"]]:
+        score += SECTION_MATCH_BONUS
+    return score, -candidate["group"]  # on equal scores the earlier page group wins
+
+
+def reduce_candidates(best: Dict[str, FieldCandidate], candidates: List[FieldCandidate]) -> None:
+    """
+    Merges candidates into the best candidate per field found so far (reduce step).
+    Conflicts are resolved by confidence, with a bonus for candidates found in the field's own statement.
+    """
+    for candidate in candidates:
+        current = best.get(candidate["field"])
+        if current is None or _candidate_rank(candidate) > _candidate_rank(current):
+            best[candidate["field"]] = candidate
+
+
+def extract_financial_data_chunked(pages: Iterable[str], pages_per_group: int = extraction_pages_per_group,
+                                   max_concurrency: int = extraction_concurrency, use_cache: bool = True,
+                                   fields: Optional[List[str]] = None, llm: Optional[PooledChatModel] = None) -> FinancialData:
+    """
+    Extracts financial data from documents too large for a single prompt using map-reduce
+    :param pages: Page texts, consumed lazily so only `max_concurrency` page groups are held at a time
+    :param pages_per_group: Number of pages sent in each map prompt
+    :param max_concurrency: Maximum number of map prompts in flight at once
+    :param use_cache: Whether identical earlier prompts may be answered from the LLM response cache
+    :param fields: Fields to ask for, all FinancialData fields by default
+    :param llm: Chat model client to use, the one of the configured API key by default
+    :return: Dictionary containing financial data with specific structure, None if nothing was extracted
+    :raises Exception: If the LLM request of a page group or a repair request fails
+    The merged figures are validated, and fields no group answered validly, e.g. because its answer was not JSON,
+    are asked for again with repair prompts from the lines of the pages that state them
+    """
+    from core.rule_extractor import field_context  # deferred, rule_extractor imports this module
+    requested_fields = fields or FINANCIAL_FIELDS
+    best: Dict[str, FieldCandidate] = {}
+    # Lines stating each field per page group, kept for the repair step instead of the pages themselves
+    group_contexts: Dict[int, Dict[str, List[str]]] = {}
+    largest_group = ""
+    groups = 0
+    with telemetry.span("extraction.chunked") as span, \
+            ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="extraction-map") as executor:
+        pending = set()
+        for group_index, group in enumerate(_page_groups(pages, pages_per_group)):
+            groups += 1
+            text = "\n\n".join(group)
+            group_contexts[group_index] = field_context(text, requested_fields, extraction_repair_max_lines)
+            largest_group = max(largest_group, text, key=len)
+            # Map prompts run in a copy of the current context, so their LLM spans nest under this one
+            pending.add(executor.submit(contextvars.copy_context().run, extract_candidates_from_text,
+                                        text, group_index, use_cache, fields, llm))
+            if len(pending) >= max_concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    reduce_candidates(best, future.result())
+        for future in wait(pending).done:
+            reduce_candidates(best, future.result())
+        span.set_attribute("page_groups", groups)
+        span.set_attribute("fields", len(best))
+
+    logger.debug(f"Extracted {len(best)} fields from {groups} page groups")
+    context: Dict[str, List[str]] = {}
+    for group_index in sorted(group_contexts):
+        for field, lines in group_contexts[group_index].items():
+            context[field] = (context.get(field, []) + lines)[:extraction_repair_max_lines]
+    financial_data, invalid = validate_financial_data({field: candidate["value"] for field, candidate in best.items()},
+                                                      requested_fields)
+    # A re-extraction would resend at least the largest page group, the repair prompts only the lines above
+    financial_data = repair_financial_data("", largest_group, financial_data, invalid, requested_fields,
+                                           use_cache=use_cache, llm=llm, context=context)
+    return financial_data or None
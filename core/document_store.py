@@ -0,0 +1,50 @@
+# financial_analyzer/core/document_store.py
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Optional
+from config.app_config import document_store_max_entries
+
+if TYPE_CHECKING:
+    from core.pipeline import DocumentExtraction
+
+
+class DocumentStore:
+    """
+    Extraction results per source document, keyed by the document's content hash and the extraction version.
+
+    Because results are stored per document and merged at the data level, adding, removing or replacing
+    one file of a set only costs extraction work for that file, and recalculating ratios for a known set
+    needs no extraction calls at all. The least recently used documents are dropped past `max_entries`.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._documents: "OrderedDict[str, DocumentExtraction]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional["DocumentExtraction"]:
+        """Returns the stored extraction of a document, or None on a miss."""
+        with self._lock:
+            document = self._documents.get(key)
+            if document is None:
+                self.misses += 1
+                return None
+            self._documents.move_to_end(key)
+            self.hits += 1
+            return document
+
+    def put(self, key: str, document: "DocumentExtraction") -> None:
+        with self._lock:
+            self._documents[key] = document
+            self._documents.move_to_end(key)
+            while len(self._documents) > self.max_entries:
+                self._documents.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._documents), "hits": self.hits, "misses": self.misses}
+
+
+document_store = DocumentStore(document_store_max_entries)
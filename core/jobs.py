@@ -0,0 +1,145 @@
+# financial_analyzer/core/jobs.py
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from config.app_config import analysis_workers
+
+logger = logging.getLogger(__name__)
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+# Finished jobs kept for lookup by ID before the oldest are forgotten
+MAX_FINISHED_JOBS = 1000
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job at its next progress report once cancellation was requested."""
+
+
+class Job:
+    """
+    A background analysis job.
+    The job function receives `report_progress`, which records the current stage, notifies the
+    progress listener and raises JobCancelled when the job was cancelled, so every stage boundary
+    is also a cancellation point.
+    """
+
+    def __init__(self, job_id: str, on_progress: Optional[Callable[["Job"], None]] = None,
+                 on_done: Optional[Callable[["Job"], None]] = None):
+        self.id = job_id
+        self.state = JOB_QUEUED
+        self.stage: Optional[str] = None
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.future = None
+        self._on_progress = on_progress
+        self._on_done = on_done
+        self._cancel_event = threading.Event()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.state in (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def report_progress(self, stage: str) -> None:
+        """Records the stage the job entered and notifies the progress listener."""
+        if self._cancel_event.is_set():
+            raise JobCancelled(self.id)
+        self.stage = stage
+        if self._on_progress:
+            self._on_progress(self)
+
+    def _finish(self, state: str, result: Any = None, error: Optional[BaseException] = None) -> None:
+        self.state = state
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+        if self._on_done:
+            try:
+                self._on_done(self)
+            except Exception as e:
+                logger.error(f"Completion callback of job {self.id} failed: {e}")
+
+
+class JobManager:
+    """Runs analysis jobs on a bounded worker pool and keeps track of them by job ID."""
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis-job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+
+    def submit(self, fn: Callable[..., Any], *args: Any, on_progress: Optional[Callable[[Job], None]] = None,
+               on_done: Optional[Callable[[Job], None]] = None, **kwargs: Any) -> Job:
+        """
+        Queues `fn(*args, **kwargs, on_progress=job.report_progress)` to run in the worker pool
+        :param on_progress: Called with the job whenever it enters a new stage
+        :param on_done: Called with the job once it is done, failed or cancelled
+        :return: The queued job
+        """
+        job = Job(f"{next(self._sequence)}-{uuid.uuid4().hex[:8]}", on_progress, on_done)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._forget_finished_jobs()
+        job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+        logger.debug(f"Queued job {job.id}")
+        return job
+
+    def _run(self, job: Job, fn: Callable[..., Any], args, kwargs) -> None:
+        if job.cancel_requested:
+            job._finish(JOB_CANCELLED)
+            return
+        job.state = JOB_RUNNING
+        logger.debug(f"Running job {job.id}")
+        try:
+            result = fn(*args, on_progress=job.report_progress, **kwargs)
+        except JobCancelled:
+            logger.info(f"Job {job.id} cancelled")
+            job._finish(JOB_CANCELLED)
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            job._finish(JOB_FAILED, error=e)
+        else:
+            logger.debug(f"Job {job.id} done")
+            job._finish(JOB_DONE, result=result)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Requests cancellation of a job. A queued job never starts, a running job stops at its next stage.
+        :return: False if the job is unknown or already finished
+        """
+        job = self.get(job_id)
+        if job is None or job.is_finished:
+            return False
+        job._cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            job._finish(JOB_CANCELLED)  # never started, so `_run` will not report it
+        return True
+
+    def _forget_finished_jobs(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.is_finished]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+
+job_manager = JobManager(analysis_workers)
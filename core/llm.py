@@ -1,13 +1,248 @@
 # financial_analyzer/core/llm.py
-from langchain_google_genai import ChatGoogleGenerativeAI
-from config.app_config import google_api_key
-
-
-chat_model = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash-exp",
-    google_api_key=google_api_key,
-    temperature=0.7,
-    max_output_tokens=2048,
-    verbose=False,
-    convert_system_message_to_human=True,
-)
\ No newline at end of file
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+from config.app_config import (
+    google_api_key,
+    llm_model_name,
+    llm_deterministic,
+    llm_cache_enabled,
+    llm_cache_path,
+    llm_cache_ttl_seconds,
+    llm_cache_max_entries,
+    llm_client_max_concurrency,
+    llm_client_idle_seconds,
+    llm_requests_per_minute,
+    llm_tokens_per_minute,
+    llm_rate_burst_seconds,
+    llm_max_retries,
+    llm_backoff_base_seconds,
+    llm_backoff_max_seconds,
+)
+from core.llm_cache import LLMResponseCache, make_cache_key
+from core.llm_scheduler import LLMScheduler, PRIORITY_DEFAULT
+from core.tokens import estimate_tokens
+from core.telemetry import telemetry
+
+if TYPE_CHECKING:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+logger = logging.getLogger(__name__)
+
+
+# Generation settings shared by every client, part of the pool and response cache keys
+MODEL_SETTINGS: Dict[str, Any] = {
+    "model": llm_model_name,
+    # Deterministic mode pins sampling so a cached answer is the answer the model would give again
+    "temperature": 0.0 if llm_deterministic else 0.7,
+    "top_k": 1 if llm_deterministic else None,
+    "max_output_tokens": 2048,
+}
+
+
+def create_chat_model(api_key: str) -> "ChatGoogleGenerativeAI":
+    """Builds a Gemini chat model for one API key. The Gemini client library is only imported here, on first use."""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        google_api_key=api_key,
+        max_retries=1,  # retries and backoff are handled by the LLMScheduler of the pooled client
+        verbose=False,
+        convert_system_message_to_human=True,
+        **MODEL_SETTINGS,
+    )
+
+
+class StreamInterrupted(RuntimeError):
+    """Raised when a streamed response fails after some of its text was already delivered, never retried."""
+
+
+class PooledChatModel:
+    """
+    A chat model client owned by the pool for one API key.
+    The underlying model object, and with it its HTTP connections, is reused across requests.
+    Every request goes through the client's LLMScheduler, which enforces the key's rate limits,
+    caps in-flight requests at `max_concurrency` and retries quota errors with backoff.
+    """
+
+    def __init__(self, model, max_concurrency: int):
+        self.model = model
+        self.last_used = time.monotonic()
+        self.scheduler = LLMScheduler(
+            requests_per_minute=llm_requests_per_minute,
+            tokens_per_minute=llm_tokens_per_minute,
+            max_in_flight=max_concurrency,
+            max_retries=llm_max_retries,
+            backoff_base_seconds=llm_backoff_base_seconds,
+            backoff_max_seconds=llm_backoff_max_seconds,
+            burst_seconds=llm_rate_burst_seconds,
+        )
+        self.agent = None  # ReAct agent bound to this client, built on first use by core.agent
+
+    @property
+    def is_idle(self) -> bool:
+        return self.scheduler.is_idle
+
+    def invoke(self, messages, priority: int = PRIORITY_DEFAULT, **kwargs):
+        prompt_tokens = sum(estimate_tokens(str(message.content)) for message in messages)
+        with telemetry.span("llm.invoke", priority=priority) as span:
+            try:
+                response = self.scheduler.run(lambda: self.model.invoke(messages, **kwargs), priority, prompt_tokens)
+            finally:
+                self.last_used = time.monotonic()
+            self._record_usage(span, prompt_tokens, str(response.content), getattr(response, "usage_metadata", None))
+        return response
+
+    def stream(self, messages, on_token: Callable[[str], None], priority: int = PRIORITY_DEFAULT, **kwargs) -> str:
+        """
+        Sends a request through the model's streaming interface, passing every text chunk to `on_token` as it
+        arrives. The request is only retried if it fails before its first chunk, so no text is delivered twice
+        :param on_token: Called with each chunk of the response text, in the calling thread
+        :return: The complete response text
+        """
+        prompt_tokens = sum(estimate_tokens(str(message.content)) for message in messages)
+        started_at = time.monotonic()
+
+        def request() -> Tuple[str, Optional[dict]]:
+            chunks, usage = [], None
+            try:
+                for chunk in self.model.stream(messages, **kwargs):
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    text = chunk.content if isinstance(chunk.content, str) else str(chunk.content)
+                    if not text:
+                        continue
+                    if not chunks:
+                        telemetry.observe("llm_first_token_seconds", time.monotonic() - started_at, priority=priority)
+                    chunks.append(text)
+                    on_token(text)
+            except Exception as e:
+                if chunks:
+                    raise StreamInterrupted(f"Response stream broke off after {len(chunks)} chunks") from e
+                raise
+            return "".join(chunks), usage
+
+        with telemetry.span("llm.stream", priority=priority) as span:
+            try:
+                text, usage = self.scheduler.run(request, priority, prompt_tokens)
+            finally:
+                self.last_used = time.monotonic()
+            self._record_usage(span, prompt_tokens, text, usage)
+        return text
+
+    def _record_usage(self, span, prompt_tokens: int, completion: str, usage: Optional[dict]) -> None:
+        completion_tokens = estimate_tokens(completion)
+        self.scheduler.charge_tokens(completion_tokens)
+        # Prefer the token counts reported by the provider over the estimates
+        usage = usage or {}
+        prompt_tokens = usage.get("input_tokens", prompt_tokens)
+        completion_tokens = usage.get("output_tokens", completion_tokens)
+        span.set_attribute("prompt_tokens", prompt_tokens)
+        span.set_attribute("completion_tokens", completion_tokens)
+        telemetry.increment("llm_requests_total")
+        telemetry.increment("llm_prompt_tokens_total", prompt_tokens)
+        telemetry.increment("llm_completion_tokens_total", completion_tokens)
+
+
+class ChatModelPool:
+    """
+    Chat model clients keyed by API key and model settings.
+    Requests with different keys never share a client, so they can run in parallel safely.
+    Clients idle for longer than `idle_seconds` are evicted.
+    """
+
+    def __init__(self, factory: Callable[[str], Any] = create_chat_model,
+                 max_concurrency: int = llm_client_max_concurrency, idle_seconds: int = llm_client_idle_seconds):
+        self._factory = factory
+        self.max_concurrency = max_concurrency
+        self.idle_seconds = idle_seconds
+        self._clients: Dict[Tuple, PooledChatModel] = {}
+        self._lock = threading.Lock()
+
+    def get(self, api_key: str) -> PooledChatModel:
+        """Returns the client for an API key, creating it on first use."""
+        key = (api_key, tuple(sorted(MODEL_SETTINGS.items())))
+        with self._lock:
+            self._evict_idle()
+            client = self._clients.get(key)
+            if client is None:
+                client = PooledChatModel(self._factory(api_key), self.max_concurrency)
+                self._clients[key] = client
+            client.last_used = time.monotonic()
+            return client
+
+    def _evict_idle(self) -> None:
+        now = time.monotonic()
+        for key, client in list(self._clients.items()):
+            if client.is_idle and now - client.last_used > self.idle_seconds:
+                del self._clients[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    def metrics(self) -> Dict[str, float]:
+        """Returns scheduler metrics summed over every pooled client, wait maximum as the overall maximum."""
+        with self._lock:
+            clients = list(self._clients.values())
+        totals: Dict[str, float] = {"clients": len(clients)}
+        for client in clients:
+            for name, value in client.scheduler.metrics().items():
+                totals[name] = max(totals.get(name, 0), value) if name == "wait_seconds_max" else totals.get(name, 0) + value
+        requests = totals.get("requests", 0)
+        totals["wait_seconds_avg"] = totals.get("wait_seconds_total", 0.0) / requests if requests else 0.0
+        return totals
+
+
+chat_model_pool = ChatModelPool()
+
+llm_response_cache = LLMResponseCache(llm_cache_path, llm_cache_ttl_seconds, llm_cache_max_entries) if llm_cache_enabled else None
+
+
+def get_chat_client(api_key: Optional[str] = None) -> PooledChatModel:
+    """Returns the pooled client for an API key, the configured GOOGLE_API_KEY by default."""
+    return chat_model_pool.get(api_key or google_api_key)
+
+
+def _generation_params(model) -> dict:
+    return {
+        "temperature": getattr(model, "temperature", None),
+        "top_p": getattr(model, "top_p", None),
+        "top_k": getattr(model, "top_k", None),
+        "max_output_tokens": getattr(model, "max_output_tokens", None),
+    }
+
+
+def invoke_prompt(prompt: str, use_cache: bool = True, llm: Optional[PooledChatModel] = None,
+                  priority: int = PRIORITY_DEFAULT, on_token: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Sends a single-message prompt to the chat model and returns the response text.
+    Byte-identical prompts for the same model settings are answered from the response cache
+    unless `use_cache` is False.
+    :param llm: Client to send the prompt with, the one of the configured API key by default
+    :param priority: Scheduling priority, see core.llm_scheduler
+    :param on_token: Streams the response, called with each chunk of text as it arrives (a cached response in one chunk)
+    """
+    from langchain_core.messages import HumanMessage  # deferred, langchain is slow to import
+
+    client = llm or get_chat_client()
+    cache = llm_response_cache if use_cache else None
+    cache_key = None
+    if cache is not None:
+        model = client.model
+        cache_key = make_cache_key(getattr(model, "model", type(model).__name__), _generation_params(model), prompt)
+        cached_response = cache.get(cache_key)
+        telemetry.increment("cache_requests_total", cache="llm_response", result="hit" if cached_response is not None else "miss")
+        if cached_response is not None:
+            logger.debug("LLM response cache hit")
+            if on_token:
+                on_token(cached_response)
+            return cached_response
+
+    if on_token:
+        response = client.stream([HumanMessage(content=prompt)], on_token, priority=priority)
+    else:
+        response = client.invoke([HumanMessage(content=prompt)], priority=priority).content
+    if cache is not None:
+        cache.put(cache_key, response)
+    return response
@@ -0,0 +1,87 @@
+# financial_analyzer/core/llm_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+def make_cache_key(model_name: str, generation_params: Dict[str, Any], prompt: str) -> str:
+    """Builds a cache key from the model name, its generation parameters and a hash of the prompt."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    params = json.dumps(generation_params, sort_keys=True, default=str)
+    return hashlib.sha256(f"{model_name}\n{params}\n{prompt_hash}".encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed cache of LLM responses.
+
+    Entries older than `ttl_seconds` are never served, and once the table holds
+    more than `max_entries` rows the least recently used ones are deleted.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: int, max_entries: int):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use so importing the module never touches the disk
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached response for `key`, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl_seconds),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        """Stores a response and evicts expired and least recently used entries."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit/miss counters for reporting."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
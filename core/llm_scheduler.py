@@ -0,0 +1,164 @@
+# financial_analyzer/core/llm_scheduler.py
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict
+from core.telemetry import telemetry
+
+logger = logging.getLogger(__name__)
+
+# Request priorities, lower runs first: extraction blocks the whole analysis, explanations only the report
+PRIORITY_EXTRACTION = 0
+PRIORITY_DEFAULT = 5
+PRIORITY_EXPLANATION = 10
+
+# HTTP status codes worth retrying: rate limited, overloaded or timed out
+RETRYABLE_STATUS_CODES = {429, 500, 503, 504}
+RETRYABLE_ERROR_NAMES = {"ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded", "InternalServerError"}
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Returns True for quota and transient server errors, without depending on a specific client library."""
+    if type(error).__name__ in RETRYABLE_ERROR_NAMES:
+        return True
+    for attribute in ("code", "status_code"):
+        try:
+            if int(getattr(error, attribute, 0) or 0) in RETRYABLE_STATUS_CODES:
+                return True
+        except (TypeError, ValueError):
+            continue
+    return "429" in str(error) or "resource has been exhausted" in str(error).lower()
+
+
+class TokenBucket:
+    """
+    Refills `per_minute` units per minute, holding at most `burst_seconds` worth of budget so a burst
+    cannot use up the whole minute at once. Not thread-safe on its own.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = 60.0):
+        self.capacity = max(1.0, per_minute * burst_seconds / 60.0)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available, 0 if they are available now."""
+        self._refill()
+        amount = min(amount, self.capacity)  # a single oversized request must not wait forever
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount  # may go negative when actual usage exceeds the estimate, delaying later requests
+
+
+class LLMScheduler:
+    """
+    Admission control in front of a chat model.
+    Requests wait in a priority queue until they are at its head, fewer than `max_in_flight` requests are
+    running, and both the requests-per-minute and tokens-per-minute budgets allow them. Retryable errors
+    are retried with full-jitter exponential backoff, re-entering the queue each time.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, max_in_flight: int,
+                 max_retries: int, backoff_base_seconds: float, backoff_max_seconds: float, burst_seconds: float = 60.0):
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self._requests = TokenBucket(requests_per_minute, burst_seconds)
+        self._tokens = TokenBucket(tokens_per_minute, burst_seconds)
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self.in_flight = 0
+        self._metrics = {"requests": 0, "retries": 0, "failures": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+
+    @property
+    def queue_depth(self) -> int:
+        with self._condition:
+            return len(self._queue)
+
+    @property
+    def is_idle(self) -> bool:
+        with self._condition:
+            return not self._queue and self.in_flight == 0
+
+    def _acquire(self, priority: int, estimated_tokens: int) -> None:
+        ticket = (priority, next(self._sequence))
+        enqueued_at = time.monotonic()
+        with self._condition:
+            heapq.heappush(self._queue, ticket)
+            while True:
+                if self._queue[0] == ticket and self.in_flight < self.max_in_flight:
+                    wait = max(self._requests.wait_time(1), self._tokens.wait_time(estimated_tokens))
+                    if wait <= 0:
+                        break
+                    self._condition.wait(timeout=wait)
+                else:
+                    self._condition.wait()
+            heapq.heappop(self._queue)
+            self._requests.consume(1)
+            self._tokens.consume(estimated_tokens)
+            self.in_flight += 1
+            waited = time.monotonic() - enqueued_at
+            self._metrics["requests"] += 1
+            self._metrics["wait_seconds_total"] += waited
+            self._metrics["wait_seconds_max"] = max(self._metrics["wait_seconds_max"], waited)
+            self._condition.notify_all()  # the next ticket may now be at the head
+        telemetry.observe("llm_scheduler_wait_seconds", waited, priority=priority)
+
+    def _release(self) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def charge_tokens(self, tokens: int) -> None:
+        """Debits tokens that were only known after the response, e.g. the completion."""
+        with self._condition:
+            self._tokens.consume(tokens)
+
+    def run(self, fn: Callable[[], Any], priority: int = PRIORITY_DEFAULT, estimated_tokens: int = 0) -> Any:
+        """
+        Runs `fn` once admitted, retrying retryable errors
+        :param fn: The request, called without arguments
+        :param priority: Lower values are admitted first
+        :param estimated_tokens: Tokens charged against the tokens-per-minute budget on admission
+        :return: The result of `fn`; the last error is raised once retries are exhausted
+        """
+        for attempt in range(self.max_retries + 1):
+            self._acquire(priority, estimated_tokens)
+            try:
+                return fn()
+            except Exception as e:
+                if not is_retryable_error(e) or attempt == self.max_retries:
+                    with self._condition:
+                        self._metrics["failures"] += 1
+                    telemetry.increment("llm_failures_total", error=type(e).__name__)
+                    raise
+                backoff = random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+                logger.warning(f"Retryable LLM error ({e}), retry {attempt + 1}/{self.max_retries} in {backoff:.2f}s")
+                with self._condition:
+                    self._metrics["retries"] += 1
+                telemetry.increment("llm_retries_total", error=type(e).__name__)
+            finally:
+                self._release()
+            time.sleep(backoff)
+
+    def metrics(self) -> Dict[str, float]:
+        """Returns queue depth, in-flight count, request/retry/failure counters and wait-time statistics."""
+        with self._condition:
+            metrics = dict(self._metrics)
+            metrics["queue_depth"] = len(self._queue)
+            metrics["in_flight"] = self.in_flight
+            metrics["wait_seconds_avg"] = metrics["wait_seconds_total"] / metrics["requests"] if metrics["requests"] else 0.0
+            return metrics
@@ -0,0 +1,81 @@
+# financial_analyzer/core/page_classifier.py
+import re
+from typing import Dict, List
+
+# Phrases that signal each financial statement, lower case
+STATEMENT_KEYWORDS: Dict[str, List[str]] = {
+    "balance_sheet": [
+        "balance sheet", "statement of financial position", "total assets", "current assets",
+        "total liabilities", "current liabilities", "shareholders' equity", "stockholders' equity",
+        "total equity", "inventories", "inventory", "borrowings", "long-term debt", "retained earnings",
+    ],
+    "income_statement": [
+        "income statement", "statement of operations", "statement of profit or loss", "profit and loss",
+        "revenue", "net sales", "cost of sales", "cost of goods sold", "gross profit", "operating income",
+        "ebit", "interest expense", "finance costs", "net income", "profit for the year", "earnings per share",
+    ],
+    "cash_flow": [
+        "cash flow", "cash flows", "operating activities", "investing activities", "financing activities",
+        "depreciation", "amortization", "capital expenditure", "cash and cash equivalents",
+    ],
+}
+
+_KEYWORD_PATTERNS = {
+    statement: re.compile(r"\b(?:" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b")
+    for statement, keywords in STATEMENT_KEYWORDS.items()
+}
+_NUMBER_PATTERN = re.compile(r"\(?-?\$?\d[\d,]*(?:\.\d+)?\)?")
+_WORD_PATTERN = re.compile(r"\S+")
+
+# Weight of the numeric density component relative to one keyword hit
+NUMBER_DENSITY_WEIGHT = 10.0
+
+
+def score_page(text: str) -> Dict[str, float]:
+    """
+    Scores a page for each financial statement type.
+    Each score is the number of statement keyword hits, boosted by how much of the page is numbers,
+    so statement tables outrank narrative that merely mentions the same terms.
+    :param text: Text of a single page
+    :return: Score per statement type, 0 for pages with no signal
+    """
+    lowered = text.lower()
+    words = len(_WORD_PATTERN.findall(lowered))
+    if not words:
+        return {statement: 0.0 for statement in STATEMENT_KEYWORDS}
+    number_density = len(_NUMBER_PATTERN.findall(lowered)) / words
+    scores = {}
+    for statement, pattern in _KEYWORD_PATTERNS.items():
+        hits = len(pattern.findall(lowered))
+        scores[statement] = hits * (1.0 + NUMBER_DENSITY_WEIGHT * number_density) if hits else 0.0
+    return scores
+
+
+def select_relevant_pages(pages: List[str], max_pages: int) -> List[int]:
+    """
+    Picks the pages most likely to hold the balance sheet, income statement and cash flow statement.
+    The best page of each statement type is always kept, the rest of the budget goes to the highest
+    overall scores. Pages without any signal are dropped unless no page scores at all.
+    :param pages: Text of every page of a document
+    :param max_pages: Maximum number of pages to keep, 0 keeps every page
+    :return: Indices of the selected pages in document order
+    """
+    if max_pages <= 0 or len(pages) <= max_pages:
+        return list(range(len(pages)))
+
+    page_scores = [score_page(page) for page in pages]
+    totals = [sum(scores.values()) for scores in page_scores]
+    if not any(totals):
+        return list(range(max_pages))  # nothing looks like a statement, fall back to the first pages
+
+    selected = []
+    for statement in STATEMENT_KEYWORDS:
+        best_page = max(range(len(pages)), key=lambda i: page_scores[i][statement])
+        if page_scores[best_page][statement] > 0 and best_page not in selected:
+            selected.append(best_page)
+    for page_index in sorted(range(len(pages)), key=lambda i: totals[i], reverse=True):
+        if len(selected) >= max_pages or totals[page_index] == 0:
+            break
+        if page_index not in selected:
+            selected.append(page_index)
+    return sorted(selected[:max_pages])
@@ -0,0 +1,120 @@
+# financial_analyzer/core/pdf_cache.py
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+from config.app_config import pdf_cache_dir, pdf_cache_max_bytes
+
+# Hashes handed over by whoever wrote a file, e.g. the upload store, so the file is not read again to hash it.
+# Keyed by absolute path, an entry only counts while the file keeps the size and modification time it was registered with
+_known_hashes: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_known_hashes_lock = threading.Lock()
+
+
+def _file_signature(file_path: str) -> Tuple[int, int]:
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def register_content_hash(file_path: str, content_hash: str) -> None:
+    """Records the SHA-256 of a file whose content was just hashed while it was written."""
+    path = os.path.abspath(file_path)
+    signature = _file_signature(path)
+    with _known_hashes_lock:
+        _known_hashes[path] = (signature, content_hash)
+
+
+def forget_content_hash(file_path: str) -> None:
+    with _known_hashes_lock:
+        _known_hashes.pop(os.path.abspath(file_path), None)
+
+
+def file_sha256(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """Returns the hex SHA-256 digest of a file's content, read in blocks unless it was registered as known."""
+    path = os.path.abspath(file_path)
+    with _known_hashes_lock:
+        known = _known_hashes.get(path)
+    if known is not None:
+        try:
+            if _file_signature(path) == known[0]:
+                return known[1]
+        except OSError:
+            pass
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PdfTextCache:
+    """
+    Content-addressed on-disk cache of per-page PDF text.
+
+    Entries are keyed by the SHA-256 of the file content plus the parser version,
+    so renamed or re-uploaded copies of the same filing hit the same entry and a
+    parser upgrade never serves stale text. Entries are evicted least recently
+    used first once the cache directory grows past `max_bytes`.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _entry_path(self, content_hash: str, parser_version: str) -> str:
+        key = hashlib.sha256(f"{content_hash}:{parser_version}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get_pages(self, content_hash: str, parser_version: str) -> Optional[List[str]]:
+        """Returns the cached page texts, or None on a miss."""
+        entry_path = self._entry_path(content_hash, parser_version)
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                pages = json.load(f)
+            os.utime(entry_path)  # mark as recently used for LRU eviction
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return pages
+
+    def put_pages(self, content_hash: str, parser_version: str, pages: List[str]) -> None:
+        """Stores the page texts of a file and evicts old entries if the cache is over budget."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry_path = self._entry_path(content_hash, parser_version)
+        tmp_path = f"{entry_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(pages, f)
+        os.replace(tmp_path, entry_path)  # atomic, so readers never see a partial entry
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total_size <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total_size -= size
+                except OSError:
+                    continue
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit/miss counters for reporting."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+pdf_text_cache = PdfTextCache(pdf_cache_dir, pdf_cache_max_bytes)
@@ -1,31 +1,218 @@
 # financial_analyzer/core/pdf_processor.py
-from typing import List
+from typing import Iterator, List, Optional, Tuple, TypedDict
+import itertools
+import logging
+import multiprocessing
 import os
-from langchain.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from importlib import metadata
+from core.pdf_cache import pdf_text_cache, file_sha256
+from core.page_classifier import select_relevant_pages
+from core.tokens import estimate_tokens
+from core.telemetry import telemetry
+from config.app_config import relevant_page_limit, pdf_parse_workers
 
+logger = logging.getLogger(__name__)
 
-def load_and_extract_text_from_pdfs(pdf_paths: List[str], upload_dir: str) -> str:
-    """Loads and extracts text from multiple PDFs from upload directory."""
-    print("DEBUG: Starting load_and_extract_text_from_pdfs")
-    all_text = []
-    for pdf_path in pdf_paths:
-        full_pdf_path = os.path.join(upload_dir, os.path.basename(pdf_path)) # add correct paths.
-        print(f"DEBUG: Loading PDF: {full_pdf_path}")
+
+class PdfPage(TypedDict):
+    file: str  # file name as uploaded
+    page: int  # page number, starting at 1
+    text: str
+
+
+def _parser_version() -> str:
+    try:
+        return f"pypdf-{metadata.version('pypdf')}"
+    except metadata.PackageNotFoundError:
+        return "pypdf-unknown"
+
+
+# Part of the extraction cache key, bump when the page text produced by this module changes
+PARSER_VERSION = _parser_version()
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_lock = threading.Lock()
+
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    """Returns the PDF parsing process pool, starting it on first use."""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            # Spawned rather than forked: the app runs many threads, and a forked child could inherit held locks
+            _parse_pool = ProcessPoolExecutor(max_workers=pdf_parse_workers, mp_context=multiprocessing.get_context("spawn"))
+        return _parse_pool
+
+
+def _discard_parse_pool(pool: ProcessPoolExecutor) -> None:
+    """Drops a pool whose worker died, so the next file starts a fresh one."""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is pool:
+            _parse_pool = None
+    pool.shutdown(wait=False)
+
+
+def parse_pdf_pages(full_pdf_path: str) -> List[str]:
+    """Parses the text of every page of a PDF. Runs in the parsing worker processes, so it touches no cache."""
+    from langchain.document_loaders import PyPDFLoader  # deferred, only needed on a cache miss
+
+    loader = PyPDFLoader(file_path=full_pdf_path)
+    return [doc.page_content for doc in loader.load()]
+
+
+def _cached_pages(full_pdf_path: str) -> Tuple[str, Optional[List[str]]]:
+    """Returns the content hash of a file and its cached page texts, None on an extraction cache miss."""
+    content_hash = file_sha256(full_pdf_path)
+    pages = pdf_text_cache.get_pages(content_hash, PARSER_VERSION)
+    telemetry.increment("cache_requests_total", cache="pdf_text", result="hit" if pages is not None else "miss")
+    if pages is not None:
+        logger.debug(f"Extraction cache hit for: {full_pdf_path}")
+    return content_hash, pages
+
+
+def load_pdf_pages(full_pdf_path: str, parse_in_pool: bool = False) -> List[str]:
+    """
+    Returns the text of every page of a PDF, parsing it only on an extraction cache miss
+    :param parse_in_pool: Parse in the worker process pool, for callers loading several files from concurrent
+                          threads, whose parsing would otherwise take turns on the GIL
+    """
+    if parse_in_pool and pdf_parse_workers > 1:
+        return _finish_load(full_pdf_path, *_start_load(full_pdf_path))
+    with telemetry.span("pdf.load_pages", path=full_pdf_path) as span:
+        content_hash, pages = _cached_pages(full_pdf_path)
+        span.set_attribute("cache_hit", pages is not None)
+        if pages is not None:
+            return pages
+        with telemetry.span("pdf.parse", path=full_pdf_path):
+            pages = parse_pdf_pages(full_pdf_path)
+        pdf_text_cache.put_pages(content_hash, PARSER_VERSION, pages)
+        span.set_attribute("pages", len(pages))
+        return pages
+
+
+def _start_load(full_pdf_path: str) -> Tuple[Optional[str], Future, Optional[ProcessPoolExecutor]]:
+    """
+    Starts loading one file for iter_pdf_pages or load_pdf_pages
+    :return: Content hash to cache the parsed pages under (None when nothing needs caching), the future of the
+             pages and the pool parsing them (None on a cache hit)
+    """
+    future, content_hash, pool = Future(), None, None
+    try:
+        content_hash, pages = _cached_pages(full_pdf_path)
+        if pages is not None:
+            future.set_result(pages)
+            return None, future, None
+        pool = _get_parse_pool()
+        return content_hash, pool.submit(parse_pdf_pages, full_pdf_path), pool
+    except Exception as e:
+        future.set_exception(e)  # raised to the consumer when it reaches this file
+        return content_hash, future, pool
+
+
+def _finish_load(full_pdf_path: str, content_hash: Optional[str], future: Future,
+                 pool: Optional[ProcessPoolExecutor]) -> List[str]:
+    with telemetry.span("pdf.load_pages", path=full_pdf_path, cache_hit=pool is None) as span:
+        try:
+            pages = future.result()
+        except BrokenProcessPool:
+            # A worker died and took every file in flight with it, retry this one alone in a fresh pool
+            logger.warning(f"PDF parsing worker died, retrying {full_pdf_path}")
+            if pool is not None:
+                _discard_parse_pool(pool)
+            pages = _get_parse_pool().submit(parse_pdf_pages, full_pdf_path).result()
+        if content_hash is not None:
+            pdf_text_cache.put_pages(content_hash, PARSER_VERSION, pages)
+        span.set_attribute("pages", len(pages))
+        return pages
+
+
+def _load_ahead(full_paths: List[str], max_workers: int):
+    """Yields (path, load) pairs in order, keeping up to `max_workers` files loading in the background."""
+    paths = iter(full_paths)
+    in_flight = deque()
+    try:
+        for path in itertools.islice(paths, max_workers):
+            in_flight.append((path, *_start_load(path)))
+        while in_flight:
+            path, content_hash, future, pool = in_flight.popleft()
+            next_path = next(paths, None)
+            if next_path is not None:
+                in_flight.append((next_path, *_start_load(next_path)))
+            yield path, lambda: _finish_load(path, content_hash, future, pool)
+    finally:
+        # The consumer stopped early, parsing the files it will never read is wasted work
+        for _, _, future, _ in in_flight:
+            future.cancel()
+
+
+def iter_pdf_pages(pdf_paths: List[str], upload_dir: str, max_workers: int = pdf_parse_workers,
+                   parse_in_pool: bool = False) -> Iterator[PdfPage]:
+    """
+    Yields the pages of multiple PDFs from upload directory, tagged with file name and page number.
+    Files are yielded one after another in the given order; cache misses are parsed in a process pool up to
+    `max_workers` files ahead of the consumer, so only the files in flight are held in memory.
+    A file that cannot be read is logged and skipped without affecting the others.
+    :param max_workers: Files loaded ahead, 1 or less parses every file in this process
+    :param parse_in_pool: Parse even a single file in the process pool, see load_pdf_pages
+    """
+    full_paths = [os.path.join(upload_dir, os.path.basename(p)) for p in pdf_paths] # add correct paths.
+    if max_workers <= 1 or len(full_paths) <= 1:
+        # A single file gains nothing from loading ahead; it is parsed in a worker process only if the caller
+        # loads other files concurrently
+        parse_in_pool = parse_in_pool and max_workers > 1
+        loads = ((path, lambda path=path: load_pdf_pages(path, parse_in_pool)) for path in full_paths)
+    else:
+        loads = _load_ahead(full_paths, max_workers)
+    for full_pdf_path, load in loads:
+        logger.debug(f"Loading PDF: {full_pdf_path}")
         try:
-            loader = PyPDFLoader(file_path=full_pdf_path)
-            documents = loader.load()
-            text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-            all_text.extend([doc.page_content for doc in text_splitter.split_documents(documents)])
-            print(f"DEBUG: Successfully loaded and split text from: {full_pdf_path}")
+            pages = load()
         except Exception as e:
-             print(f"ERROR: Could not load or split text from {full_pdf_path}: {e}")
-             continue # Skip to the next file if there is an error
+            logger.error(f"Could not load text from {full_pdf_path}: {e}")
+            continue # Skip to the next file if there is an error
+        file_name = os.path.basename(full_pdf_path)
+        for number, text in enumerate(pages, start=1):
+            yield {"file": file_name, "page": number, "text": text}
+
 
-    if not all_text:
-        print("DEBUG: No text extracted from any of the provided PDF documents.")
+def load_relevant_pages(pdf_paths: List[str], upload_dir: str, parse_in_pool: bool = False) -> List[str]:
+    """
+    Loads multiple PDFs from upload directory and returns the text of the pages that look like
+    financial statements, each page exactly once, in document order.
+    :param parse_in_pool: Parse even a single file in the process pool, see load_pdf_pages
+    """
+    relevant_pages = []
+    pdf_pages = iter_pdf_pages(pdf_paths, upload_dir, parse_in_pool=parse_in_pool)
+    for file_name, file_pages in itertools.groupby(pdf_pages, key=lambda page: page["file"]):
+        pages = [page["text"] for page in file_pages]
+        selected_pages = [pages[i] for i in select_relevant_pages(pages, relevant_page_limit) if pages[i].strip()]
+        full_tokens = estimate_tokens("\n\n".join(pages))
+        selected_tokens = estimate_tokens("\n\n".join(selected_pages))
+        reduction = 1 - selected_tokens / full_tokens if full_tokens else 0.0
+        logger.debug(f"Selected {len(selected_pages)} of {len(pages)} pages from {file_name}: "
+                     f"~{selected_tokens} of ~{full_tokens} input tokens ({reduction:.0%} reduction)")
+        telemetry.increment("pdf_input_tokens_total", full_tokens)
+        telemetry.increment("pdf_selected_tokens_total", selected_tokens)
+        relevant_pages.extend(selected_pages)
+
+    logger.debug(f"Extraction cache stats: {pdf_text_cache.stats()}")
+    return relevant_pages
+
+
+def load_and_extract_text_from_pdfs(pdf_paths: List[str], upload_dir: str) -> str:
+    """
+    Loads and extracts text from multiple PDFs from upload directory.
+    Only the pages that look like financial statements are kept, each page exactly once.
+    """
+    pages = load_relevant_pages(pdf_paths, upload_dir)
+    if not pages:
+        logger.debug("No text extracted from any of the provided PDF documents.")
         return None  # return None if no text was extracted
 
-    combined_text = " ".join(all_text)
-    print("DEBUG: Finished load_and_extract_text_from_pdfs")
-    return combined_text
\ No newline at end of file
+    combined_text = "\n\n".join(pages)
+    return combined_text
@@ -0,0 +1,342 @@
+# financial_analyzer/core/pipeline.py
+import contextvars
+import logging
+import math
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, TypedDict, Union
+from core.data_extractor import FinancialData, FINANCIAL_FIELDS, extract_financial_data_from_text, extract_financial_data_chunked
+from core.rule_extractor import detect_company, detect_period, extract_financial_data_with_rules
+from core.llm import MODEL_SETTINGS, PooledChatModel
+from core.pdf_cache import file_sha256
+from core.pdf_processor import PARSER_VERSION, load_pdf_pages, load_relevant_pages
+from core.document_store import document_store
+from core.results_store import AnalysisRecord, make_analysis_key, results_store
+from core.ratio_calculator import FinancialRatios, calculate_ratios
+from core.report_generator import EXPLANATION_FALLBACK, generate_report, generate_report_bytes, get_ratio_explanations
+from core.report_renderer import DEFAULT_REPORT_FORMAT
+from core.telemetry import telemetry
+from config.app_config import extraction_single_prompt_max_chars, extraction_pages_per_group, extraction_concurrency
+
+if TYPE_CHECKING:
+    from core.prefetch import UploadPrefetcher
+
+logger = logging.getLogger(__name__)
+
+
+# Part of the document store key, bump when the figures extracted from the same pages change (rules or prompts)
+EXTRACTION_VERSION = "2"
+
+
+class DocumentExtraction(TypedDict):
+    file: str
+    content_hash: str  # SHA-256 of the file content
+    company: Optional[str]  # name of the reporting company, None if no page names it
+    period: Optional[str]  # ISO date the reporting period ends, None if the statements do not say
+    pages: int  # number of relevant pages found, 0 if no text could be extracted
+    data: FinancialData  # figures found in this document
+    provenance: Dict[str, str]  # "rules (<statement line>)" or "llm" per field in `data`
+    llm_complete: bool  # whether the LLM already answered for the fields the rules missed
+
+
+def extract_from_pages(pages: List[str], llm: Optional[PooledChatModel] = None,
+                       use_llm: bool = True) -> Tuple[FinancialData, Dict[str, str], bool]:
+    """
+    Reads figures on standard statement lines with rules and asks the LLM only for the fields still missing
+    :param pages: Text of the relevant pages
+    :param llm: Chat model client to use, the one of the configured API key by default
+    :param use_llm: Whether to ask the LLM at all, rules only otherwise
+    :return: Extracted figures, the provenance of each and whether the LLM answered for the missing fields.
+             If an LLM request fails only the figures read by rules are returned, to be completed later
+    """
+    with telemetry.span("stage.rule_extraction"):
+        rule_data, rule_provenance = extract_financial_data_with_rules(pages)
+    missing_fields = [field for field in FINANCIAL_FIELDS if field not in rule_data]
+    chunked = sum(len(page) for page in pages) > extraction_single_prompt_max_chars
+    planned_llm_calls = math.ceil(len(pages) / extraction_pages_per_group) if chunked else 1
+    llm_complete = use_llm or not missing_fields
+    with telemetry.span("stage.llm_extraction", missing_fields=len(missing_fields), chunked=chunked):
+        try:
+            if not missing_fields or not use_llm:
+                llm_data = {}
+            elif chunked:
+                # Too large for one prompt, extract from page groups concurrently and merge
+                llm_data = extract_financial_data_chunked(pages, fields=missing_fields, llm=llm)
+            else:
+                llm_data = extract_financial_data_from_text("\n\n".join(pages), fields=missing_fields, llm=llm)
+        except Exception as e:
+            logger.error(f"LLM extraction of {len(missing_fields)} missing fields failed, keeping the rule results: {e}")
+            llm_data, llm_complete = {}, False
+    llm_data = llm_data or {}
+
+    financial_data = {field: value for field, value in llm_data.items() if field in missing_fields}
+    financial_data.update(rule_data)
+    provenance = {field: f"rules ({rule_provenance[field]!r})" if field in rule_data else "llm" for field in financial_data}
+    for field in FINANCIAL_FIELDS:
+        logger.debug(f"Provenance of {field}: {provenance.get(field, 'missing')}")
+    if use_llm:
+        llm_calls_avoided = 0 if missing_fields else planned_llm_calls
+        logger.info(f"{len(rule_data)} of {len(FINANCIAL_FIELDS)} fields read by rules, "
+                    f"LLM extraction calls avoided: {llm_calls_avoided} of {planned_llm_calls}")
+        telemetry.increment("rule_extracted_fields_total", len(rule_data))
+        telemetry.increment("llm_extraction_calls_avoided_total", llm_calls_avoided)
+    return financial_data, provenance, llm_complete
+
+
+def load_financial_data(pdf_paths: List[str], upload_dir: str, llm: Optional[PooledChatModel] = None) -> FinancialData:
+    """
+    Extracts financial data from the provided PDF paths
+    Every file is extracted on its own, or taken from the document store if it was extracted before, and the
+    figures are merged at the data level, so adding, removing or replacing one file only costs work for that file.
+    Figures on standard statement lines are read with rules, the LLM is only asked for the fields still missing.
+    :param pdf_paths: List of paths to the financial report pdf files
+    :param upload_dir: Directory the uploaded files are stored in
+    :param llm: Chat model client to use, the one of the configured API key by default
+    :return: Dictionary containing financial data with specific structure
+    """
+    with telemetry.span("stage.load_documents", files=len(pdf_paths)):
+        documents = extract_documents(pdf_paths, upload_dir, llm)
+    return merge_documents(documents)
+
+
+def _document_key(content_hash: str) -> str:
+    return f"{content_hash}:{PARSER_VERSION}:{MODEL_SETTINGS['model']}:{EXTRACTION_VERSION}"
+
+
+def extract_document(pdf_path: str, upload_dir: str, llm: Optional[PooledChatModel] = None,
+                     use_llm: bool = True, parse_in_pool: bool = False) -> DocumentExtraction:
+    """
+    Extracts the figures of a single uploaded file, or returns them from the document store if the same content
+    was extracted before
+    :param use_llm: Whether to ask the LLM for the fields the rules missed, see complete_document otherwise
+    :param parse_in_pool: Parse the file in the PDF worker process pool, when other files are extracted concurrently
+    """
+    file_name = os.path.basename(pdf_path)
+    content_hash = file_sha256(os.path.join(upload_dir, file_name))
+    stored = _stored_document(_document_key(content_hash))
+    telemetry.increment("cache_requests_total", cache="document", result="hit" if stored is not None else "miss")
+    if stored is not None:
+        document = {**stored, "file": file_name}
+        return complete_document(document, upload_dir, llm) if use_llm else document
+
+    with telemetry.span("document.extract", file=file_name):
+        pages = load_relevant_pages([file_name], upload_dir, parse_in_pool)
+        data, provenance, llm_complete = extract_from_pages(pages, llm, use_llm) if pages else ({}, {}, False)
+        # The cover usually names the company, its text is already in the extraction cache
+        cover = load_pdf_pages(os.path.join(upload_dir, file_name))[:1] if pages else []
+    document: DocumentExtraction = {
+        "file": file_name,
+        "content_hash": content_hash,
+        "company": detect_company(cover + pages),
+        "period": detect_period(pages),
+        "pages": len(pages),
+        "data": data,
+        "provenance": provenance,
+        "llm_complete": llm_complete,
+    }
+    # A file whose text could not be read, e.g. because parsing failed, is read again on its next use
+    if pages:
+        _store_document(_document_key(content_hash), document)
+    return document
+
+
+def _stored_document(key: str) -> Optional[DocumentExtraction]:
+    """Looks a document up in memory first, then in the persistent results store."""
+    document = document_store.get(key)
+    if document is None and results_store is not None:
+        document = results_store.get_document(key)
+        if document is not None:
+            document_store.put(key, document)
+    return document
+
+
+def _store_document(key: str, document: DocumentExtraction) -> None:
+    document_store.put(key, document)
+    # Only finished extractions are persisted, a rules-only one or one whose LLM request failed is completed on its next use
+    if results_store is not None and document["llm_complete"]:
+        results_store.put_document(key, document)
+
+
+def complete_document(document: DocumentExtraction, upload_dir: str,
+                      llm: Optional[PooledChatModel] = None) -> DocumentExtraction:
+    """Asks the LLM for the fields of a rules-only extraction that the rules missed."""
+    if document["llm_complete"]:
+        return document
+    key = _document_key(document["content_hash"])
+    stored = _stored_document(key)
+    if stored is not None and stored["llm_complete"]:
+        return {**stored, "file": document["file"]}
+    with telemetry.span("document.complete", file=document["file"]):
+        pages = load_relevant_pages([document["file"]], upload_dir)  # served from the extraction cache
+        if not pages:
+            return document
+        data, provenance, llm_complete = extract_from_pages(pages, llm)
+    document = {**document, "data": data, "provenance": provenance, "llm_complete": llm_complete}
+    _store_document(key, document)
+    return document
+
+
+def extract_documents(pdf_paths: List[str], upload_dir: str, llm: Optional[PooledChatModel] = None,
+                      max_concurrency: int = extraction_concurrency) -> List[DocumentExtraction]:
+    """
+    Extracts several files concurrently, in the given order. A file that cannot be read is logged and skipped.
+    The PDFs of several files are parsed in the worker process pool rather than in the threads of this process.
+    """
+    parse_in_pool = len(pdf_paths) > 1
+
+    def extract(pdf_path: str) -> Optional[DocumentExtraction]:
+        try:
+            return extract_document(pdf_path, upload_dir, llm, parse_in_pool=parse_in_pool)
+        except Exception as e:
+            logger.error(f"Could not load text from {pdf_path}: {e}")
+            return None
+
+    workers = max(1, min(max_concurrency, len(pdf_paths)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="document-extraction") as executor:
+        # Each file runs in a copy of the current context, so its spans nest under the caller's
+        futures = [executor.submit(contextvars.copy_context().run, extract, pdf_path) for pdf_path in pdf_paths]
+        documents = [future.result() for future in futures]
+    return [document for document in documents if document is not None]
+
+
+def merge_documents(documents: List[DocumentExtraction]) -> FinancialData:
+    """
+    Merges per-file extractions into one set of figures for the latest reporting period.
+    Documents of earlier periods are left out so figures of different periods are never mixed; documents whose
+    statements state no period are taken to belong to the latest one. Within the period a figure read with rules
+    from any file beats an LLM answer, and among equals the file uploaded first wins.
+    :return: Dictionary containing financial data with specific structure
+    """
+    if not any(document["pages"] for document in documents):
+        logger.debug("No text extracted, cannot proceed")
+        raise ValueError("No text extracted from PDFs.")
+    latest_period, current = _current_documents(documents)
+    merged: FinancialData = {}
+    for from_rules in (True, False):
+        for document in current:
+            for field, value in document["data"].items():
+                if field not in merged and document["provenance"][field].startswith("rules") == from_rules:
+                    merged[field] = value
+    if not merged:
+        logger.debug("Financial data extraction failed")
+        raise ValueError("Could not extract financial data from the given text.")
+    logger.debug(f"Merged {len(merged)} fields from {len(current)} of {len(documents)} documents, period {latest_period}")
+    return {field: merged[field] for field in FINANCIAL_FIELDS if field in merged}
+
+
+def _current_documents(documents: List[DocumentExtraction]) -> Tuple[Optional[str], List[DocumentExtraction]]:
+    """Returns the latest reporting period and the documents of it, undated documents included."""
+    latest_period = max((document["period"] for document in documents if document["period"]), default=None)
+    return latest_period, [document for document in documents if document["period"] in (latest_period, None)]
+
+
+def analysis_subject(documents: List[DocumentExtraction]) -> Tuple[Optional[str], Optional[str]]:
+    """Returns the company (the one most documents of the latest period name) and the period an analysis is about."""
+    period, current = _current_documents(documents)
+    companies = Counter(document["company"] for document in current if document["company"])
+    return (companies.most_common(1)[0][0] if companies else None), period
+
+
+class AnalysisResult(TypedDict):
+    company: Optional[str]
+    period: Optional[str]  # ISO date the analysed period ends
+    figures: FinancialData
+    ratios: FinancialRatios
+    explanations: Optional[Dict[str, str]]  # None if no report was rendered and none was stored
+    report: Union[str, bytes, None]  # path of the report (its content if `in_memory`), None if not rendered
+
+
+def run_financial_pipeline(pdf_paths: List[str], upload_dir: str, on_progress: Optional[Callable[[str], None]] = None,
+                           output_dir: Optional[str] = None, in_memory: bool = False,
+                           llm: Optional[PooledChatModel] = None,
+                           prefetcher: Optional["UploadPrefetcher"] = None,
+                           on_ratios: Optional[Callable[[FinancialRatios], None]] = None,
+                           on_explanation_token: Optional[Callable[[str, str], None]] = None,
+                           on_explanation: Optional[Callable[[str, str], None]] = None) -> Union[str, bytes]:
+    """
+    Runs the fixed get_financial_data -> calculate_ratios -> generate_pdf_report workflow in-process,
+    without an LLM round trip to decide each next step.
+    :param pdf_paths: List of paths to the financial report pdf files
+    :param upload_dir: Directory the uploaded files are stored in
+    :param on_progress: Called with the name of each stage as it starts
+    :param output_dir: Directory the report is written to
+    :param in_memory: Return the PDF content instead of writing it to `output_dir`
+    :param llm: Chat model client to use, the one of the configured API key by default
+    :param prefetcher: Uploads already extracted in the background, their results are merged instead of extracting again
+    :param on_ratios: Called with the ratios as soon as they are calculated, before any explanation is requested
+    :param on_explanation_token: Streams the explanations, called with a ratio name and each chunk of its text
+    :param on_explanation: Called with a ratio name and its final explanation once that one is complete
+    :return: Path to generated PDF file (or its content if `in_memory`), None if the report could not be generated
+    """
+    return run_analysis(pdf_paths, upload_dir, on_progress, output_dir, in_memory, llm, prefetcher,
+                        on_ratios=on_ratios, on_explanation_token=on_explanation_token,
+                        on_explanation=on_explanation)["report"]
+
+
+def run_analysis(pdf_paths: List[str], upload_dir: str, on_progress: Optional[Callable[[str], None]] = None,
+                 output_dir: Optional[str] = None, in_memory: bool = False, llm: Optional[PooledChatModel] = None,
+                 prefetcher: Optional["UploadPrefetcher"] = None, render_report: bool = True,
+                 report_format: str = DEFAULT_REPORT_FORMAT,
+                 on_ratios: Optional[Callable[[FinancialRatios], None]] = None,
+                 on_explanation_token: Optional[Callable[[str, str], None]] = None,
+                 on_explanation: Optional[Callable[[str, str], None]] = None) -> AnalysisResult:
+    """
+    Runs the workflow of run_financial_pipeline and returns everything it produced, not only the report.
+    Ratios and explanations are handed to the callbacks as they become available, the report is rendered last
+    :param render_report: Whether to explain the ratios and render the report, figures and ratios only otherwise
+    :param report_format: "pdf", "html" or "json"; the HTML page and JSON payload are cheaper to render than the PDF
+    :return: Company, period, figures, ratios, explanations and report of the analysis
+    """
+    report_progress = on_progress or (lambda stage: None)
+    with telemetry.span("pipeline", files=len(pdf_paths)):
+        report_progress("Extracting Data...")
+        with telemetry.span("stage.extraction"):
+            # Documents analysed before come from the results store, without parsing or LLM calls
+            if prefetcher is not None:
+                documents = prefetcher.documents(pdf_paths, llm)
+            else:
+                documents = extract_documents(pdf_paths, upload_dir, llm)
+            financial_data = merge_documents(documents)
+        company, period = analysis_subject(documents)
+        analysis_key = make_analysis_key(_document_key(document["content_hash"]) for document in documents)
+        stored = results_store.get_analysis(analysis_key) if results_store is not None else None
+        telemetry.increment("cache_requests_total", cache="analysis", result="hit" if stored is not None else "miss")
+        report_progress("Calculating Ratios...")
+        with telemetry.span("stage.ratios"):
+            ratios = calculate_ratios(financial_data)
+        if on_ratios:
+            on_ratios(ratios)
+        explanations = stored["explanations"] if stored is not None and stored["ratios"] == ratios else None
+        explained = False  # whether new explanations were requested, to be stored over any earlier record
+        report = None
+        if render_report:
+            report_progress("Generating Report...")
+            with telemetry.span("stage.report", in_memory=in_memory, format=report_format):
+                if explanations is None:
+                    explanations = get_ratio_explanations(ratios, llm=llm, on_token=on_explanation_token,
+                                                          on_explanation=on_explanation)
+                    explained = True
+                elif on_explanation:
+                    for ratio_name, explanation in explanations.items():
+                        on_explanation(ratio_name, explanation)
+                if in_memory:
+                    report = generate_report_bytes(ratios, llm, explanations, report_format)
+                else:
+                    report = generate_report(ratios, output_dir, llm, explanations, report_format)
+        # Also replaces a stored analysis of the same documents whose ratios changed, e.g. after an extraction fix
+        if results_store is not None and explained and EXPLANATION_FALLBACK not in explanations.values():
+            record: AnalysisRecord = {
+                "analysis_key": analysis_key,
+                "company": company,
+                "period": period,
+                "document_hashes": [document["content_hash"] for document in documents],
+                "figures": financial_data,
+                "ratios": ratios,
+                "explanations": explanations,
+                "created_at": time.time(),
+            }
+            results_store.put_analysis(record)
+    return {"company": company, "period": period, "figures": financial_data, "ratios": ratios,
+            "explanations": explanations, "report": report}
@@ -0,0 +1,96 @@
+# financial_analyzer/core/prefetch.py
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from core.llm import PooledChatModel, get_chat_client
+from core.pipeline import DocumentExtraction, complete_document, extract_document
+from config.app_config import prefetch_workers
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Returns the worker pool shared by every session's prefetcher, starting it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix="upload-prefetch")
+        return _executor
+
+
+def _file_signature(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class UploadPrefetcher:
+    """
+    Extracts the files of one UI session in the background as soon as each upload lands, so the analysis
+    only has to merge the results and render the report. A re-uploaded file with the same name but new
+    content is extracted again.
+    """
+
+    def __init__(self, upload_dir: str, executor: Optional[ThreadPoolExecutor] = None):
+        self.upload_dir = upload_dir
+        self._executor = executor
+        self._documents: Dict[str, Tuple[Tuple[int, int], Future]] = {}
+        self._lock = threading.Lock()
+
+    def file_uploaded(self, file_name: str, api_key: Optional[str] = None) -> None:
+        """
+        Starts extracting an uploaded file unless the same content is already being extracted
+        :param api_key: Key to ask the LLM for the fields rules miss with; without one only the rules run now
+        """
+        file_name = os.path.basename(file_name)
+        try:
+            signature = _file_signature(os.path.join(self.upload_dir, file_name))
+        except OSError as e:
+            logger.error(f"Uploaded file {file_name} is not readable: {e}")
+            return
+        with self._lock:
+            current = self._documents.get(file_name)
+            if current is not None and current[0] == signature:
+                return
+            executor = self._executor or _get_executor()
+            future = executor.submit(self._extract, file_name, api_key)
+            self._documents[file_name] = (signature, future)
+        logger.debug(f"Prefetching {file_name}")
+
+    def _extract(self, file_name: str, api_key: Optional[str]) -> DocumentExtraction:
+        llm = get_chat_client(api_key) if api_key else None
+        # Uploads are prefetched side by side while the UI keeps running, so parse them in worker processes
+        return extract_document(file_name, self.upload_dir, llm, use_llm=llm is not None, parse_in_pool=True)
+
+    def retain(self, file_names: List[str]) -> None:
+        """Forgets the files not in `file_names`, e.g. after the user picked a new selection."""
+        keep = {os.path.basename(name) for name in file_names}
+        with self._lock:
+            for file_name in list(self._documents):
+                if file_name not in keep:
+                    self._documents.pop(file_name)[1].cancel()
+
+    def document(self, file_name: str, llm: Optional[PooledChatModel] = None) -> DocumentExtraction:
+        """Returns the complete extraction of one file, waiting for the prefetch or extracting it now if there is none."""
+        file_name = os.path.basename(file_name)
+        signature = _file_signature(os.path.join(self.upload_dir, file_name))
+        with self._lock:
+            current = self._documents.get(file_name)
+        if current is None or current[0] != signature or current[1].cancelled():
+            return extract_document(file_name, self.upload_dir, llm)
+        # Files uploaded before an API key was known were read with rules only, ask the LLM for the rest now
+        return complete_document(current[1].result(), self.upload_dir, llm)
+
+    def documents(self, pdf_paths: List[str], llm: Optional[PooledChatModel] = None) -> List[DocumentExtraction]:
+        """Returns the complete extractions of the given files, in order. A file that cannot be read is skipped."""
+        documents = []
+        for pdf_path in pdf_paths:
+            try:
+                documents.append(self.document(pdf_path, llm))
+            except Exception as e:
+                logger.error(f"Could not load text from {pdf_path}: {e}")
+        return documents
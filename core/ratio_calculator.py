@@ -1,6 +1,7 @@
 # financial_analyzer/core/ratio_calculator.py
-from typing import TypedDict
-from core.data_extractor import FinancialData
+from typing import Dict, Mapping, Optional, Sequence, TypedDict
+import numpy as np
+from core.data_extractor import FinancialData, FINANCIAL_FIELDS
 
 class FinancialRatios(TypedDict):
     current_ratio: float
@@ -14,23 +15,97 @@ class FinancialRatios(TypedDict):
     interest_coverage: float
 
 
+def records_to_columns(records: Sequence[FinancialData]) -> Dict[str, np.ndarray]:
+    """
+    Converts FinancialData records into one float column per field
+    :param records: Sequence of dictionaries containing financial figures
+    :return: Dictionary of field name to NumPy array, NaN marks a missing field
+    """
+    return {
+        field: np.array([np.nan if record.get(field) is None else record[field] for record in records], dtype=float)
+        for field in FINANCIAL_FIELDS
+    }
+
+
+def _column(columns: Mapping[str, np.ndarray], masks: Optional[Mapping[str, np.ndarray]], field: str, default: float, size: int) -> np.ndarray:
+    # Missing values fall back to the same defaults the dict-based `.get` calls used: 0 for numerators, 1 for denominators
+    if field not in columns:
+        return np.full(size, default, dtype=float)
+    values = np.asarray(columns[field], dtype=float)
+    present = np.asarray(masks[field], dtype=bool) if masks is not None and field in masks else ~np.isnan(values)
+    return np.where(present, values, default)
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    # A zero denominator yields 0 instead of inf/nan
+    result = np.zeros(np.broadcast(numerator, denominator).shape, dtype=float)
+    np.divide(numerator, denominator, out=result, where=denominator != 0)
+    return result
+
+
+def calculate_ratios_batch(columns: Mapping[str, np.ndarray], masks: Optional[Mapping[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+    """
+    Calculates financial ratios for many company-periods at once
+    :param columns: Dictionary of financial field name to array of values, one element per record
+    :param masks: Optional dictionary of field name to boolean array, False marks a missing value.
+                  Fields without a mask treat NaN as missing.
+    :return: Dictionary of ratio name to array of calculated ratios, one element per record
+    """
+    size = len(next(iter(columns.values()))) if columns else 0
+
+    def numerator(field):
+        return _column(columns, masks, field, 0.0, size)
+
+    def denominator(field):
+        return _column(columns, masks, field, 1.0, size)
+
+    ratios = {
+        "current_ratio": _safe_divide(numerator("current_assets"), denominator("current_liabilities")),
+        "quick_ratio": _safe_divide(numerator("current_assets") - numerator("inventory"), denominator("current_liabilities")),
+        "net_profit_margin": _safe_divide(numerator("net_income"), denominator("revenue")) * 100,
+        "roa": _safe_divide(numerator("net_income"), denominator("total_assets")) * 100,
+        "roe": _safe_divide(numerator("net_income"), denominator("total_equity")) * 100,
+        "asset_turnover": _safe_divide(numerator("revenue"), denominator("total_assets")),
+        "inventory_turnover": _safe_divide(numerator("cost_of_goods_sold"), denominator("inventory")),
+        "debt_to_equity": _safe_divide(numerator("total_debt"), denominator("total_equity")),
+        "interest_coverage": _safe_divide(numerator("ebit"), denominator("interest_expense")),
+    }
+    return ratios
+
+
+def _value(financial_data: FinancialData, field: str, default: float) -> float:
+    # Same defaults as the batch engine: 0 for numerators, 1 for denominators, also for fields given as None
+    value = financial_data.get(field)
+    return default if value is None else value
+
+
+def _divide(numerator: float, denominator: float) -> float:
+    # A zero denominator yields 0, as in _safe_divide
+    return numerator / denominator if denominator else 0.0
+
+
 def calculate_ratios(financial_data: FinancialData) -> FinancialRatios:
     """
-    Calculates financial ratios from the provided data
+    Calculates financial ratios from the provided data.
+    One record is calculated with plain floats, NumPy only pays off for many records, see calculate_ratios_batch
     :param financial_data: Dictionary containing financial figures with specific structure
     :return: Dictionary containing calculated ratios with specific structure
     """
-    print("DEBUG: Starting calculate_ratios tool")
+    def numerator(field):
+        return _value(financial_data, field, 0.0)
+
+    def denominator(field):
+        return _value(financial_data, field, 1.0)
+
     ratios: FinancialRatios = {
-        "current_ratio": financial_data.get("current_assets", 0) / financial_data.get("current_liabilities",1) if financial_data.get("current_liabilities", 1) else 0,
-        "quick_ratio": (financial_data.get("current_assets", 0) - financial_data.get("inventory", 0)) / financial_data.get("current_liabilities", 1) if financial_data.get("current_liabilities", 1) else 0,
-        "net_profit_margin": (financial_data.get("net_income", 0) / financial_data.get("revenue",1)) * 100 if financial_data.get("revenue", 1) else 0,
-        "roa": (financial_data.get("net_income", 0) / financial_data.get("total_assets",1)) * 100 if financial_data.get("total_assets", 1) else 0,
-        "roe": (financial_data.get("net_income",0) / financial_data.get("total_equity",1)) * 100 if financial_data.get("total_equity",1) else 0,
-        "asset_turnover": financial_data.get("revenue",0) / financial_data.get("total_assets",1) if financial_data.get("total_assets", 1) else 0,
-        "inventory_turnover": financial_data.get("cost_of_goods_sold",0) / financial_data.get("inventory",1) if financial_data.get("inventory", 1) else 0,
-        "debt_to_equity": financial_data.get("total_debt",0) / financial_data.get("total_equity",1) if financial_data.get("total_equity", 1) else 0,
-        "interest_coverage": financial_data.get("ebit",0) / financial_data.get("interest_expense",1) if financial_data.get("interest_expense", 1) else 0,
+        "current_ratio": _divide(numerator("current_assets"), denominator("current_liabilities")),
+        "quick_ratio": _divide(numerator("current_assets") - numerator("inventory"), denominator("current_liabilities")),
+        "net_profit_margin": _divide(numerator("net_income"), denominator("revenue")) * 100,
+        "roa": _divide(numerator("net_income"), denominator("total_assets")) * 100,
+        "roe": _divide(numerator("net_income"), denominator("total_equity")) * 100,
+        "asset_turnover": _divide(numerator("revenue"), denominator("total_assets")),
+        "inventory_turnover": _divide(numerator("cost_of_goods_sold"), denominator("inventory")),
+        "debt_to_equity": _divide(numerator("total_debt"), denominator("total_equity")),
+        "interest_coverage": _divide(numerator("ebit"), denominator("interest_expense")),
     }
-    print("DEBUG: Finished calculate_ratios tool")
-    return ratios
\ No newline at end of file
+    return ratios
@@ -1,78 +1,153 @@
 # financial_analyzer/core/report_generator.py
-from fpdf import FPDF
-from langchain.schema import HumanMessage
-from core.llm import chat_model
+from core.llm import invoke_prompt, PooledChatModel
+from core.llm_scheduler import PRIORITY_EXPLANATION
+from core.report_outputs import REPORT_FILE_STEM, current_output_dir
+from core.report_renderer import DEFAULT_REPORT_FORMAT, build_cards, get_renderer
+from core.telemetry import telemetry
+import contextvars
 import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
 from core.ratio_calculator import FinancialRatios
+from config.app_config import explanation_concurrency
 
+logger = logging.getLogger(__name__)
 
-def generate_pdf_report(ratios: FinancialRatios) -> str:
+# Shown in place of an explanation whose LLM request failed
+EXPLANATION_FALLBACK = "Could not generate an explanation for this ratio."
+
+
+def render_report(ratios: FinancialRatios, llm: Optional[PooledChatModel] = None,
+                  explanations: Optional[Dict[str, str]] = None, report_format: str = DEFAULT_REPORT_FORMAT) -> bytes:
     """
-    Generates PDF report with financial ratios and explanations
+    Renders the report with the back end of `report_format` from the precomputed template of that back end
     :param ratios: Dictionary containing calculated ratios with specific structure
-    :return: Path to generated PDF file
+    :param llm: Chat model client used for the explanations
+    :param explanations: Explanation per ratio name, requested from the LLM if None
+    :param report_format: "pdf", "html" or "json", see core.report_renderer
+    :return: Content of the report file
+    """
+    renderer = get_renderer(report_format)
+    if explanations is None:
+        explanations = get_ratio_explanations(ratios, llm=llm)
+    with telemetry.span("report.render", format=renderer.format, ratios=len(ratios)):
+        return renderer.render(build_cards(ratios, explanations))
+
+
+def generate_report(ratios: FinancialRatios, output_dir: str = None, llm: Optional[PooledChatModel] = None,
+                    explanations: Optional[Dict[str, str]] = None,
+                    report_format: str = DEFAULT_REPORT_FORMAT) -> Optional[str]:
+    """
+    Generates the report with financial ratios and explanations as a file
+    :param ratios: Dictionary containing calculated ratios with specific structure
+    :param output_dir: Directory of this analysis, defaults to the one of the current context or the working directory
+    :param llm: Chat model client used for the explanations
+    :param explanations: Explanation per ratio name, requested from the LLM if None
+    :param report_format: "pdf", "html" or "json"
+    :return: Path to the generated file, e.g. financial_report.html, None if it could not be generated
     """
-    print("DEBUG: Starting generate_pdf_report tool")
     try:
-      pdf = FPDF()
-      pdf.add_page()
-      pdf.set_auto_page_break(auto=True, margin=15)
-
-      # Header
-      pdf.set_font("Arial", "B", 24)
-      pdf.set_text_color(44, 62, 80)
-      pdf.cell(0, 20, "Financial Ratio Analysis Report", ln=True, align="C")
-
-      # Subtitle with emoji (using plain text equivalent)
-      pdf.set_font("Arial", "I", 12)
-      pdf.set_text_color(127, 140, 141)
-      pdf.cell(0, 10, "Your friendly financial insights!", ln=True, align="C")
-      pdf.ln(10)
-
-      # Add ratios and explanations in simple cards
-      for ratio_name, ratio_value in ratios.items():
-          # Card header
-          pdf.set_fill_color(240, 240, 240)
-          pdf.set_draw_color(200, 200, 200)
-          pdf.rect(20, pdf.get_y(), 170, 10, style='FD')
-
-          # Ratio name
-          pdf.set_font("Arial", "B", 14)
-          pdf.set_text_color(44, 62, 80)
-          pdf.set_xy(25, pdf.get_y() + 2)
-          pdf.cell(160, 6, f"{ratio_name.replace('_', ' ').title()}", ln=True)
-
-          # Value section
-          pdf.set_fill_color(249, 249, 249)
-          pdf.rect(20, pdf.get_y(), 170, 15, style='FD')
-          pdf.set_font("Arial", "B", 16)
-          pdf.set_text_color(52, 152, 219)
-          pdf.set_xy(25, pdf.get_y() + 4)
-          pdf.cell(160, 6, f"{ratio_value:.2f}", ln=True)
-
-          # Explanation section
-          pdf.set_fill_color(255, 255, 255)
-          pdf.rect(20, pdf.get_y(), 170, 20, style='FD')
-          pdf.set_font("Arial", "", 10)
-          pdf.set_text_color(100, 100, 100)
-          pdf.set_xy(25, pdf.get_y() + 2)
-          explanation = get_ratio_explanation(ratio_name, ratio_value, ratios)  # Pass ratio_value and ratios
-          pdf.multi_cell(160, 5, explanation)
-
-          pdf.ln(15)
-
-      # Generate PDF in the root directory
-      output_path = "financial_report.pdf" # Root directory report
-      pdf.output(output_path)
-      print(f"DEBUG: PDF Output Path: {output_path}")
-      print("DEBUG: Finished generate_pdf_report tool")
-      return output_path
+        content = render_report(ratios, llm, explanations, report_format)
+
+        # Write the report in the output directory of this analysis
+        file_name = REPORT_FILE_STEM + get_renderer(report_format).extension
+        output_path = os.path.join(output_dir or current_output_dir.get() or ".", file_name)
+        with telemetry.span("report.write", path=output_path):
+            with open(output_path, "wb") as f:
+                f.write(content)
+        logger.debug(f"Report Output Path: {output_path}")
+        return output_path
     except Exception as e:
-      print(f"ERROR: An error occurred inside `generate_pdf_report`  : {e}")
-      return None  # to let us know the PDF part had issue
+        logger.error(f"An error occurred inside `generate_report` ({report_format}): {e}")
+        return None  # to let us know the report part had issue
 
 
-def get_ratio_explanation(ratio_name: str, ratio_value: float, ratios: FinancialRatios) -> str:
+def generate_report_bytes(ratios: FinancialRatios, llm: Optional[PooledChatModel] = None,
+                          explanations: Optional[Dict[str, str]] = None,
+                          report_format: str = DEFAULT_REPORT_FORMAT) -> Optional[bytes]:
+    """
+    Generates the report with financial ratios and explanations in memory, for serving or streaming without a file
+    :param ratios: Dictionary containing calculated ratios with specific structure
+    :param llm: Chat model client used for the explanations
+    :param explanations: Explanation per ratio name, requested from the LLM if None
+    :param report_format: "pdf", "html" or "json"
+    :return: Content of the report file, None if it could not be generated
+    """
+    try:
+        return render_report(ratios, llm, explanations, report_format)
+    except Exception as e:
+        logger.error(f"An error occurred inside `generate_report_bytes` ({report_format}): {e}")
+        return None  # to let us know the report part had issue
+
+
+def generate_pdf_report(ratios: FinancialRatios, output_dir: str = None, llm: Optional[PooledChatModel] = None,
+                        explanations: Optional[Dict[str, str]] = None) -> str:
+    """
+    Generates PDF report with financial ratios and explanations
+    :param ratios: Dictionary containing calculated ratios with specific structure
+    :param output_dir: Directory of this analysis, defaults to the one of the current context or the working directory
+    :param llm: Chat model client used for the explanations
+    :param explanations: Explanation per ratio name, requested from the LLM if None
+    :return: Path to generated PDF file
+    """
+    return generate_report(ratios, output_dir, llm, explanations, "pdf")
+
+
+def generate_pdf_report_bytes(ratios: FinancialRatios, llm: Optional[PooledChatModel] = None,
+                              explanations: Optional[Dict[str, str]] = None) -> bytes:
+    """
+    Generates PDF report with financial ratios and explanations in memory, for serving or streaming without a file
+    :param ratios: Dictionary containing calculated ratios with specific structure
+    :param llm: Chat model client used for the explanations
+    :param explanations: Explanation per ratio name, requested from the LLM if None
+    :return: Content of the PDF file
+    """
+    return generate_report_bytes(ratios, llm, explanations, "pdf")
+
+
+def get_ratio_explanations(ratios: FinancialRatios, max_concurrency: int = explanation_concurrency,
+                           llm: Optional[PooledChatModel] = None,
+                           on_token: Optional[Callable[[str, str], None]] = None,
+                           on_explanation: Optional[Callable[[str, str], None]] = None) -> Dict[str, str]:
+    """
+    Generates explanations for all financial ratios concurrently.
+
+    Args:
+        ratios (FinancialRatios): A dict containing the values of all calculated ratios
+        max_concurrency (int): Maximum number of explanation requests in flight at once
+        llm (PooledChatModel): Chat model client to use, the one of the configured API key by default
+        on_token (Callable[[str, str], None]): Streams the explanations, called with the ratio name and
+            each chunk of its text as it arrives, from the worker threads
+        on_explanation (Callable[[str, str], None]): Called with the ratio name and its final explanation
+            as soon as that one is complete, the fallback text included
+
+    Returns:
+        Dict[str, str]: Explanation per ratio name, in the same order as `ratios`.
+        A ratio whose request fails gets the fallback text of `get_ratio_explanation`.
+    """
+    def explain(ratio_name: str, ratio_value: float) -> str:
+        stream = (lambda text: on_token(ratio_name, text)) if on_token else None
+        explanation = get_ratio_explanation(ratio_name, ratio_value, ratios, llm=llm, on_token=stream)
+        if on_explanation:
+            on_explanation(ratio_name, explanation)
+        return explanation
+
+    workers = max(1, min(max_concurrency, len(ratios)))
+    with telemetry.span("report.explanations", ratios=len(ratios), streamed=on_token is not None), \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ratio-explanation") as executor:
+        # Each request runs in a copy of the current context, so its LLM span nests under this one
+        futures = {
+            ratio_name: executor.submit(contextvars.copy_context().run, explain, ratio_name, ratio_value)
+            for ratio_name, ratio_value in ratios.items()
+        }
+        explanations = {ratio_name: future.result() for ratio_name, future in futures.items()}
+    return explanations
+
+
+def get_ratio_explanation(ratio_name: str, ratio_value: float, ratios: FinancialRatios, use_cache: bool = True,
+                          llm: Optional[PooledChatModel] = None, on_token: Optional[Callable[[str], None]] = None) -> str:
     """
     Generates explanations for financial ratios using the LLM.
 
@@ -80,11 +155,13 @@ def get_ratio_explanation(ratio_name: str, ratio_value: float, ratios: Financial
         ratio_name (str): The name of the financial ratio.
         ratio_value (float): The calculated value of the financial ratio.
         ratios (FinancialRatios): A dict containing the values of all calculated ratios
+        use_cache (bool): Whether an identical earlier prompt may be answered from the LLM response cache
+        llm (PooledChatModel): Chat model client to use, the one of the configured API key by default
+        on_token (Callable[[str], None]): Streams the explanation, called with each chunk of text as it arrives
 
     Returns:
         str: An explanation of the financial ratio, generated by the LLM.
     """
-    print(f"DEBUG: Starting get_ratio_explanation for {ratio_name}")
     prompt = f"""
         You are an expert financial analyst.
 
@@ -100,11 +177,9 @@ def get_ratio_explanation(ratio_name: str, ratio_value: float, ratios: Financial
     """
 
     try:
-        response = chat_model.invoke([HumanMessage(content=prompt)]).content
-        print(f"DEBUG: LLM Explanation Response: {response}")
+        response = invoke_prompt(prompt, use_cache=use_cache, llm=llm, priority=PRIORITY_EXPLANATION, on_token=on_token)
+        logger.debug(f"LLM Explanation Response: {response}")
         return response.strip()
     except Exception as e:
-        print(f"ERROR: Error generating ratio explanation: {e}")
-        return "Could not generate an explanation for this ratio."
-    finally:
-        print(f"DEBUG: Finished get_ratio_explanation for {ratio_name}")
\ No newline at end of file
+        logger.error(f"Error generating explanation of {ratio_name}: {e}")
+        return EXPLANATION_FALLBACK
\ No newline at end of file
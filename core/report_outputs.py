@@ -0,0 +1,65 @@
+# financial_analyzer/core/report_outputs.py
+import contextvars
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Optional
+from config.app_config import reports_dir, report_retention_seconds, report_cleanup_interval_seconds
+
+logger = logging.getLogger(__name__)
+
+REPORT_FILE_STEM = "financial_report"  # followed by the extension of the report format
+
+# Output directory of the analysis running in the current context, used where it cannot be passed
+# explicitly (the report tool called by the ReAct agent)
+current_output_dir: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_output_dir", default=None)
+
+_cleanup_lock = threading.Lock()
+_cleanup_thread: Optional[threading.Thread] = None
+
+
+def create_output_dir() -> str:
+    """Creates a fresh output directory for one analysis, so parallel analyses never overwrite each other's reports."""
+    output_dir = os.path.join(reports_dir, f"{int(time.time())}-{uuid.uuid4().hex}")
+    os.makedirs(output_dir, exist_ok=True)
+    return output_dir
+
+
+def cleanup_old_outputs(max_age_seconds: int = report_retention_seconds) -> int:
+    """
+    Removes analysis output directories older than `max_age_seconds`
+    :return: Number of directories removed
+    """
+    if not os.path.isdir(reports_dir):
+        return 0
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for entry in os.scandir(reports_dir):
+        try:
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path)
+                removed += 1
+        except OSError as e:
+            logger.error(f"Could not remove old report output {entry.path}: {e}")
+    if removed:
+        logger.debug(f"Removed {removed} old report outputs")
+    return removed
+
+
+def schedule_output_cleanup(interval_seconds: int = report_cleanup_interval_seconds) -> None:
+    """Starts a daemon thread that periodically removes old outputs. Calling it again is a no-op."""
+    global _cleanup_thread
+    with _cleanup_lock:
+        if _cleanup_thread is not None:
+            return
+
+        def run():
+            while True:
+                cleanup_old_outputs()
+                time.sleep(interval_seconds)
+
+        _cleanup_thread = threading.Thread(target=run, name="report-output-cleanup", daemon=True)
+        _cleanup_thread.start()
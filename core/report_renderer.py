@@ -0,0 +1,393 @@
+# financial_analyzer/core/report_renderer.py
+import html
+import json
+import logging
+from abc import ABC, abstractmethod
+import threading
+import time
+import zlib
+from string import Template
+from typing import Dict, List, Optional, Tuple, TypedDict
+from core.ratio_calculator import FinancialRatios
+
+logger = logging.getLogger(__name__)
+
+REPORT_TITLE = "Financial Ratio Analysis Report"
+REPORT_SUBTITLE = "Your friendly financial insights!"
+
+DEFAULT_REPORT_FORMAT = "pdf"
+
+
+class RatioCard(TypedDict):
+    name: str  # key of the ratio, e.g. "current_ratio"
+    title: str  # shown as the card header, e.g. "Current Ratio"
+    value: float
+    explanation: str
+
+
+def build_cards(ratios: FinancialRatios, explanations: Dict[str, str]) -> List[RatioCard]:
+    """
+    Turns ratios and their explanations into the cards every report back end renders, in the order of `ratios`
+    :param ratios: Calculated ratios
+    :param explanations: Explanation per ratio name
+    :return: One card per ratio
+    """
+    return [
+        {"name": ratio_name, "title": ratio_name.replace('_', ' ').title(), "value": ratio_value,
+         "explanation": explanations[ratio_name]}
+        for ratio_name, ratio_value in ratios.items()
+    ]
+
+
+class ReportRenderer(ABC):
+    """Back end rendering ratio cards into the content of one report file."""
+
+    format = ""
+    extension = ""
+    media_type = ""
+
+    def prepare(self) -> None:
+        """Builds what the back end precomputes once, ahead of the first report. Called by `render` if needed."""
+
+    @abstractmethod
+    def render(self, cards: List[RatioCard]) -> bytes:
+        """Returns the content of the report file of the cards, in the order given."""
+
+
+# Page geometry of the PDF report, in mm on A4 portrait like FPDF's defaults
+_SCALE = 72 / 25.4  # points per mm
+_PAGE_WIDTH = 595.28 / _SCALE
+_PAGE_HEIGHT = 841.89 / _SCALE
+_MARGIN = 28.35 / _SCALE
+_CELL_MARGIN = _MARGIN / 10
+_PAGE_BREAK_Y = _PAGE_HEIGHT - 15  # text below this moves to the next page
+_CARD_X = 20.0
+_CARD_WIDTH = 170.0
+_TEXT_X = 25.0
+_TEXT_WIDTH = 160.0
+
+# Font faces of the report: resource name, base font, FPDF style
+_FONTS = (("F1", "Helvetica-Bold", "B"), ("F2", "Helvetica-Oblique", "I"), ("F3", "Helvetica", ""))
+_BOLD, _ITALIC, _REGULAR = (font[0] for font in _FONTS)
+
+# Fixed object numbers: catalog, resources and fonts are the same in every report, info, page tree and pages follow
+_CATALOG_OBJ = 1
+_RESOURCES_OBJ = 2
+_FIRST_FONT_OBJ = 3
+_INFO_OBJ = _FIRST_FONT_OBJ + len(_FONTS)
+_PAGES_OBJ = _INFO_OBJ + 1
+_FIRST_PAGE_OBJ = _PAGES_OBJ + 1
+
+# Words whose widths are remembered before the cache starts over
+_MAX_CACHED_WORDS = 50_000
+
+# Square line caps and a 0.2 mm line width at the start of every page
+_PAGE_PREAMBLE = "2 J\n0.57 w\n"
+
+
+def _color(red: int, green: int, blue: int, operator: str) -> str:
+    return f"{red / 255:.3f} {green / 255:.3f} {blue / 255:.3f} {operator}"
+
+
+def _pdf_text(text: str) -> str:
+    """Encodes text for the standard fonts (WinAnsiEncoding) as a latin-1 str, "?" for what they cannot show."""
+    return text.encode("cp1252", "replace").decode("latin-1")
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace(")", "\\)").replace("(", "\\(").replace("\r", "\\r")
+
+
+class _PageLayout:
+    """Content streams of the pages of one PDF report, laid out top to bottom."""
+
+    def __init__(self, header_ops: str, top: float):
+        self.pages: List[List[str]] = [[_PAGE_PREAMBLE, header_ops]]
+        self.y = top
+
+    def box(self, ops: Tuple[str, str]) -> None:
+        self.pages[-1].append(f"{ops[0]}{(_PAGE_HEIGHT - self.y) * _SCALE:.2f}{ops[1]}")
+
+    def line(self, height: float, font_size: float, ops: Tuple[str, str], text: str, word_spacing: float = 0.0) -> None:
+        if self.y + height > _PAGE_BREAK_Y:
+            self.pages.append([_PAGE_PREAMBLE])
+            self.y = _MARGIN
+        baseline = (_PAGE_HEIGHT - (self.y + 0.5 * height + 0.3 * font_size)) * _SCALE
+        spacing = f"{word_spacing * _SCALE:.3f} Tw " if word_spacing else ""
+        self.pages[-1].append(f"{ops[0]}{spacing}{(_TEXT_X + _CELL_MARGIN) * _SCALE:.2f} {baseline:.2f} Td ({_escape(text)}){ops[1]}")
+        self.y += height
+
+
+class PdfRenderer(ReportRenderer):
+    """
+    Renders the PDF report: a header, then one card per ratio with its name, value and justified explanation.
+    This is the only layout of the PDF report; FPDF is used once, for the metrics of its standard fonts.
+
+    The parts every report shares are precomputed once: the catalog, resource and font objects, the header,
+    the drawing operators of the card boxes and text styles, and the character widths the explanations are
+    justified with. A report then only lays out its cards and writes its page streams and cross-reference table.
+    """
+
+    format = "pdf"
+    extension = ".pdf"
+    media_type = "application/pdf"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._widths: Optional[Dict[str, Tuple[int, ...]]] = None
+        self._static_objects = b""
+        self._static_offsets: List[int] = []
+        self._header_ops = ""
+        self._top = 0.0
+        # Explanations repeat much of their vocabulary, so word widths are measured once per word
+        self._word_widths: Dict[str, int] = {}
+
+    def prepare(self) -> None:
+        if self._widths is not None:
+            return
+        with self._lock:
+            if self._widths is None:
+                self._build_template()
+
+    def _build_template(self) -> None:
+        from fpdf import FPDF  # deferred until the first report, only used for the font metrics
+
+        start = time.perf_counter()
+        pdf = FPDF()
+        widths = {}
+        for resource, _, style in _FONTS:
+            pdf.set_font("Arial", style, 10)
+            widths[resource] = tuple(round(pdf.get_string_width(chr(code)) * 1000 / pdf.font_size) for code in range(256))
+
+        # Header, centered across the page width
+        header = []
+        y = _MARGIN
+        for resource, size, height, color, text in ((_BOLD, 24, 20, (44, 62, 80), REPORT_TITLE),
+                                                    (_ITALIC, 12, 10, (127, 140, 141), REPORT_SUBTITLE)):
+            font_size = size / _SCALE
+            text = _pdf_text(text)
+            text_width = sum(widths[resource][ord(c)] for c in text) * font_size / 1000
+            x = _MARGIN + (_PAGE_WIDTH - 2 * _MARGIN - text_width) / 2
+            baseline = (_PAGE_HEIGHT - (y + 0.5 * height + 0.3 * font_size)) * _SCALE
+            header.append(f"q {_color(*color, 'rg')} BT /{resource} {size:.2f} Tf {x * _SCALE:.2f} {baseline:.2f} Td "
+                          f"({_escape(text)}) Tj ET Q\n")
+            y += height
+        self._header_ops = "".join(header)
+        self._top = y + 10
+
+        # Catalog, resources and fonts, with their offsets relative to the end of the PDF header line
+        objects = [
+            (_CATALOG_OBJ, f"<</Type /Catalog\n/Pages {_PAGES_OBJ} 0 R\n/OpenAction [{_FIRST_PAGE_OBJ} 0 R /FitH null]\n"
+                           f"/PageLayout /OneColumn\n>>"),
+            (_RESOURCES_OBJ, "<<\n/ProcSet [/PDF /Text /ImageB /ImageC /ImageI]\n/Font <<\n"
+                             + "".join(f"/{resource} {_FIRST_FONT_OBJ + i} 0 R\n" for i, (resource, _, _) in enumerate(_FONTS))
+                             + ">>\n>>"),
+        ]
+        objects.extend((_FIRST_FONT_OBJ + i, f"<</Type /Font\n/BaseFont /{base_font}\n/Subtype /Type1\n"
+                                             f"/Encoding /WinAnsiEncoding\n>>")
+                       for i, (_, base_font, _) in enumerate(_FONTS))
+        static = bytearray()
+        offsets = []
+        for number, body in objects:
+            offsets.append(len(static))
+            static += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+        self._static_objects = bytes(static)
+        self._static_offsets = offsets
+        self._widths = widths
+        logger.debug(f"Built the PDF report template in {time.perf_counter() - start:.3f}s")
+
+    # Drawing operators of the card boxes and text styles; a box or line of text only adds its position and text
+    _BOX_DRAW = _color(200, 200, 200, "RG")
+    _HEADER_BOX = (f"q {_color(240, 240, 240, 'rg')} {_BOX_DRAW} {_CARD_X * _SCALE:.2f} ",
+                   f" {_CARD_WIDTH * _SCALE:.2f} {-10 * _SCALE:.2f} re B Q")
+    _VALUE_BOX = (f"q {_color(249, 249, 249, 'rg')} {_BOX_DRAW} {_CARD_X * _SCALE:.2f} ",
+                  f" {_CARD_WIDTH * _SCALE:.2f} {-15 * _SCALE:.2f} re B Q")
+    _EXPLANATION_BOX = (f"q {_color(255, 255, 255, 'rg')} {_BOX_DRAW} {_CARD_X * _SCALE:.2f} ",
+                        f" {_CARD_WIDTH * _SCALE:.2f} {-20 * _SCALE:.2f} re B Q")
+    _TITLE_TEXT = (f"q {_color(44, 62, 80, 'rg')} BT /{_BOLD} 14.00 Tf ", " Tj ET Q")
+    _VALUE_TEXT = (f"q {_color(52, 152, 219, 'rg')} BT /{_BOLD} 16.00 Tf ", " Tj ET Q")
+    _EXPLANATION_TEXT = (f"q {_color(100, 100, 100, 'rg')} BT /{_REGULAR} 10.00 Tf ", " Tj ET Q")
+
+    def _wrap(self, text: str, font_size: float) -> List[Tuple[str, float]]:
+        """
+        Breaks text into justified lines the way FPDF's multi_cell does, measuring whole words instead of each character
+        :return: Each line with the extra space per word gap (mm) that fills the text width, 0 for a paragraph's last line
+        """
+        widths = self._widths[_REGULAR]
+        space_width = widths[32]
+        word_widths = self._word_widths
+        if len(word_widths) > _MAX_CACHED_WORDS:
+            word_widths.clear()
+        max_width = (_TEXT_WIDTH - 2 * _CELL_MARGIN) * 1000 / font_size
+        text = text.replace("\r", "")
+        if text.endswith("\n"):
+            text = text[:-1]
+        lines = []
+        for paragraph in text.split("\n"):
+            line: List[str] = []
+            line_width = 0
+            for word in paragraph.split(" "):
+                word_width = word_widths.get(word)
+                if word_width is None:
+                    word_width = word_widths[word] = sum(map(widths.__getitem__, map(ord, word)))
+                if line and line_width + space_width + word_width > max_width:
+                    # Break at the space before the word, the line's other spaces are widened to fill it
+                    gaps = len(line) - 1
+                    lines.append((" ".join(line), (max_width - line_width) / 1000 * font_size / gaps if gaps else 0.0))
+                    line = []
+                if line:
+                    line.append(word)
+                    line_width += space_width + word_width
+                    continue
+                while word_width > max_width:
+                    # A word wider than the line is cut where it overflows, its rest starts the next line
+                    cut, width = 0, 0
+                    while width + widths[ord(word[cut])] <= max_width:
+                        width += widths[ord(word[cut])]
+                        cut += 1
+                    cut = max(cut, 1)
+                    lines.append((word[:cut], 0.0))
+                    word = word[cut:]
+                    word_width = sum(map(widths.__getitem__, map(ord, word)))
+                line, line_width = [word], word_width
+            lines.append((" ".join(line), 0.0))
+        return lines
+
+    def render(self, cards: List[RatioCard]) -> bytes:
+        self.prepare()
+        page = _PageLayout(self._header_ops, self._top)
+        explanation_size = 10 / _SCALE
+        for card in cards:
+            page.box(self._HEADER_BOX)
+            page.y += 2
+            page.line(6, 14 / _SCALE, self._TITLE_TEXT, _pdf_text(card["title"]))
+            page.box(self._VALUE_BOX)
+            page.y += 4
+            page.line(6, 16 / _SCALE, self._VALUE_TEXT, f"{card['value']:.2f}")
+            page.box(self._EXPLANATION_BOX)
+            page.y += 2
+            for text, word_spacing in self._wrap(_pdf_text(card["explanation"]), explanation_size):
+                page.line(5, explanation_size, self._EXPLANATION_TEXT, text, word_spacing)
+            page.y += 15
+        return self._write(page.pages)
+
+    def _write(self, pages: List[List[str]]) -> bytes:
+        document = bytearray(b"%PDF-1.3\n")
+        offsets = [len(document) + offset for offset in self._static_offsets]
+        document += self._static_objects
+
+        def add_object(body: bytes) -> None:
+            offsets.append(len(document))
+            document.extend(b"%d 0 obj\n" % len(offsets))
+            document.extend(body)
+            document.extend(b"\nendobj\n")
+
+        add_object(b"<<\n/CreationDate (D:%s)\n>>" % time.strftime("%Y%m%d%H%M%S").encode("ascii"))
+        page_objects = range(_FIRST_PAGE_OBJ, _FIRST_PAGE_OBJ + 2 * len(pages), 2)
+        add_object(b"<</Type /Pages\n/Kids [%s]\n/Count %d\n/MediaBox [0 0 %.2f %.2f]\n>>" % (
+            b"".join(b"%d 0 R " % number for number in page_objects), len(pages),
+            _PAGE_WIDTH * _SCALE, _PAGE_HEIGHT * _SCALE))
+        for number, content in zip(page_objects, pages):
+            stream = zlib.compress("\n".join(content).encode("latin-1"))
+            add_object(b"<</Type /Page\n/Parent %d 0 R\n/Resources %d 0 R\n/Contents %d 0 R>>"
+                       % (_PAGES_OBJ, _RESOURCES_OBJ, number + 1))
+            add_object(b"<</Filter /FlateDecode /Length %d>>\nstream\n%s\nendstream" % (len(stream), stream))
+
+        xref = len(document)
+        document += b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1)
+        document += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+        document += b"trailer\n<<\n/Size %d\n/Root %d 0 R\n/Info %d 0 R\n>>\nstartxref\n%d\n%%%%EOF\n" % (
+            len(offsets) + 1, _CATALOG_OBJ, _INFO_OBJ, xref)
+        return bytes(document)
+
+
+_HTML_PAGE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<style>
+body { font-family: Arial, Helvetica, sans-serif; max-width: 680px; margin: 2em auto; color: #2c3e50; }
+h1 { text-align: center; margin-bottom: 0.2em; }
+.subtitle { text-align: center; font-style: italic; color: #7f8c8d; margin-bottom: 2em; }
+.card { border: 1px solid #c8c8c8; margin-bottom: 1.5em; }
+.card h2 { font-size: 1.15em; background: #f0f0f0; margin: 0; padding: 0.3em 0.6em; }
+.value { font-size: 1.3em; font-weight: bold; color: #3498db; background: #f9f9f9; padding: 0.4em 0.6em; border-top: 1px solid #c8c8c8; border-bottom: 1px solid #c8c8c8; }
+.explanation { font-size: 0.85em; color: #646464; padding: 0.4em 0.6em; white-space: pre-line; }
+</style>
+</head>
+<body>
+<h1>$title</h1>
+<p class="subtitle">$subtitle</p>
+$cards
+</body>
+</html>
+""")
+
+_HTML_CARD = Template("""<section class="card" id="$name">
+<h2>$title</h2>
+<div class="value">$value</div>
+<p class="explanation">$explanation</p>
+</section>
+""")
+
+
+class HtmlRenderer(ReportRenderer):
+    """Renders a self-contained HTML page, styled like the PDF report; the page around the cards is substituted once."""
+
+    format = "html"
+    extension = ".html"
+    media_type = "text/html; charset=utf-8"
+
+    def __init__(self):
+        page = _HTML_PAGE.safe_substitute(title=html.escape(REPORT_TITLE), subtitle=html.escape(REPORT_SUBTITLE))
+        self._before_cards, self._after_cards = page.split("$cards\n")
+
+    def render(self, cards: List[RatioCard]) -> bytes:
+        body = "".join(
+            _HTML_CARD.substitute(name=html.escape(card["name"]), title=html.escape(card["title"]),
+                                  value=f"{card['value']:.2f}", explanation=html.escape(card["explanation"]))
+            for card in cards
+        )
+        return (self._before_cards + body + self._after_cards).encode("utf-8")
+
+
+class JsonRenderer(ReportRenderer):
+    """Renders the cards as a JSON payload, for callers that display or store the report themselves."""
+
+    format = "json"
+    extension = ".json"
+    media_type = "application/json"
+
+    def render(self, cards: List[RatioCard]) -> bytes:
+        return json.dumps({"title": REPORT_TITLE, "subtitle": REPORT_SUBTITLE, "ratios": cards},
+                          ensure_ascii=False).encode("utf-8")
+
+
+_renderers: Dict[str, ReportRenderer] = {}
+
+
+def register_renderer(renderer: ReportRenderer) -> None:
+    """Makes a back end available under its `format`, replacing any registered under the same name."""
+    _renderers[renderer.format] = renderer
+
+
+def get_renderer(report_format: str = DEFAULT_REPORT_FORMAT) -> ReportRenderer:
+    """
+    Returns the back end of a report format
+    :param report_format: "pdf", "html", "json" or the format of a registered back end
+    :return: Shared renderer instance
+    :raises ValueError: If no back end renders that format
+    """
+    renderer = _renderers.get(report_format.lower())
+    if renderer is None:
+        raise ValueError(f"Unknown report format '{report_format}', expected one of: {', '.join(report_formats())}.")
+    return renderer
+
+
+def report_formats() -> List[str]:
+    return list(_renderers)
+
+
+for _renderer in (PdfRenderer(), HtmlRenderer(), JsonRenderer()):
+    register_renderer(_renderer)
@@ -0,0 +1,182 @@
+# financial_analyzer/core/results_store.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, TypedDict
+from core.ratio_calculator import FinancialRatios
+from config.app_config import results_store_enabled, results_store_path
+
+if TYPE_CHECKING:
+    from core.pipeline import DocumentExtraction
+
+
+class AnalysisRecord(TypedDict):
+    analysis_key: str
+    company: Optional[str]
+    period: Optional[str]
+    document_hashes: List[str]  # content hashes of the source documents, in merge order
+    figures: Dict[str, float]
+    ratios: FinancialRatios
+    explanations: Dict[str, str]
+    created_at: float
+
+
+def make_analysis_key(document_keys: Iterable[str]) -> str:
+    """Builds the key of an analysis from the store keys of its documents, in merge order (the first file wins)."""
+    return hashlib.sha256("\n".join(document_keys).encode("utf-8")).hexdigest()
+
+
+class ResultsStore:
+    """
+    SQLite store of extraction results and finished analyses.
+
+    Documents are kept per content hash with their company and reporting period, analyses per set of
+    documents with their merged figures, ratios and explanations. Both tables are indexed by company and
+    period, so earlier results can be served again, or queried in bulk across many companies, without
+    parsing a PDF or calling the LLM.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use so importing the module never touches the disk
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "document_key TEXT PRIMARY KEY, content_hash TEXT NOT NULL, company TEXT, period TEXT, "
+                "record TEXT NOT NULL, created_at REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS idx_documents_content_hash ON documents (content_hash);"
+                "CREATE INDEX IF NOT EXISTS idx_documents_company_period ON documents (company, period);"
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                "analysis_key TEXT PRIMARY KEY, company TEXT, period TEXT, document_hashes TEXT NOT NULL, "
+                "figures TEXT NOT NULL, ratios TEXT NOT NULL, explanations TEXT NOT NULL, created_at REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS idx_analyses_company_period ON analyses (company, period);"
+                "CREATE INDEX IF NOT EXISTS idx_analyses_period ON analyses (period);"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get_document(self, document_key: str) -> Optional["DocumentExtraction"]:
+        """Returns the stored extraction of a document, or None on a miss."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT record FROM documents WHERE document_key = ?", (document_key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_document(self, document_key: str, document: "DocumentExtraction") -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO documents (document_key, content_hash, company, period, record, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (document_key, document["content_hash"], document["company"], document["period"],
+                 json.dumps(document), time.time()),
+            )
+            conn.commit()
+
+    def get_analysis(self, analysis_key: str) -> Optional[AnalysisRecord]:
+        """Returns a finished analysis of the same documents, or None on a miss."""
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT {_ANALYSIS_COLUMNS} FROM analyses WHERE analysis_key = ?", (analysis_key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return _analysis_record(row)
+
+    def put_analysis(self, record: AnalysisRecord) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                f"INSERT OR REPLACE INTO analyses ({_ANALYSIS_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (record["analysis_key"], record["company"], record["period"], json.dumps(record["document_hashes"]),
+                 json.dumps(record["figures"]), json.dumps(record["ratios"]), json.dumps(record["explanations"]),
+                 record["created_at"]),
+            )
+            conn.commit()
+
+    def query_analyses(self, companies: Optional[Iterable[str]] = None, periods: Optional[Iterable[str]] = None,
+                       latest_only: bool = False) -> List[AnalysisRecord]:
+        """
+        Returns stored analyses in bulk, without parsing a PDF or calling the LLM
+        :param companies: Company names to include, every company if None
+        :param periods: Period end dates (ISO) to include, every period if None
+        :param latest_only: Keep only the newest analysis per company and period
+        :return: Matching analyses ordered by company, period and age, newest first
+        """
+        where, params = _filter_clause(companies, periods)
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT {_ANALYSIS_COLUMNS} FROM analyses{where} ORDER BY company, period DESC, created_at DESC", params
+            ).fetchall()
+        records = [_analysis_record(row) for row in rows]
+        if not latest_only:
+            return records
+        latest: Dict[tuple, AnalysisRecord] = {}
+        for record in records:
+            latest.setdefault((record["company"], record["period"]), record)
+        return list(latest.values())
+
+    def query_documents(self, companies: Optional[Iterable[str]] = None,
+                        periods: Optional[Iterable[str]] = None) -> List["DocumentExtraction"]:
+        """Returns stored per-document extractions in bulk, filtered like query_analyses."""
+        where, params = _filter_clause(companies, periods)
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT record FROM documents{where} ORDER BY company, period DESC, created_at DESC", params
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Returns analysis hit/miss counters and table sizes for reporting."""
+        with self._lock:
+            conn = self._connection()
+            documents = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            analyses = conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "documents": documents, "analyses": analyses}
+
+
+_ANALYSIS_COLUMNS = "analysis_key, company, period, document_hashes, figures, ratios, explanations, created_at"
+
+
+def _filter_clause(companies: Optional[Iterable[str]], periods: Optional[Iterable[str]]):
+    """Builds the WHERE clause and parameters of a bulk query, using the (company, period) indexes."""
+    conditions, params = [], []
+    for column, values in (("company", companies), ("period", periods)):
+        if values is not None:
+            values = list(values)
+            conditions.append(f"{column} IN ({', '.join('?' * len(values))})" if values else "0")
+            params.extend(values)
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+def _analysis_record(row: Any) -> AnalysisRecord:
+    analysis_key, company, period, document_hashes, figures, ratios, explanations, created_at = row
+    return {
+        "analysis_key": analysis_key,
+        "company": company,
+        "period": period,
+        "document_hashes": json.loads(document_hashes),
+        "figures": json.loads(figures),
+        "ratios": json.loads(ratios),
+        "explanations": json.loads(explanations),
+        "created_at": created_at,
+    }
+
+
+results_store = ResultsStore(results_store_path) if results_store_enabled else None
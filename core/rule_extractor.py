@@ -0,0 +1,217 @@
+# financial_analyzer/core/rule_extractor.py
+import re
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from core.data_extractor import FinancialData
+
+# Statement line labels for each figure, lower case. Longer labels are tried first
+FIELD_SYNONYMS: Dict[str, List[str]] = {
+    "current_assets": ["total current assets", "current assets"],
+    "current_liabilities": ["total current liabilities", "current liabilities"],
+    "total_assets": ["total assets"],
+    "total_equity": [
+        "total shareholders' equity", "total stockholders' equity", "total shareholders’ equity",
+        "total stockholders’ equity", "total equity", "shareholders' equity", "stockholders' equity",
+    ],
+    "net_income": ["net income", "net profit", "profit for the year", "profit for the period", "net earnings"],
+    "inventory": ["inventories", "inventory"],
+    "total_debt": ["total debt", "total borrowings"],
+    "ebit": [
+        "earnings before interest and taxes", "earnings before interest and tax", "ebit",
+        "operating income", "operating profit", "income from operations",
+    ],
+    "interest_expense": ["interest expense", "finance costs", "interest expenses"],
+    "revenue": ["total revenues", "total revenue", "net revenues", "net revenue", "revenues", "revenue", "net sales", "turnover"],
+    "cost_of_goods_sold": ["cost of goods sold", "cost of sales", "cost of revenue", "cost of revenues"],
+}
+
+# Multiplier for statements that declare their unit, e.g. "(in millions)"
+_SCALE_PATTERN = re.compile(r"\bin\s+(thousands|millions|billions)\b", re.IGNORECASE)
+_SCALES = {"thousands": 1e3, "millions": 1e6, "billions": 1e9}
+
+_NUMBER_TOKEN = re.compile(r"\(?-?\s?[$€£]?\s?\d[\d,]*(?:\.\d+)?\)?")
+# What may come between a label and its amounts: punctuation, currency symbols and a note marker. Anything else
+# makes it a different line item, e.g. "Total assets less current liabilities"
+_AMOUNT_AFTER_LABEL = re.compile(r"[\s:.*$€£–—-]*(?:notes?\b[\s.:]*)?\(?-?\s?[$€£]?\s?\d", re.IGNORECASE)
+# Expenses printed in parentheses as deductions, stored as the positive amounts the ratios divide by
+_EXPENSE_FIELDS = {"cost_of_goods_sold", "interest_expense"}
+_YEAR_TOKEN = re.compile(r"(19|20)\d\d")
+_LABEL_PATTERNS = {
+    field: [re.compile(r"^\s*" + re.escape(label) + r"\b(?P<rest>.*)$", re.IGNORECASE) for label in
+            sorted(labels, key=len, reverse=True)]
+    for field, labels in FIELD_SYNONYMS.items()
+}
+
+_MONTHS = {name: number for number, name in enumerate(
+    ["january", "february", "march", "april", "may", "june", "july", "august", "september", "october", "november", "december"],
+    start=1)}
+_MONTH = r"(?P<month>" + "|".join(_MONTHS) + r")"
+# Period end phrases of statement headings, e.g. "year ended December 31, 2023" or "as at 31 March 2024"
+_PERIOD_PATTERNS = [
+    re.compile(r"\b(?:ended|ending|as at|as of)\s+" + _MONTH + r"\s+(?P<day>\d{1,2}),?\s+(?P<year>(?:19|20)\d\d)\b", re.IGNORECASE),
+    re.compile(r"\b(?:ended|ending|as at|as of)\s+(?P<day>\d{1,2})\s+" + _MONTH + r",?\s+(?P<year>(?:19|20)\d\d)\b", re.IGNORECASE),
+    re.compile(r"\b(?:ended|ending|as at|as of)\s+(?P<year>(?:19|20)\d\d)-(?P<month>\d\d)-(?P<day>\d\d)\b", re.IGNORECASE),
+]
+
+# Company names as printed on covers and statement headings, e.g. "Acme Holdings plc" or "Example Corp."
+_COMPANY_PATTERN = re.compile(
+    r"\b((?:[A-Z][\w&'.-]*[ \t]+){0,5}?[A-Z][\w&'.-]*,?[ \t]+"
+    r"(?:plc|PLC|Plc|Inc\.?|INC\.?|Incorporated|INCORPORATED|Ltd\.?|LTD\.?|Limited|LIMITED|Corporation|CORPORATION|"
+    r"Corp\.?|CORP\.?|LLC|AG|SE|S\.A\.|N\.V\.))(?![\w.])"
+)
+
+
+def parse_number(token: str) -> Optional[float]:
+    """
+    Parses a number as printed in financial statements
+    Handles thousands separators, currency symbols and parentheses negatives, e.g. "(1,234.5)" -> -1234.5
+    :param token: Number as it appears in the text
+    :return: Parsed value, None if the token is not a number
+    """
+    token = token.strip()
+    negative = token.startswith("(") and token.endswith(")")
+    cleaned = re.sub(r"[()$€£,\s]", "", token)
+    if cleaned.startswith("-"):
+        negative = True
+        cleaned = cleaned[1:]
+    try:
+        value = float(cleaned)
+    except ValueError:
+        return None
+    return -value if negative else value
+
+
+def detect_scale(text: str) -> float:
+    """Returns the unit multiplier a page declares, e.g. 1e6 for "in millions", 1 if none."""
+    match = _SCALE_PATTERN.search(text)
+    return _SCALES[match.group(1).lower()] if match else 1.0
+
+
+def _amount_tokens(rest: str) -> List[str]:
+    # Column years ("2023") printed before the amounts are not amounts
+    return [token for token in _NUMBER_TOKEN.findall(rest) if not _YEAR_TOKEN.fullmatch(token.strip())]
+
+
+def _period_columns(page: str, rows: List[str]) -> int:
+    """
+    Counts the period columns of a statement page, from its column heading (e.g. "2023 2022") if it has one,
+    else as the most common number of amounts on its statement lines
+    :param page: Text of the page
+    :param rows: Rest of each statement line of the page after its label
+    :return: Number of period columns, at least 1
+    """
+    for line in page.splitlines():
+        tokens = _NUMBER_TOKEN.findall(line)
+        if len(tokens) >= 2 and all(_YEAR_TOKEN.fullmatch(token.strip()) for token in tokens):
+            return len(tokens)
+    counts = Counter(len(tokens) for tokens in map(_amount_tokens, rows) if tokens)
+    return counts.most_common(1)[0][0] if counts else 1
+
+
+def _first_amount(rest: str, columns: int) -> Optional[float]:
+    tokens = _amount_tokens(rest)
+    # A short integer before the amounts is a note reference ("Note 7") only if the line has a column more
+    # than the page has periods, otherwise it is the current period amount, e.g. "Revenue 45 38" in millions
+    if len(tokens) > columns:
+        digits = re.sub(r"\D", "", tokens[0])
+        if len(digits) <= 2 and "," not in tokens[0] and "." not in tokens[0]:
+            tokens = tokens[1:]
+    return parse_number(tokens[0]) if tokens else None
+
+
+def extract_financial_data_with_rules(pages: Iterable[str]) -> Tuple[FinancialData, Dict[str, str]]:
+    """
+    Extracts financial figures from standard statement lines without calling the LLM
+    A figure is taken from the first line that starts with one of its labels directly followed by a number,
+    scaled by the unit the page declares. The first amount is used, which is the current period in
+    the usual current/prior column layout. A note reference before it is skipped when the line has
+    more amounts than the page has period columns. Expenses shown as deductions, e.g. "Cost of sales (700)",
+    are kept positive.
+    :param pages: Text of every page to search
+    :return: Tuple of the extracted figures and, per extracted field, the line it was read from
+    """
+    financial_data = {}
+    provenance = {}
+    for page in pages:
+        scale = detect_scale(page)
+        rows = []
+        for line in page.splitlines():
+            for field, patterns in _LABEL_PATTERNS.items():
+                if field in financial_data:
+                    continue
+                for pattern in patterns:
+                    match = pattern.match(line)
+                    if match:
+                        if _AMOUNT_AFTER_LABEL.match(match.group("rest")):
+                            rows.append((field, line, match.group("rest")))
+                        break
+        columns = _period_columns(page, [rest for _, _, rest in rows])
+        for field, line, rest in rows:
+            if field in financial_data:
+                continue
+            value = _first_amount(rest, columns)
+            if value is not None:
+                financial_data[field] = (abs(value) if field in _EXPENSE_FIELDS else value) * scale
+                provenance[field] = line.strip()
+    return financial_data, provenance
+
+
+def detect_period(pages: Iterable[str]) -> Optional[str]:
+    """
+    Finds the reporting period of a document from its statement headings
+    :param pages: Text of the pages to search
+    :return: ISO date of the latest period end mentioned, e.g. "2023-12-31", None if no heading states one
+    """
+    latest = None
+    for page in pages:
+        for pattern in _PERIOD_PATTERNS:
+            for match in pattern.finditer(page):
+                month = match.group("month")
+                try:
+                    period_end = date(int(match.group("year")), _MONTHS.get(month.lower()) or int(month), int(match.group("day")))
+                except ValueError:
+                    continue
+                latest = max(latest, period_end) if latest else period_end
+    return latest.isoformat() if latest else None
+
+
+def detect_company(pages: Iterable[str]) -> Optional[str]:
+    """
+    Finds the reporting company's name, the first name with a legal form suffix such as "plc" or "Inc."
+    :param pages: Text of the pages to search, the cover first
+    :return: Company name with whitespace normalised, None if no page names one
+    """
+    for page in pages:
+        match = _COMPANY_PATTERN.search(page)
+        if match:
+            return " ".join(match.group(1).replace(",", " ").split())
+    return None
+
+
+def field_context(text: str, fields: Iterable[str], max_lines: int = 3) -> Dict[str, List[str]]:
+    """
+    Finds the lines of a text that state an amount for a figure, so the LLM can be asked about that figure
+    without sending the whole text again. Each line is tagged with the unit last declared before it,
+    e.g. "Revenue 150,000 [in thousands]"
+    :param text: Text to search
+    :param fields: Fields to find lines for
+    :param max_lines: Maximum number of lines kept per field
+    :return: Lines per field, only for fields the text mentions
+    """
+    patterns = {
+        field: re.compile(r"\b(?:" + "|".join(re.escape(label) for label in FIELD_SYNONYMS[field]) + r")\b", re.IGNORECASE)
+        for field in fields
+    }
+    context: Dict[str, List[str]] = {}
+    unit = None
+    for line in text.splitlines():
+        scale = _SCALE_PATTERN.search(line)
+        if scale:
+            unit = scale.group(0)
+        if not _NUMBER_TOKEN.search(line):
+            continue
+        for field, pattern in patterns.items():
+            if len(context.get(field, [])) < max_lines and pattern.search(line):
+                context.setdefault(field, []).append(f"{line.strip()} [{unit}]" if unit else line.strip())
+    return context
@@ -0,0 +1,32 @@
+# financial_analyzer/core/scheduled_chat_model.py
+from typing import Any, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from core.llm_scheduler import PRIORITY_DEFAULT
+
+
+class ScheduledChatModel(BaseChatModel):
+    """
+    LangChain chat model that sends every request through a PooledChatModel, so code that needs a LangChain
+    model, such as the ReAct agent, goes through the client's LLMScheduler rate limits, retries and telemetry
+    like every other LLM call. Tools are formatted by the underlying model and passed through with each request.
+    """
+
+    client: Any  # the PooledChatModel, not typed to keep pydantic from validating it
+    priority: int = PRIORITY_DEFAULT
+
+    @property
+    def _llm_type(self) -> str:
+        return "scheduled-chat-model"
+
+    def bind_tools(self, tools: List[Any], **kwargs: Any):
+        bound = self.client.model.bind_tools(tools, **kwargs)
+        return self.bind(**getattr(bound, "kwargs", {}))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None,
+                  **kwargs: Any) -> ChatResult:
+        if stop is not None:
+            kwargs["stop"] = stop
+        message = self.client.invoke(messages, priority=self.priority, **kwargs)
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -0,0 +1,207 @@
+# financial_analyzer/core/telemetry.py
+import contextvars
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+from config.app_config import telemetry_enabled, telemetry_jsonl_path, telemetry_max_spans
+
+logger = logging.getLogger(__name__)
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed pipeline stage. Nested spans share the trace ID of the outermost one."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "status", "start", "duration", "_telemetry", "_token", "_t0")
+
+    def __init__(self, telemetry: "Telemetry", name: str, attributes: Dict[str, Any]):
+        parent = _current_span.get()
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.status = "ok"
+        self.start = 0.0
+        self.duration = 0.0
+        self._telemetry = telemetry
+        self._token = None
+        self._t0 = 0.0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration = time.perf_counter() - self._t0
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.status = "error"
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        self._telemetry._finish_span(self)
+        return False
+
+    def to_record(self) -> Dict[str, Any]:
+        return {
+            "type": "span",
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_seconds": self.duration,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned while telemetry is disabled, so instrumented code costs one attribute lookup and a call."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+_MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _metric_key(name: str, labels: Dict[str, Any]) -> _MetricKey:
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Telemetry:
+    """
+    Collects spans, counters and summaries for the analysis pipeline.
+    Finished spans are kept in a bounded in-memory buffer and optionally appended to a JSON lines file;
+    metrics can be read as a Prometheus text-format snapshot. Every span also feeds the
+    `stage_duration_seconds` summary, labelled by span name.
+    """
+
+    def __init__(self, enabled: bool, jsonl_path: Optional[str] = None, max_spans: int = 10000):
+        self.enabled = enabled
+        self.jsonl_path = jsonl_path
+        self._spans = deque(maxlen=max_spans)
+        self._counters: Dict[_MetricKey, float] = {}
+        self._summaries: Dict[_MetricKey, List[float]] = {}  # [count, sum, max]
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attributes: Any):
+        """Context manager timing a stage, nested under the span active in the current context."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def increment(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Adds `value` to a counter."""
+        if not self.enabled:
+            return
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Records one observation of a summary (count, sum and max)."""
+        if not self.enabled:
+            return
+        key = _metric_key(name, labels)
+        with self._lock:
+            summary = self._summaries.setdefault(key, [0, 0.0, value])
+            summary[0] += 1
+            summary[1] += value
+            summary[2] = max(summary[2], value)
+
+    def _finish_span(self, span: Span) -> None:
+        record = span.to_record()
+        self.observe("stage_duration_seconds", span.duration, stage=span.name, status=span.status)
+        with self._lock:
+            self._spans.append(record)
+            if self.jsonl_path:
+                try:
+                    with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record, default=str) + "\n")
+                except OSError as e:
+                    logger.error(f"Could not write span to {self.jsonl_path}: {e}")
+
+    def spans(self) -> List[Dict[str, Any]]:
+        """Returns the buffered span records, oldest first."""
+        with self._lock:
+            return list(self._spans)
+
+    def export_jsonl(self, path: str) -> int:
+        """
+        Writes the buffered spans and a metrics record to a JSON lines file
+        :return: Number of lines written
+        """
+        with self._lock:
+            records = list(self._spans)
+            metrics = {
+                "type": "metrics",
+                "time": time.time(),
+                "counters": [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in self._counters.items()],
+                "summaries": [{"name": name, "labels": dict(labels), "count": count, "sum": total, "max": maximum}
+                              for (name, labels), (count, total, maximum) in self._summaries.items()],
+            }
+        with open(path, "w", encoding="utf-8") as f:
+            for record in records + [metrics]:
+                f.write(json.dumps(record, default=str) + "\n")
+        return len(records) + 1
+
+    def prometheus_snapshot(self) -> str:
+        """Returns counters and summaries in the Prometheus text exposition format."""
+
+        def series(name: str, labels, suffix: str = "") -> str:
+            label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+            return f"{name}{suffix}{{{label_text}}}" if label_text else f"{name}{suffix}"
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            summaries = sorted(self._summaries.items())
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{series(name, labels)} {value}")
+        for (name, labels), (count, total, maximum) in summaries:
+            if name not in typed:
+                lines.append(f"# TYPE {name} summary")
+                typed.add(name)
+            lines.append(f"{series(name, labels, '_count')} {count}")
+            lines.append(f"{series(name, labels, '_sum')} {total}")
+        # Maxima are not part of the summary type, so they are exposed as separate gauges
+        for (name, labels), (count, total, maximum) in summaries:
+            if f"{name}_max" not in typed:
+                lines.append(f"# TYPE {name}_max gauge")
+                typed.add(f"{name}_max")
+            lines.append(f"{series(name, labels, '_max')} {maximum}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+            self._summaries.clear()
+
+
+telemetry = Telemetry(telemetry_enabled, telemetry_jsonl_path, telemetry_max_spans)
@@ -0,0 +1,8 @@
+# financial_analyzer/core/tokens.py
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text for reporting, using the common ~4 characters per token heuristic."""
+    if not text:
+        return 0
+    return max(1, len(text) // 4)
@@ -1,54 +1,65 @@
 # ./core/tools.py
-from langchain.tools import tool
-from typing import List
+from typing import List, Optional
 from core.data_extractor import FinancialData
-from core.pdf_processor import load_and_extract_text_from_pdfs
-from core.data_extractor import extract_financial_data_from_text
+from core.llm import PooledChatModel
+from core.pipeline import load_financial_data
 from core.ratio_calculator import calculate_ratios,FinancialRatios
 from core.report_generator import generate_pdf_report
+from core.telemetry import telemetry
 
 
-@tool("get_financial_data")
-def get_financial_data(pdf_paths: List[str], upload_dir: str) -> FinancialData:
+def build_tools(llm: Optional[PooledChatModel] = None) -> list:
     """
-    Extracts financial data from the provided PDF paths using the LLM
-    :param pdf_paths: List of paths to the financial report pdf files
-    :return: Dictionary containing financial data with specific structure
+    Builds the agent tools bound to one chat model client
+    :param llm: Chat model client the tools call the LLM with, the one of the configured API key by default
+    :return: List of the get_financial_data, calculate_ratios and generate_pdf_report tools
     """
-    print("DEBUG: Starting get_financial_data tool")
-    extracted_text = load_and_extract_text_from_pdfs(pdf_paths, upload_dir)
-    if not extracted_text:
-        print("DEBUG: No text extracted, cannot proceed")
-        raise ValueError("No text extracted from PDFs.")
-    financial_data = extract_financial_data_from_text(extracted_text)
-    if financial_data is None:
-        print("DEBUG: Financial data extraction failed")
-        raise ValueError("Could not extract financial data from the given text.")
-    print("DEBUG: Finished get_financial_data tool")
-    return financial_data
-
-
-@tool("calculate_ratios")
-def calculate_ratios_tool(financial_data: FinancialData) -> FinancialRatios:
-    """
-    Calculates financial ratios from the provided data
-    :param financial_data: Dictionary containing financial figures with specific structure
-    :return: Dictionary containing calculated ratios with specific structure
-    """
-    print("DEBUG: Starting calculate_ratios tool")
-    ratios = calculate_ratios(financial_data)
-    print("DEBUG: Finished calculate_ratios tool")
-    return ratios
+    from langchain.tools import tool  # deferred, only the agent path needs langchain tools
 
+    @tool("get_financial_data")
+    def get_financial_data(pdf_paths: List[str], upload_dir: str) -> FinancialData:
+        """
+        Extracts financial data from the provided PDF paths using the LLM
+        :param pdf_paths: List of paths to the financial report pdf files
+        :return: Dictionary containing financial data with specific structure
+        """
+        with telemetry.span("tool.get_financial_data"):
+            return load_financial_data(pdf_paths, upload_dir, llm)
 
-@tool("generate_pdf_report")
-def generate_pdf_report_tool(ratios: FinancialRatios) -> str:
-    """
-    Generates PDF report with financial ratios and explanations
-    :param ratios: Dictionary containing calculated ratios with specific structure
-    :return: Path to generated PDF file
-    """
-    print("DEBUG: Starting generate_pdf_report tool")
-    report_path = generate_pdf_report(ratios)
-    print("DEBUG: Finished generate_pdf_report tool")
-    return report_path
\ No newline at end of file
+
+    @tool("calculate_ratios")
+    def calculate_ratios_tool(financial_data: FinancialData) -> FinancialRatios:
+        """
+        Calculates financial ratios from the provided data
+        :param financial_data: Dictionary containing financial figures with specific structure
+        :return: Dictionary containing calculated ratios with specific structure
+        """
+        with telemetry.span("tool.calculate_ratios"):
+            return calculate_ratios(financial_data)
+
+
+    @tool("generate_pdf_report")
+    def generate_pdf_report_tool(ratios: FinancialRatios) -> str:
+        """
+        Generates PDF report with financial ratios and explanations
+        :param ratios: Dictionary containing calculated ratios with specific structure
+        :return: Path to generated PDF file
+        """
+        with telemetry.span("tool.generate_pdf_report"):
+            return generate_pdf_report(ratios, llm=llm)
+
+    return [get_financial_data, calculate_ratios_tool, generate_pdf_report_tool]
+
+
+_DEFAULT_TOOL_NAMES = ("get_financial_data", "calculate_ratios_tool", "generate_pdf_report_tool")
+_default_tools = None
+
+
+def __getattr__(name: str):
+    """Tools bound to the client of the configured API key, built on first access instead of at import."""
+    global _default_tools
+    if name not in _DEFAULT_TOOL_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if _default_tools is None:
+        _default_tools = dict(zip(_DEFAULT_TOOL_NAMES, build_tools()))
+    return _default_tools[name]
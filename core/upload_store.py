@@ -0,0 +1,205 @@
+# financial_analyzer/core/upload_store.py
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+from core.pdf_cache import forget_content_hash, register_content_hash
+from core.telemetry import telemetry
+from config.app_config import (upload_staging_max_age_seconds, upload_store_dir, upload_store_max_bytes,
+                               upload_store_max_age_seconds)
+
+logger = logging.getLogger(__name__)
+
+BLOB_EXTENSION = ".pdf"
+
+
+class UploadStore:
+    """
+    Content-addressed store of uploaded files.
+
+    Every distinct file is kept once in `blob_dir`, named after the SHA-256 of its content, and sessions
+    refer to their files by the name they uploaded them under. Two users uploading "annual_report.pdf"
+    therefore never collide, identical uploads share one copy, and the stages caching by content (PDF
+    text, extraction results) get the hash of a stored file without reading it again.
+    A reference expires once its session has not used it for `max_age_seconds`. Files no session refers
+    to are removed once that old, and least recently used first while the store is over `max_bytes`.
+    Files a running job reads are pinned and kept until it finishes, even if their session released them.
+    """
+
+    def __init__(self, root_dir: str, max_bytes: int, max_age_seconds: int):
+        self.blob_dir = os.path.join(root_dir, "blobs")
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.stored = 0
+        self.deduplicated = 0
+        self.evicted = 0
+        # session ID -> uploaded file name -> (content hash, last used)
+        self._references: Dict[str, Dict[str, Tuple[str, float]]] = {}
+        # content hash -> number of running jobs reading the file
+        self._pins: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def blob_path(self, content_hash: str) -> str:
+        return os.path.join(self.blob_dir, content_hash + BLOB_EXTENSION)
+
+    def ingest(self, session_id: str, file_name: str, staged_path: str, block_size: int = 1024 * 1024) -> str:
+        """
+        Moves a file another component already wrote, e.g. the UI's upload handler, into the store.
+        It is hashed in one streamed read and renamed into place, or removed if the store has its content already
+        :param session_id: Session the upload belongs to
+        :param file_name: Name the session uploaded the file under
+        :param staged_path: Where the upload was written, the file is gone from there afterwards
+        :return: SHA-256 of the content
+        """
+        digest = hashlib.sha256()
+        with open(staged_path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+        os.makedirs(self.blob_dir, exist_ok=True)
+        try:
+            return self._commit(session_id, file_name, digest.hexdigest(), staged_path)
+        finally:
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
+
+    def discard_staged(self, staged_path: str) -> None:
+        """Removes an upload that is no longer wanted without storing it."""
+        try:
+            os.remove(staged_path)
+        except FileNotFoundError:
+            pass
+
+    def sweep_staged(self, staging_dir: str, max_age_seconds: int = upload_staging_max_age_seconds) -> int:
+        """
+        Removes the files uploads left in the staging directory without being ingested, e.g. because the upload
+        never finished, once they were not written to for `max_age_seconds`
+        :param staging_dir: Directory the UI's upload handler writes to
+        :return: Number of files removed
+        """
+        if not os.path.isdir(staging_dir):
+            return 0
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for entry in os.scandir(staging_dir):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError as e:
+                logger.error(f"Could not remove stale staged upload {entry.path}: {e}")
+        if removed:
+            logger.debug(f"Removed {removed} stale staged uploads")
+            telemetry.increment("upload_store_stale_staged_total", removed)
+        return removed
+
+    def _commit(self, session_id: str, file_name: str, content_hash: str, source_path: str) -> str:
+        path = self.blob_path(content_hash)
+        with self._lock:
+            duplicate = os.path.exists(path)
+            if duplicate:
+                os.utime(path)  # mark as recently used for eviction
+                self.deduplicated += 1
+            else:
+                shutil.move(source_path, path)
+                self.stored += 1
+            register_content_hash(path, content_hash)
+            self._references.setdefault(session_id, {})[file_name] = (content_hash, time.time())
+        logger.debug(f"Stored upload {file_name} as {content_hash}{' (duplicate)' if duplicate else ''}")
+        telemetry.increment("upload_store_files_total", result="deduplicated" if duplicate else "stored")
+        self.evict()
+        return content_hash
+
+    def path(self, session_id: str, file_name: str) -> Optional[str]:
+        """Returns the stored file a session uploaded under `file_name`, None if it has no such upload (any more)."""
+        content_hash = self.content_hash(session_id, file_name)
+        if content_hash is None:
+            return None
+        path = self.blob_path(content_hash)
+        return path if os.path.exists(path) else None
+
+    def content_hash(self, session_id: str, file_name: str) -> Optional[str]:
+        """Returns the SHA-256 of a session's upload and marks it as used, None if the session has no such upload."""
+        with self._lock:
+            files = self._references.get(session_id, {})
+            reference = files.get(file_name)
+            if reference is None:
+                return None
+            files[file_name] = (reference[0], time.time())
+            return reference[0]
+
+    def release(self, session_id: str) -> None:
+        """Drops every reference of a session, e.g. when it ends or replaces its selection of files."""
+        with self._lock:
+            self._references.pop(session_id, None)
+
+    def pin(self, content_hashes: Iterable[str]) -> None:
+        """Keeps files from eviction while a job reads them, until `unpin` is called with the same hashes."""
+        with self._lock:
+            self._pins.update(content_hashes)
+
+    def unpin(self, content_hashes: Iterable[str]) -> None:
+        """Undoes `pin` once the job reading the files finished, they are then evicted like any other file."""
+        with self._lock:
+            self._pins.subtract(content_hashes)
+            self._pins += Counter()  # drops the hashes no job pins any more
+
+    def evict(self) -> int:
+        """
+        Expires references unused for `max_age_seconds`, then removes files no session refers to nor job pins that are older
+        than that or, least recently used first, as long as the store is over `max_bytes`
+        :return: Number of files removed
+        """
+        now = time.time()
+        removed = 0
+        with self._lock:
+            for session_id, files in list(self._references.items()):
+                for file_name, (_, last_used) in list(files.items()):
+                    if now - last_used > self.max_age_seconds:
+                        del files[file_name]
+                if not files:
+                    del self._references[session_id]
+            referenced = {content_hash for files in self._references.values() for content_hash, _ in files.values()}
+            referenced.update(self._pins)
+
+            entries = []
+            if os.path.isdir(self.blob_dir):
+                for entry in os.scandir(self.blob_dir):
+                    if entry.is_file():
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path, entry.name))
+            total_size = sum(size for _, size, _, _ in entries)
+            for modified_at, size, path, name in sorted(entries):
+                content_hash = name[:-len(BLOB_EXTENSION)] if name.endswith(BLOB_EXTENSION) else None
+                if content_hash in referenced:
+                    continue
+                if now - modified_at <= self.max_age_seconds and (total_size <= self.max_bytes or content_hash is None):
+                    continue
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.error(f"Could not remove stored upload {path}: {e}")
+                    continue
+                forget_content_hash(path)
+                total_size -= size
+                removed += 1
+            self.evicted += removed
+        if removed:
+            logger.debug(f"Removed {removed} stored uploads")
+            telemetry.increment("upload_store_evictions_total", removed)
+        if total_size > self.max_bytes:
+            logger.warning(f"Upload store holds {total_size} bytes of files in use, over its quota of {self.max_bytes}")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            sessions = len(self._references)
+            files = len({content_hash for refs in self._references.values() for content_hash, _ in refs.values()})
+            return {"sessions": sessions, "referenced_files": files, "pinned_files": len(self._pins), "stored": self.stored,
+                    "deduplicated": self.deduplicated, "evicted": self.evicted}
+
+
+upload_store = UploadStore(upload_store_dir, upload_store_max_bytes, upload_store_max_age_seconds)
@@ -1,12 +1,21 @@
 # financial_analyzer/main.py
 import flet as ft
+import logging
 import os
+import threading
 from ui import main as ui_main
-from config.app_config import flet_secret_key
+from core.agent import warm_up
+from config.app_config import flet_secret_key, log_level, warm_up_on_start
 
 
 if __name__ == "__main__":
     # Set FLET_SECRET_KEY as environment variable
     os.environ["FLET_SECRET_KEY"] = flet_secret_key
 
+    logging.basicConfig(level=log_level, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if warm_up_on_start:
+        # Pay for imports and client construction while the server starts instead of in the first analysis
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
     ft.app(target=ui_main.main, view=ft.AppView.WEB_BROWSER, assets_dir="assets",upload_dir="upload_dir")
@@ -0,0 +1,198 @@
+# financial_analyzer/service/batch_service.py
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from core.batch import RESULT_FAILED, BatchResult, BatchRunner, collect_items
+from core.report_renderer import get_renderer
+from config.app_config import (batch_concurrency, batch_output_dir, batch_report_format, batch_service_host,
+                               batch_service_port)
+
+logger = logging.getLogger(__name__)
+
+# Finished batches kept for lookup by ID before the oldest are forgotten
+MAX_FINISHED_BATCHES = 100
+# Largest request body accepted, a batch request only carries paths
+MAX_BODY_BYTES = 1024 * 1024
+
+_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class _Batch:
+    def __init__(self, batch_id: str, total: int, output_dir: str):
+        self.id = batch_id
+        self.total = total
+        self.output_dir = output_dir
+        self.results: List[BatchResult] = []
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def summary(self, with_results: bool = False) -> Dict[str, Any]:
+        summary = {
+            "id": self.id,
+            "state": "done" if self.finished_at is not None else "running",
+            "total": self.total,
+            "done": len(self.results),
+            "failed": sum(result["status"] == RESULT_FAILED for result in self.results),
+            "output_dir": self.output_dir,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+        if with_results:
+            summary["results"] = self.results
+        return summary
+
+
+class BatchService:
+    """
+    Local HTTP service running batches of analyses without the UI, on one asyncio event loop.
+
+    POST /batches with {"sources": [directories, PDFs or manifests], "output_dir": optional, under the
+    service's output directory, "recursive": optional, "render_reports": optional, "report_format": optional
+    "pdf", "html" or "json"} queues a batch and answers with its ID right away; GET /batches/<id>
+    reports its progress and the results finished so far, GET /batches lists every batch and
+    GET /health answers once the service is up. An API key can be sent in the X-Api-Key header.
+    """
+
+    def __init__(self, max_concurrency: int = batch_concurrency, output_dir: str = batch_output_dir):
+        self.output_dir = output_dir
+        self.runner = BatchRunner(max_concurrency)
+        self._batches: "OrderedDict[str, _Batch]" = OrderedDict()
+        self._tasks = set()
+        self._sequence = itertools.count(1)
+
+    async def serve(self, host: str = batch_service_host, port: int = batch_service_port) -> None:
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        logger.info(f"Batch service listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.runner.shutdown()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            status, payload = await self._handle_request(reader)
+        except Exception as e:
+            logger.exception(f"Batch service request failed: {e}")
+            status, payload = 500, {"error": str(e)}
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _handle_request(self, reader: asyncio.StreamReader) -> Tuple[int, Dict[str, Any]]:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) != 3:
+            return 400, {"error": "Malformed request line."}
+        method, target, _ = request_line
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            return 400, {"error": "Invalid Content-Length header."}
+        if length > MAX_BODY_BYTES:
+            return 413, {"error": "Request body too large."}
+        body = await reader.readexactly(length) if length else b""
+        return self._route(method, urlsplit(target).path.rstrip("/"), body, headers)
+
+    def _route(self, method: str, path: str, body: bytes, headers: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        if path == "/health":
+            return 200, {"status": "ok", "batches": len(self._batches)}
+        if path == "/batches":
+            if method == "POST":
+                return self._submit(body, headers.get("x-api-key"))
+            if method == "GET":
+                return 200, {"batches": [batch.summary() for batch in self._batches.values()]}
+            return 405, {"error": f"{method} is not supported on {path}."}
+        if path.startswith("/batches/"):
+            if method != "GET":
+                return 405, {"error": f"{method} is not supported on {path}."}
+            batch = self._batches.get(path[len("/batches/"):])
+            if batch is None:
+                return 404, {"error": "Unknown batch."}
+            return 200, batch.summary(with_results=True)
+        return 404, {"error": f"No route for {path}."}
+
+    def _submit(self, body: bytes, api_key: Optional[str]) -> Tuple[int, Dict[str, Any]]:
+        batch_id = f"{next(self._sequence)}-{uuid.uuid4().hex[:8]}"
+        try:
+            request = json.loads(body or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("the body must be a JSON object.")
+            sources = request.get("sources")
+            if not isinstance(sources, list) or not sources or not all(isinstance(source, str) for source in sources):
+                raise ValueError("'sources' must be a non-empty list of paths.")
+            report_format = _option(request, "report_format", str, batch_report_format)
+            recursive = _option(request, "recursive", bool, False)
+            render_reports = _option(request, "render_reports", bool, True)
+            output_dir = self._batch_output_dir(_option(request, "output_dir", str, "") or batch_id)
+            report_format = get_renderer(report_format).format
+            items = collect_items(sources, recursive=recursive)
+        except (ValueError, OSError) as e:
+            return 400, {"error": f"Invalid batch request: {e}"}
+        if not items:
+            return 400, {"error": "No PDF files found in the given sources."}
+
+        batch = _Batch(batch_id, len(items), output_dir)
+        self._batches[batch_id] = batch
+        self._forget_finished_batches()
+        task = asyncio.create_task(self._run(batch, items, api_key, render_reports, report_format))
+        self._tasks.add(task)  # keeps the task referenced until it is done
+        task.add_done_callback(self._tasks.discard)
+        logger.info(f"Queued batch {batch_id} of {len(items)} analyses")
+        return 202, batch.summary()
+
+    def _batch_output_dir(self, output_dir: str) -> str:
+        """
+        Resolves the output directory a request asks for, which must lie under the service's output directory
+        :param output_dir: Requested directory, relative to the service's output directory or absolute
+        :return: Absolute path of the directory
+        """
+        root = os.path.realpath(self.output_dir)
+        path = os.path.realpath(os.path.join(root, output_dir))
+        if path == root or os.path.commonpath([root, path]) != root:
+            raise ValueError(f"'output_dir' must be a directory under {self.output_dir}.")
+        return path
+
+    async def _run(self, batch: _Batch, items, api_key: Optional[str], render_reports: bool, report_format: str) -> None:
+        try:
+            await self.runner.run(items, batch.output_dir, api_key, render_reports, report_format,
+                                  on_result=batch.results.append)
+        except Exception as e:
+            logger.exception(f"Batch {batch.id} stopped: {e}")
+        finally:
+            batch.finished_at = time.time()
+
+    def _forget_finished_batches(self) -> None:
+        finished = [batch_id for batch_id, batch in self._batches.items() if batch.finished_at is not None]
+        for batch_id in finished[:max(0, len(finished) - MAX_FINISHED_BATCHES)]:
+            del self._batches[batch_id]
+
+
+def _option(request: Dict[str, Any], name: str, kind: type, default: Any) -> Any:
+    # A missing or null option takes its default, any other value must have the expected JSON type
+    value = request.get(name)
+    if value is None:
+        return default
+    if not isinstance(value, kind):
+        raise ValueError(f"'{name}' must be a {'boolean' if kind is bool else 'string'}.")
+    return value
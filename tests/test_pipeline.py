@@ -0,0 +1,90 @@
+# financial_analyzer/tests/test_pipeline.py
+import os
+import pytest
+from core import pipeline
+from core.document_store import DocumentStore
+from core.results_store import ResultsStore
+
+FIGURES = {"current_assets": 50000.0, "current_liabilities": 25000.0, "revenue": 150000.0, "net_income": 18000.0}
+
+
+def document(figures):
+    return {"file": "report.pdf", "content_hash": "a" * 64, "company": "Acme plc", "period": "2023-12-31", "pages": 2,
+            "data": figures, "provenance": {field: "llm" for field in figures}, "llm_complete": True}
+
+
+def analyse(monkeypatch, store, figures, explanation):
+    monkeypatch.setattr(pipeline, "results_store", store)
+    monkeypatch.setattr(pipeline, "extract_documents", lambda pdf_paths, upload_dir, llm=None: [document(figures)])
+    monkeypatch.setattr(pipeline, "get_ratio_explanations",
+                        lambda ratios, **kwargs: {ratio_name: explanation for ratio_name in ratios})
+    return pipeline.run_analysis(["report.pdf"], "uploads", in_memory=True, report_format="json")
+
+
+def test_analysis_is_stored_again_when_its_ratios_changed(monkeypatch, tmp_path):
+    store = ResultsStore(os.path.join(tmp_path, "results.sqlite3"))
+    first = analyse(monkeypatch, store, FIGURES, "First explanation.")
+    corrected = analyse(monkeypatch, store, {**FIGURES, "current_liabilities": 20000.0}, "Second explanation.")
+
+    assert corrected["ratios"] != first["ratios"]
+    stored = store.get_analysis(pipeline.make_analysis_key([pipeline._document_key("a" * 64)]))
+    assert stored["ratios"] == corrected["ratios"]
+    assert set(stored["explanations"].values()) == {"Second explanation."}
+
+
+def test_stored_explanations_are_reused_for_unchanged_ratios(monkeypatch, tmp_path):
+    store = ResultsStore(os.path.join(tmp_path, "results.sqlite3"))
+    analyse(monkeypatch, store, FIGURES, "First explanation.")
+    again = analyse(monkeypatch, store, FIGURES, "Second explanation.")
+
+    assert set(again["explanations"].values()) == {"First explanation."}
+
+
+def test_fallback_explanations_are_not_stored(monkeypatch, tmp_path):
+    store = ResultsStore(os.path.join(tmp_path, "results.sqlite3"))
+    analyse(monkeypatch, store, FIGURES, "First explanation.")
+    analyse(monkeypatch, store, {**FIGURES, "current_liabilities": 20000.0}, pipeline.EXPLANATION_FALLBACK)
+
+    stored = store.get_analysis(pipeline.make_analysis_key([pipeline._document_key("a" * 64)]))
+    assert set(stored["explanations"].values()) == {"First explanation."}
+
+
+@pytest.fixture
+def stores(monkeypatch, tmp_path):
+    store = ResultsStore(os.path.join(tmp_path, "results.sqlite3"))
+    monkeypatch.setattr(pipeline, "results_store", store)
+    monkeypatch.setattr(pipeline, "document_store", DocumentStore(10))
+    monkeypatch.setattr(pipeline, "file_sha256", lambda path: "b" * 64)
+    monkeypatch.setattr(pipeline, "load_pdf_pages", lambda path, parse_in_pool=False: [])
+    return store
+
+
+def extract_with(monkeypatch, pages, llm_answer):
+    def extract_financial_data_from_text(text, fields=None, llm=None):
+        if isinstance(llm_answer, Exception):
+            raise llm_answer
+        return {field: llm_answer[field] for field in fields if field in llm_answer}
+
+    monkeypatch.setattr(pipeline, "load_relevant_pages", lambda pdf_paths, upload_dir, parse_in_pool=False: pages)
+    monkeypatch.setattr(pipeline, "extract_financial_data_from_text", extract_financial_data_from_text)
+    return pipeline.extract_document("report.pdf", "uploads")
+
+
+def test_failed_llm_extraction_is_not_persisted_and_is_retried(monkeypatch, stores):
+    pages = ["Balance sheet\nTotal assets 200,000\n"]
+    failed = extract_with(monkeypatch, pages, RuntimeError("API key not valid"))
+
+    assert failed["data"] == {"total_assets": 200_000} and not failed["llm_complete"]
+    assert stores.get_document(pipeline._document_key("b" * 64)) is None
+
+    retried = extract_with(monkeypatch, pages, FIGURES)
+    assert retried["llm_complete"]
+    assert retried["data"] == {**FIGURES, "total_assets": 200_000}
+    assert stores.get_document(pipeline._document_key("b" * 64))["data"] == retried["data"]
+
+
+def test_document_without_text_is_not_stored(monkeypatch, stores):
+    extract_with(monkeypatch, [], FIGURES)
+
+    assert stores.get_document(pipeline._document_key("b" * 64)) is None
+    assert pipeline.document_store.get(pipeline._document_key("b" * 64)) is None
@@ -0,0 +1,47 @@
+# financial_analyzer/tests/test_rule_extractor.py
+from core.rule_extractor import extract_financial_data_with_rules
+
+STATEMENT = """Consolidated income statement (in millions)
+                     Note   2023   2022
+Revenue                 5  1,250  1,100
+Cost of sales              (700)  (650)
+Operating profit        6    310    280
+Net income                   45     38
+"""
+
+
+def test_note_column_is_skipped_before_two_periods():
+    financial_data, provenance = extract_financial_data_with_rules([STATEMENT])
+    assert financial_data["revenue"] == 1_250e6
+    assert financial_data["ebit"] == 310e6
+    assert provenance["revenue"] == "Revenue                 5  1,250  1,100"
+
+
+def test_small_current_amount_is_not_taken_for_a_note():
+    financial_data, _ = extract_financial_data_with_rules([STATEMENT])
+    assert financial_data["net_income"] == 45e6
+    assert financial_data["cost_of_goods_sold"] == 700e6
+
+
+def test_note_column_without_a_column_heading():
+    page = "Balance sheet\nInventories 7 12,000 11,000\nTotal assets 250,000 240,000\nTotal equity 90,000 85,000\n"
+    financial_data, _ = extract_financial_data_with_rules([page])
+    assert financial_data["inventory"] == 12_000
+    assert financial_data["total_assets"] == 250_000
+
+
+def test_expenses_in_parentheses_are_positive():
+    page = "Income statement\nRevenue 150,000\nCost of sales (90,000)\nFinance costs (3,000)\nNet income (2,000)\n"
+    financial_data, _ = extract_financial_data_with_rules([page])
+    assert financial_data["cost_of_goods_sold"] == 90_000
+    assert financial_data["interest_expense"] == 3_000
+    assert financial_data["net_income"] == -2_000
+
+
+def test_compound_labels_are_not_taken_for_the_figure():
+    page = ("Balance sheet\nTotal assets less current liabilities 120,000 110,000\n"
+            "Total assets 250,000 240,000\nTotal equity: $ 90,000 85,000\n")
+    financial_data, provenance = extract_financial_data_with_rules([page])
+    assert financial_data["total_assets"] == 250_000
+    assert provenance["total_assets"] == "Total assets 250,000 240,000"
+    assert financial_data["total_equity"] == 90_000
@@ -45,4 +45,39 @@ def create_submit_button(on_click, disabled=False):
             on_click=on_click,
             width=600,
             disabled=disabled
-           )
\ No newline at end of file
+           )
+
+
+# Component for cancel button, only visible while an analysis is running
+def create_cancel_button(on_click):
+    return ft.TextButton(
+        text="Cancel Analysis",
+        on_click=on_click,
+        width=600,
+        visible=False,
+    )
+
+
+# Column the ratio cards of the current analysis are shown in
+def create_results_column():
+    return ft.Column([], width=600, spacing=10)
+
+
+# Component for one ratio card, returns the card and the text its explanation is streamed into
+def create_ratio_card(ratio_name, ratio_value):
+    explanation_text = ft.Text("Explaining...", font_family="Roboto", color="grey", size=13)
+    card = ft.Container(
+        ft.Column(
+            [
+                ft.Text(ratio_name.replace('_', ' ').title(), weight=ft.FontWeight.BOLD, size=16, color="#2C3E50"),
+                ft.Text(f"{ratio_value:.2f}", weight=ft.FontWeight.BOLD, size=18, color="#3498DB"),
+                explanation_text,
+            ],
+            spacing=4,
+        ),
+        padding=12,
+        border=ft.border.all(1, "#C8C8C8"),
+        border_radius=6,
+        bgcolor="#F9F9F9",
+    )
+    return card, explanation_text
@@ -1,13 +1,27 @@
 # financial_analyzer/ui/main.py
 import flet as ft
+import logging
 import os
+import threading
+import time
+import uuid
 from typing import List
 import shutil
 from core.agent import process_financial_analysis
+from core.jobs import job_manager, JOB_DONE, JOB_CANCELLED
+from core.prefetch import UploadPrefetcher
+from core.report_outputs import schedule_output_cleanup
+from core.upload_store import upload_store
 from config.app_config import google_api_key,flet_secret_key
-from ui.components import create_api_key_field, create_file_display_text, create_upload_button, create_step_text, create_submit_button
+from ui.components import create_api_key_field, create_file_display_text, create_upload_button, create_step_text, create_submit_button, create_cancel_button
+from ui.components import create_results_column, create_ratio_card
 from flet import FilePickerUploadFile, FilePickerResultEvent
 
+logger = logging.getLogger(__name__)
+
+# Explanations stream in from several threads at once, the page is repainted at most this often while they do
+STREAM_UPDATE_SECONDS = 0.1
+
 
 def main(page: ft.Page):
     page.title = "Financial Statement Analysis App"
@@ -16,10 +30,29 @@ def main(page: ft.Page):
     page.window_width = 700
     page.window_height = 800
     page.theme = ft.theme.Theme(color_scheme_seed='blue')  # use seed theme color of blue
+    page.scroll = ft.ScrollMode.AUTO  # ratio cards are added below the form during an analysis
 
     # Create upload directory in the root directory
-    upload_dir = "upload_dir"  # Directory to store files during web execution
+    upload_dir = "upload_dir"  # Directory Flet writes uploads to, each is moved into the upload store once it finished
     os.makedirs(upload_dir, exist_ok=True)
+    # Uploads that never finished leave their staged files behind
+    upload_store.sweep_staged(upload_dir)
+
+    # Remove reports of earlier analyses once they are past the retention period
+    schedule_output_cleanup()
+
+    # Uploads of this session are staged under a session prefix and kept in the shared content-addressed store
+    session_id = uuid.uuid4().hex
+    staged_names = {}  # staged file name -> name the user uploaded
+
+    # Extracts every file in the background as soon as its upload finishes, so analyzing only merges and renders
+    prefetcher = UploadPrefetcher(upload_store.blob_dir)
+
+    def on_session_close(e):
+        upload_store.release(session_id)
+        prefetcher.retain([])
+
+    page.on_close = on_session_close
 
     # Variables for storing state
     uploaded_files = []
@@ -28,17 +61,30 @@ def main(page: ft.Page):
 
     # Create a shared state for accessing `api_key`  from local to use on nested call back.
     state = type('state', (object,), {
-        "api_key": api_key
+        "api_key": api_key,
+        "job_id": None,  # background analysis job this session is waiting for
     })()
 
      # --- FLET UI Elements ---
     def on_upload_callback(e):
         if e.error:
-            print(f"ERROR: Upload error for file: {e.file_name}: {e.error}")
+            logger.error(f"Upload error for file: {e.file_name}: {e.error}")
             page.show_snack_bar(ft.SnackBar(ft.Text(f"Error uploading file: {e.file_name}, Error:{e.error}", font_family='Roboto'), open=True))
         
-        else:
-             print(f"DEBUG: File {e.file_name} uploaded successfully.")
+        elif e.progress is None or e.progress >= 1.0:
+             logger.debug(f"File {e.file_name} uploaded successfully.")
+             file_name = staged_names.get(e.file_name)
+             if file_name is None:  # upload of an earlier selection that finished after a new one was made
+                 upload_store.discard_staged(os.path.join(upload_dir, e.file_name))
+                 return
+             try:
+                 content_hash = upload_store.ingest(session_id, file_name, os.path.join(upload_dir, e.file_name))
+             except OSError as error:
+                 logger.error(f"Could not store uploaded file {file_name}: {error}")
+                 page.show_snack_bar(ft.SnackBar(ft.Text(f"Error storing file: {file_name}", font_family='Roboto'), open=True))
+                 return
+             prefetcher.file_uploaded(os.path.basename(upload_store.blob_path(content_hash)), state.api_key)
+             upload_store.sweep_staged(upload_dir)
 
     # File picker
     file_picker = ft.FilePicker(
@@ -69,17 +115,24 @@ def main(page: ft.Page):
     def on_files_selected(e: FilePickerResultEvent):
       if e.files:
         uploaded_files.clear()
+        # A new selection replaces the files of the previous one
+        upload_store.release(session_id)
+        prefetcher.retain([])
+        staged_names.clear()
         upload_list = []
         for file in e.files:
+            # Staged under a session prefix, so sessions uploading files of the same name never overwrite each other
+            staged_name = f"{session_id}-{file.name}"
+            staged_names[staged_name] = file.name
             # Prepare the file for upload using page.get_upload_url to let Flet handle the process.
-            upload_url = page.get_upload_url(file.name, 600) # 600 is arbitrary number for timeout
+            upload_url = page.get_upload_url(staged_name, 600) # 600 is arbitrary number for timeout
             upload_list.append(
                     FilePickerUploadFile(
-                    file.name,
+                    staged_name,
                     upload_url=upload_url,
                 )
             )
-            # store full upload path on `uploaded_files`.
+            # store the uploaded file names on `uploaded_files`, resolved to stored files by the upload store.
             uploaded_files.append(file.name)
 
         file_picker.upload(upload_list)
@@ -95,8 +148,98 @@ def main(page: ft.Page):
     # Step progress text
     step_text = create_step_text()
 
+    # Ratio cards of the current analysis, shown as soon as the ratios are calculated
+    results_column = create_results_column()
+    explanation_texts = {}
+    streaming_started = set()
+    stream_lock = threading.Lock()
+    last_stream_update = 0.0
+
+    # Analysis result callbacks, called from the job and explanation worker threads
+    def on_ratios(ratios):
+        with stream_lock:
+            explanation_texts.clear()
+            streaming_started.clear()
+            results_column.controls.clear()
+            for ratio_name, ratio_value in ratios.items():
+                card, explanation_text = create_ratio_card(ratio_name, ratio_value)
+                explanation_texts[ratio_name] = explanation_text
+                results_column.controls.append(card)
+        page.update()
+
+    def on_explanation_token(ratio_name, text):
+        nonlocal last_stream_update
+        with stream_lock:
+            explanation_text = explanation_texts[ratio_name]
+            if ratio_name not in streaming_started:  # the first chunk replaces the placeholder
+                streaming_started.add(ratio_name)
+                explanation_text.value = ""
+                explanation_text.color = "#646464"
+            explanation_text.value += text
+            now = time.monotonic()
+            if now - last_stream_update < STREAM_UPDATE_SECONDS:
+                return
+            last_stream_update = now
+        page.update()
+
+    def on_explanation(ratio_name, explanation):
+        with stream_lock:
+            explanation_text = explanation_texts[ratio_name]
+            streaming_started.add(ratio_name)
+            explanation_text.value = explanation
+            explanation_text.color = "#646464"
+        page.update()
+
+    # Background job callbacks, called from the job worker thread
+    def on_job_progress(job):
+        step_text.value = job.stage
+        page.update()
+
+    def on_job_done(job):
+        nonlocal is_processing
+        try:
+            analysis_result = job.result
+            if job.state == JOB_CANCELLED:
+                step_text.value = "Analysis Cancelled"
+                page.update()
+
+            elif job.state == JOB_DONE and analysis_result and os.path.exists(analysis_result):  # if result is path to download report
+                step_text.value = "Report Generated Successfully"  # updated success state.
+                page.update()
+                page.launch_url(analysis_result)
+
+            elif job.state == JOB_DONE:  # if no report returned or is a `str` from error method return it is handle via ui via this `snack bar`.
+                step_text.value = "Error Generating Report"  # update error state.
+                page.update()
+                page.show_snack_bar(ft.SnackBar(
+                    ft.Text(f"{analysis_result}", font_family='Roboto'),
+                    open=True,
+                )
+                )
+
+            else:  # any other exception raised by the job
+                step_text.value = "An unexpected error happened."  # update error state
+                page.update()
+                page.show_snack_bar(ft.SnackBar(
+                    ft.Text(f"An unexpected error happened while processing: {job.error}", font_family='Roboto'),
+                    open=True,
+                )
+                )
+
+        finally:
+            # allow a new submission once the job finished
+            is_processing = False
+            state.job_id = None
+            submit_btn.disabled = False
+            cancel_btn.visible = False
+
+            page.update()
+
     # Action button (Analyze or Processing animation)
     def run_analysis(e):
+        nonlocal is_processing
+        if is_processing:  # an analysis of this session is already queued or running
+            return
         # Use shared api_key state  to access value set via api_field and shared across page
         if not state.api_key:
             page.show_snack_bar(ft.SnackBar(
@@ -110,50 +253,50 @@ def main(page: ft.Page):
                 open=True,
             )
             )
+        elif any(upload_store.path(session_id, file) is None for file in uploaded_files):
+            page.show_snack_bar(ft.SnackBar(
+                ft.Text("Please wait until every file finished uploading.", font_family='Roboto'),
+                open=True,
+            )
+            )
         else:
-            # start spinning icon to prevent multiple action executions
-
+            # disable the button to prevent multiple action executions
+            is_processing = True
+            submit_btn.disabled = True
+            cancel_btn.visible = True
+            step_text.value = "Queued..."
+            results_column.controls.clear()
             page.update()
 
-            try:
+            # The files stay stored until the job finished, even if a new selection or the session's end releases them
+            content_hashes = [upload_store.content_hash(session_id, file) for file in uploaded_files]
+            upload_store.pin(content_hashes)
 
-                step_text.value = "Extracting Data..."
-                page.update()
-                # Correct the call here to use full path of each uploaded file in  `process_financial_analysis` function.
-                full_paths=[os.path.join(upload_dir, file) for file in uploaded_files ]
-                analysis_result = process_financial_analysis(full_paths, state.api_key, upload_dir)
-
-                if os.path.exists(analysis_result):  # if result is path to download report
-                    step_text.value = "Report Generated Successfully"  # updated success state.
-                    page.update()
-                    page.launch_url(analysis_result)
-
-                else:  # if no report returned or is a `str` from error method return it is handle via ui via this `snack bar`.
-                    step_text.value = "Error Generating Report"  # update error state.
-                    page.update()
-                    page.show_snack_bar(ft.SnackBar(
-                        ft.Text(f"{analysis_result}", font_family='Roboto'),
-                        open=True,
-                    )
-                    )
-
-            except Exception as e:  # any other exception that we catch
-                step_text.value = "An unexpected error happened."  # update error state
-                page.update()
-                page.show_snack_bar(ft.SnackBar(
-                    ft.Text(f"An unexpected error happened while processing: {e}", font_family='Roboto'),
-                    open=True,
-                )
-                )
-
-            finally:
-                # stop spinning icon after processing completed
-                is_processing = False
-                submit_btn.disabled = False
+            def on_analysis_done(job):
+                upload_store.unpin(content_hashes)
+                on_job_done(job)
 
-                page.update()
+            # Run the analysis in the background job pool so the session stays responsive
+            full_paths=[upload_store.path(session_id, file) for file in uploaded_files ]
+            try:
+                job = job_manager.submit(
+                    process_financial_analysis, full_paths, state.api_key, upload_store.blob_dir,
+                    on_progress=on_job_progress, on_done=on_analysis_done, prefetcher=prefetcher,
+                    on_ratios=on_ratios, on_explanation_token=on_explanation_token, on_explanation=on_explanation,
+                )
+            except Exception:
+                upload_store.unpin(content_hashes)
+                raise
+            if not job.is_finished:
+                state.job_id = job.id
+
+    def cancel_analysis(e):
+        if state.job_id and job_manager.cancel(state.job_id):
+            step_text.value = "Cancelling..."
+            page.update()
 
     submit_btn = create_submit_button(lambda e: run_analysis(e), disabled=is_processing)
+    cancel_btn = create_cancel_button(lambda e: cancel_analysis(e))
 
     def on_api_change(e):
         # update local variable of shared object `state` to store data in page context and re access later
@@ -178,7 +321,9 @@ def main(page: ft.Page):
                 file_display_text,  # Display File text
                 ft.Container(api_key_field, padding=10),  # text field with google api key
                 submit_btn,
+                cancel_btn,
                 step_text,
+                results_column,
             ],
 
             alignment=ft.CrossAxisAlignment.CENTER,